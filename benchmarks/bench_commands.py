@@ -0,0 +1,80 @@
+"""
+Measures the throughput of the Olex2 command channel with concurrent writer processes and a stand-in for Olex2 that
+consumes the command file, and checks that no command is lost and that every writer's commands arrive in order.
+The legacy single-shot overwrite (mode "w") is run the same way for comparison.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from multiprocessing import Process
+
+from common import timed
+from olx_gui.utils.olex_commands import consume, send
+
+
+def channel_writer(target: str, writer: int, n_commands: int, batch: int) -> None:
+    for start in range(0, n_commands, batch):
+        send(*(f"echo {writer} {k}" for k in range(start, min(start + batch, n_commands))), target=target)
+
+
+def legacy_writer(target: str, writer: int, n_commands: int, batch: int) -> None:
+    for start in range(0, n_commands, batch):
+        with open(target, "w") as f:
+            f.write("\n".join(f"echo {writer} {k}" for k in range(start, min(start + batch, n_commands))))
+
+
+def run(writer, target: str, n_writers: int, n_commands: int, batch: int):
+    received = []
+    done = threading.Event()
+
+    def olex():
+        while True:
+            finished = done.is_set()
+            received.extend(consume(target))
+            if finished:
+                return
+            time.sleep(0.001)
+
+    consumer = threading.Thread(target=olex)
+    consumer.start()
+    processes = [Process(target=writer, args=(target, k, n_commands, batch)) for k in range(n_writers)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    done.set()
+    consumer.join()
+    return received
+
+
+def check(received, n_writers: int, n_commands: int):
+    """Returns (lost commands, writers whose commands arrived out of order)."""
+    per_writer = {k: [] for k in range(n_writers)}
+    for command in received:
+        _, writer, k = command.split()
+        per_writer[int(writer)].append(int(k))
+    lost = sum(n_commands - len(set(ks)) for ks in per_writer.values())
+    unordered = sum(ks != sorted(ks) for ks in per_writer.values())
+    return lost, unordered
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--commands", type=int, default=500, help="Commands sent by every writer.")
+    parser.add_argument("--batch", type=int, default=5, help="Commands per write.")
+    args = parser.parse_args()
+
+    target = os.path.join(tempfile.mkdtemp(), "olexcmd")
+    total = args.writers * args.commands
+    print(f"{'writer':>8} {'time [s]':>9} {'commands/s':>11} {'lost':>6} {'unordered':>10}")
+    for name, writer in (("channel", channel_writer), ("legacy", legacy_writer)):
+        t, received = timed(lambda: run(writer, target, args.writers, args.commands, args.batch), 1)
+        lost, unordered = check(received, args.writers, args.commands)
+        print(f"{name:>8} {t:>9.3f} {total / t:>11.0f} {lost:>6} {unordered:>10}")
+
+
+if __name__ == "__main__":
+    main()
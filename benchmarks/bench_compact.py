@@ -0,0 +1,91 @@
+"""
+Compares the pretty and the compact output of H3Section (olx_gui.components.compact): size of the HTML, rendering time
+and parsing time with html.parser, standing in for the parser of Olex2. Both outputs are checked to parse to the same
+tags, attributes, text and #include comments, with the whitespace collapsed as a browser does: dropped next to the
+table and block tags and a single space elsewhere.
+"""
+import argparse
+from html.parser import HTMLParser
+
+from common import build_gui, invalidate, timed
+from olx_gui.components.compact import BLOCK_TAGS
+
+
+SPACE = ("data", " ")
+
+
+class Tokens(HTMLParser):
+    """Collects the tags, the text and the comments of a document, a run of whitespace being a single space."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+
+    def handle_starttag(self, tag, attrs):
+        self.tokens.append(("start", tag, tuple(attrs)))
+
+    def handle_endtag(self, tag):
+        self.tokens.append(("end", tag))
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if data[:1].isspace():
+            self.tokens.append(SPACE)
+        if text:
+            self.tokens.append(("data", text))
+            if data[-1:].isspace():
+                self.tokens.append(SPACE)
+
+    def handle_comment(self, data):
+        self.tokens.append(("comment", data.strip()))
+
+
+def _block(token) -> bool:
+    return token[0] in ("start", "end") and token[1] in BLOCK_TAGS
+
+
+def parse(html: str) -> list:
+    parser = Tokens()
+    parser.feed(html)
+    parser.close()
+    tokens = []
+    for token in parser.tokens:
+        if token == SPACE and (not tokens or _block(tokens[-1]) or tokens[-1] == SPACE):
+            continue
+        if _block(token) and tokens and tokens[-1] == SPACE:
+            tokens.pop()
+        tokens.append(token)
+    if tokens and tokens[-1] == SPACE:
+        tokens.pop()
+    return tokens
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'components':>10} {'pretty [B]':>11} {'compact [B]':>12} {'ratio':>6} {'render [s]':>11} "
+          f"{'compact [s]':>12} {'parse [s]':>10} {'compact [s]':>12}")
+    for n in args.components:
+        section = build_gui(n)
+        pretty = str(section)
+        compact = section.render_compact()
+        assert parse(pretty) == parse(compact), "the compact output differs from the pretty output"
+
+        def render(compact: bool):
+            def run():
+                invalidate(section)
+                return section.render_compact() if compact else str(section)
+            return run
+        t_pretty, _ = timed(render(False), args.repeat)
+        t_compact, _ = timed(render(True), args.repeat)
+        p_pretty, _ = timed(lambda: parse(pretty), args.repeat)
+        p_compact, _ = timed(lambda: parse(compact), args.repeat)
+        size_pretty, size_compact = len(pretty.encode("utf-8")), len(compact.encode("utf-8"))
+        print(f"{n:>10} {size_pretty:>11} {size_compact:>12} {size_compact / size_pretty:>6.2f} {t_pretty:>11.4f} "
+              f"{t_compact:>12.4f} {p_pretty:>10.4f} {p_compact:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
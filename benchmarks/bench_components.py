@@ -0,0 +1,62 @@
+"""
+Measures how many components per second are constructed and rendered, with the precompiled component templates and
+with plain dominate rendering.
+"""
+import argparse
+
+from common import timed
+from olx_gui.components import templates
+from olx_gui.components.item_component import InputText, ComboBox, InputCheckbox, InputSpinner, Button
+
+
+def construct(n: int) -> list:
+    components = []
+    for i in range(n):
+        kind = i % 5
+        name = f"SET_{i}"
+        if kind == 0:
+            components.append(InputText(name, "Text", onclick="spy.SetParam(x, html.GetValue(~name~))"))
+        elif kind == 1:
+            components.append(ComboBox(name, "Combo", items="a;b;c", tdwidth="20%"))
+        elif kind == 2:
+            components.append(InputCheckbox(name, "Check"))
+        elif kind == 3:
+            components.append(InputSpinner(name, "Spin", label_top=False))
+        else:
+            components.append(Button(name))
+    return components
+
+
+def render(components: list) -> int:
+    size = 0
+    for component in components:
+        component.invalidate()
+        size += len("".join(component._render([], 8, "  ", True, False)))
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    t_construct, components = timed(lambda: construct(args.n), args.repeat)
+    templates.TEMPLATES_ENABLED = False
+    t_dominate, expected = timed(lambda: [render(components)], args.repeat)
+    outputs = ["".join(c._render([], 8, "  ", True, False)) for c in components]
+    templates.TEMPLATES_ENABLED = True
+    for component in components:
+        component.invalidate()
+    t_template, result = timed(lambda: [render(components)], args.repeat)
+    assert outputs == ["".join(c._render([], 8, "  ", True, False)) for c in components], \
+        "the templates render differently from dominate"
+
+    print(f"{'stage':<18} {'time [s]':>9} {'components/s':>13}")
+    for stage, elapsed in [("construction", t_construct), ("dominate render", t_dominate),
+                           ("template render", t_template)]:
+        print(f"{stage:<18} {elapsed:>9.4f} {args.n / elapsed:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
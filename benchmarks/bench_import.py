@@ -0,0 +1,53 @@
+"""
+Measures the import time of the olx_gui modules with python -X importtime, in a fresh interpreter per run.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Dict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ["olx_gui.components.item_component", "olx_gui.components.table", "olx_gui.build", "olx_gui.watch",
+           "olx_gui.utils.update_html"]
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """Returns the cumulative import time in microseconds of every module imported by importing module."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"], cwd=ROOT,
+                            capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="Number of the slowest imports shown per module.")
+    parser.add_argument("--json", help="Writes the results to this file.")
+    args = parser.parse_args()
+
+    results = {}
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        best = min(runs, key=lambda times: times[module])
+        results[module] = {"total_us": best[module], "heavy": {"pygments": "pygments" in best, "rich": "rich" in best}}
+        print(f"{module}: {best[module] / 1000:.1f} ms (pygments imported: {'pygments' in best}, "
+              f"rich imported: {'rich' in best})")
+        top_level = {name: time for name, time in best.items() if name != module and not name.startswith("olx_gui")}
+        for name, time in sorted(top_level.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"    {name}: {time / 1000:.1f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
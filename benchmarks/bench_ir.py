@@ -0,0 +1,62 @@
+"""
+Compares the dominate tree of a section with its compiled Program (olx_gui.components.ir): nodes and memory per row,
+and rendering time of both backends. The outputs are checked to be identical.
+"""
+import argparse
+import gc
+import tracemalloc
+
+from common import build_section, invalidate, timed
+from olx_gui.components.ir import count_nodes
+
+
+def retained_memory(func):
+    """Returns (bytes still allocated after func returns, its result), with the result kept alive."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = func()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def compile_only(n_rows: int, per_row: int):
+    """Builds a section, compiles it and drops the tree."""
+    return build_section(n_rows, per_row).compile()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--per-row", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'nodes/row':>10} {'ops/row':>8} {'tree B/row':>11} {'ir B/row':>9} {'dominate [s]':>13} "
+          f"{'ir [s]':>9} {'compile [s]':>12}")
+    for n_rows in args.rows:
+        section = build_section(n_rows, args.per_row)
+        compiled = section.compile()
+        expected = str(section)
+        assert str(compiled) == expected, "the compiled section differs from the dominate output"
+
+        nodes = sum(count_nodes(line) for line in section.lines) / n_rows
+        ops = sum(len(program) for program in compiled.programs) / n_rows
+        tree_memory, _ = retained_memory(lambda: build_section(n_rows, args.per_row))
+        ir_memory, _ = retained_memory(lambda: compile_only(n_rows, args.per_row))
+
+        def render_dominate():
+            invalidate(section)
+            # The expressions were validated when compiling, str(compiled) doesn't validate them again.
+            return "".join(section.iter_render(validate=False))
+        t_dominate, _ = timed(render_dominate, args.repeat)
+        t_ir, _ = timed(lambda: str(compiled), args.repeat)
+        t_compile, _ = timed(section.compile, args.repeat)
+        print(f"{n_rows:>6} {nodes:>10.0f} {ops:>8.0f} {tree_memory / n_rows:>11.0f} {ir_memory / n_rows:>9.0f} "
+              f"{t_dominate:>13.4f} {t_ir:>9.4f} {t_compile:>12.4f}")
+
+
+if __name__ == "__main__":
+    main()
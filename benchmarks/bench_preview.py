@@ -0,0 +1,62 @@
+"""
+Compares the Jupyter preview of H3Section (render context) against the deepcopy based preview it replaced, checking
+that both give the same HTML.
+"""
+import argparse
+import copy
+
+from common import build_section, invalidate, timed, peak_memory
+from olx_gui.components.item_component import Cycle, InputText, InputSpinner
+from olx_gui.components.table import Row
+
+
+def deepcopy_preview(section) -> str:
+    """The H3Section._repr_html_ implementation before the render context existed."""
+    selfrepr = copy.deepcopy(section)
+    for line in selfrepr.lines:
+        if isinstance(line, Row):
+            # Widths used to be resolved in Row.add, before the Cycles were unwrapped.
+            line.finalize()
+            line.table1["width"] = section.preview_width
+            for k, component in enumerate(line.last_component):
+                if isinstance(component, Cycle):
+                    component = component.children[0][0]
+                    line.last_component.children[k] = component
+    # Nothing was cached before the render cache existed.
+    invalidate(selfrepr)
+    return str(selfrepr)
+
+
+def build_preview_section(n_rows: int):
+    section = build_section(n_rows)
+    for i, line in enumerate(section.lines[1:]):
+        if i % 2 == 0:
+            line.add(Cycle(InputText(f"CYCLE_A_{i}", "A"), InputSpinner(f"CYCLE_B_{i}", "B"), "spy.GetParam(x)"))
+    return section
+
+
+def context_preview(section) -> str:
+    invalidate(section)
+    return section._repr_html_()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'deepcopy [s]':>13} {'context [s]':>12} {'deepcopy peak':>14} {'context peak':>13}")
+    for n_rows in args.rows:
+        section = build_preview_section(n_rows)
+        t_copy, expected = timed(lambda: deepcopy_preview(section), args.repeat)
+        t_context, result = timed(lambda: context_preview(section), args.repeat)
+        assert result == expected, "the preview differs from the deepcopy path"
+        assert str(section) != result, "the preview changed the section"
+        mem_copy = peak_memory(lambda: deepcopy_preview(section))
+        mem_context = peak_memory(lambda: context_preview(section))
+        print(f"{n_rows:>6} {t_copy:>13.4f} {t_context:>12.4f} {mem_copy:>14} {mem_context:>13}")
+
+
+if __name__ == "__main__":
+    main()
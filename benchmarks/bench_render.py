@@ -0,0 +1,54 @@
+"""
+Compares the old string concatenation rendering of H3Section against the streaming renderer.
+"""
+import argparse
+import io
+
+from common import build_section, invalidate, timed, peak_memory
+
+
+def concat_render(section) -> str:
+    """The rendering H3Section.__str__ used before iter_render existed."""
+    invalidate(section)
+    strs = ""
+    for line in section.lines:
+        strs += "\n" + str(line)
+    return strs
+
+
+class NullWriter:
+    """Discards the written chunks, standing in for a file or a socket."""
+    def write(self, chunk: str) -> int:
+        return len(chunk)
+
+
+def stream_render(section) -> int:
+    invalidate(section)
+    # The concatenation path rendered without validating the Olex2 expressions.
+    return section.write_to(NullWriter(), validate=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>6} {'concat [s]':>11} {'stream [s]':>11} {'cached [s]':>11} {'concat peak':>12} "
+          f"{'stream peak':>12}")
+    for n_rows in args.rows:
+        section = build_section(n_rows)
+        t_concat, expected = timed(lambda: concat_render(section), args.repeat)
+        t_cached, result = timed(lambda: str(section), args.repeat)
+        assert result == expected, "str(section) differs from the concatenation path"
+        t_stream, _ = timed(lambda: stream_render(section), args.repeat)
+        buffer = io.StringIO()
+        section.write_to(buffer)
+        assert buffer.getvalue() == expected, "write_to differs from the concatenation path"
+        mem_concat = peak_memory(lambda: concat_render(section))
+        mem_stream = peak_memory(lambda: stream_render(section))
+        print(f"{n_rows:>6} {t_concat:>11.4f} {t_stream:>11.4f} {t_cached:>11.4f} {mem_concat:>12} {mem_stream:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""
+Measures how adding components one at a time to a single Row scales with the number of components.
+"""
+import argparse
+
+from common import timed
+from olx_gui.components.item_component import InputText
+from olx_gui.components.table import Row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    components = [InputText(f"SET_{i}", f"Text {i}") for i in range(max(args.components))]
+    print(f"{'components':>10} {'add [s]':>9} {'finalize [s]':>13}")
+    for n in args.components:
+        def add_all():
+            row = Row("ROW")
+            for component in components[:n]:
+                row.add(component)
+            return row
+        t_add, row = timed(add_all, args.repeat)
+        t_finalize, _ = timed(row.finalize, 1)
+        print(f"{n:>10} {t_add:>9.4f} {t_finalize:>13.4f}")
+
+if __name__ == "__main__":
+    main()
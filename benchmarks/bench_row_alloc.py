@@ -0,0 +1,95 @@
+"""
+Measures the allocations of creating rows with tracemalloc, comparing the Pars based RowConfig that was used before
+Params against the shared default config.
+"""
+import argparse
+import tracemalloc
+from dataclasses import dataclass
+from typing import Optional
+
+from common import timed
+from olx_gui.components.table import Pars, Row, RowConfig, DEFAULT_ROW_CONFIG
+
+
+@dataclass
+class LegacyRowConfig:
+    """RowConfig as it was before Params, allocating seven Pars per instance."""
+    tr1_parameters: Optional[dict] = None
+    td1_parameters: Optional[dict] = None
+    table1_parameters: Optional[dict] = None
+    tr2_parameters: Optional[dict] = None
+    td2_parameters: Optional[dict] = None
+    table2_parameters: Optional[dict] = None
+    tr3_parameters: Optional[dict] = None
+    children_width: Optional[str] = None
+
+    def __post_init__(self):
+        self.tr1_parameters = Pars({"ALIGN": "left", "NAME": "NAME", "width": "100%"})
+        self.td1_parameters = Pars({"colspan": "#colspan"})
+        self.table1_parameters = Pars({"border": "0", "width": "100%", "cellpadding": "0", "cellspacing": "0",
+                                       "Xbgcolor": "#ffaaaa"})
+        self.tr2_parameters = Pars({"Xbgcolor": "#ffffaa"})
+        self.td2_parameters = Pars({"width": "100", "align": "left"})
+        self.table2_parameters = Pars({"width": "100%", "cellpadding": "0", "cellspacing": "2"})
+        self.tr3_parameters = Pars({"bgcolor": "$GetVar(HtmlTableGroupBgColour)"})
+
+    def to_dict(self):
+        for at, val in self.__dict__.items():
+            if isinstance(val, Pars):
+                self.__dict__[at] = val.__dict__
+
+
+def legacy_configs(n: int) -> list:
+    configs = []
+    for i in range(n):
+        config = LegacyRowConfig()
+        config.tr1_parameters["NAME"] = f"ROW_{i}"
+        config.to_dict()
+        configs.append(config)
+    return configs
+
+
+def shared_configs(n: int) -> list:
+    return [DEFAULT_ROW_CONFIG for _ in range(n)]
+
+
+def override_configs(n: int) -> list:
+    return [DEFAULT_ROW_CONFIG.override(table1_parameters={"width": "50%"}) for _ in range(n)]
+
+
+def rows(n: int) -> list:
+    return [Row(f"ROW_{i}") for i in range(n)]
+
+
+def allocations(func, n: int):
+    """Returns the retained bytes and number of blocks allocated by func(n)."""
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        result = func(n)
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    count = sum(stat.count_diff for stat in stats)
+    del result
+    return size, count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=10000)
+    args = parser.parse_args()
+
+    print(f"{'case':<18} {'time [s]':>9} {'bytes/row':>10} {'blocks/row':>11}")
+    for name, func in [("legacy config", legacy_configs), ("shared config", shared_configs),
+                       ("override config", override_configs), ("RowConfig()", lambda n: [RowConfig() for _ in range(n)]),
+                       ("Row", rows)]:
+        elapsed, _ = timed(lambda: func(args.n), 1)
+        size, count = allocations(func, args.n)
+        print(f"{name:<18} {elapsed:>9.4f} {size / args.n:>10.1f} {count / args.n:>11.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""
+Compares getting a built section back from a snapshot (olx_gui.snapshot) with building it again and with pickle and
+deepcopy of the dominate tree: time to load and to render, and the size of the files. The rendered outputs are checked
+to be identical.
+"""
+import argparse
+import copy
+import pickle
+import sys
+
+from common import build_gui, timed
+from olx_gui.snapshot import dumps, loads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--components", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    sys.setrecursionlimit(10000)
+
+    print(f"{'components':>10} {'build [s]':>10} {'deepcopy [s]':>13} {'unpickle [s]':>13} {'load [s]':>9} "
+          f"{'render [s]':>11} {'pickle [B]':>11} {'snapshot [B]':>13}")
+    for n in args.components:
+        section = build_gui(n)
+        expected = str(section)
+        data = dumps(section)
+        pickled = pickle.dumps(section, protocol=pickle.HIGHEST_PROTOCOL)
+        t_build, _ = timed(lambda: build_gui(n), args.repeat)
+        t_copy, _ = timed(lambda: copy.deepcopy(section), args.repeat)
+        t_unpickle, _ = timed(lambda: pickle.loads(pickled), args.repeat)
+        t_load, snapshot = timed(lambda: loads(data), args.repeat)
+        t_render, html = timed(lambda: str(snapshot), args.repeat)
+        assert html == expected, "the snapshot renders differently from the section"
+        print(f"{n:>10} {t_build:>10.4f} {t_copy:>13.4f} {t_unpickle:>13.4f} {t_load:>9.4f} {t_render:>11.4f} "
+              f"{len(pickled):>11} {len(data):>13}")
+
+
+if __name__ == "__main__":
+    main()
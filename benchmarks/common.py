@@ -0,0 +1,100 @@
+"""
+Helpers shared by the benchmark scripts. Run the scripts from the repository root, e.g.
+``python benchmarks/bench_render.py``.
+"""
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from olx_gui.components.item_component import (InputText, ComboBox, InputCheckbox, InputSpinner, InputLinkButton,
+                                                Cycle, Ignore)
+from olx_gui.components.render_cache import CachedRender
+from olx_gui.components.table import Row, H3Section
+
+COMPONENT_KINDS = ("InputText", "ComboBox", "InputCheckbox", "InputSpinner", "InputLinkButton", "Cycle", "Ignore")
+
+
+def invalidate(tag) -> None:
+    """
+    Drops the render cache of the tag and of every tag below it, so rendering starts from the tag tree. Invalidating
+    the rows alone only walks up and leaves the caches of their components warm.
+    """
+    stack = list(getattr(tag, "lines", [tag]))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, CachedRender):
+            node._render_cache = None
+        stack.extend(getattr(node, "children", ()))
+
+
+def build_section(n_rows: int, per_row: int = 3) -> H3Section:
+    """Builds a synthetic section with n_rows rows of per_row components each."""
+    section = H3Section()
+    for i in range(n_rows):
+        row = Row(f"ROW_{i}")
+        components = []
+        for j in range(per_row):
+            name = f"SET_{i}_{j}"
+            if j % 3 == 0:
+                components.append(InputText(name, f"Text {j}"))
+            elif j % 3 == 1:
+                components.append(ComboBox(name, f"Combo {j}", items="a;b;c"))
+            else:
+                components.append(InputCheckbox(name, f"Check {j}"))
+        row.add(*components)
+        section.add(row)
+    return section
+
+
+def make_component(i: int):
+    """The i-th component of a synthetic GUI, cycling through COMPONENT_KINDS."""
+    kind = COMPONENT_KINDS[i % len(COMPONENT_KINDS)]
+    name = f"SET_{i}"
+    if kind == "InputText":
+        return InputText(name, "Text", onclick="spy.SetParam(x, html.GetValue(~name~))")
+    if kind == "ComboBox":
+        return ComboBox(name, "Combo", items="a;b;c", tdwidth="20%")
+    if kind == "InputCheckbox":
+        return InputCheckbox(name, "Check")
+    if kind == "InputSpinner":
+        return InputSpinner(name, "Spin", label_top=False)
+    if kind == "InputLinkButton":
+        return InputLinkButton(name, "Link")
+    if kind == "Cycle":
+        return Cycle(InputText(f"{name}_A", "A"), InputCheckbox(f"{name}_B", "B"), f"strcmp(GetVar({name}), 'a')")
+    return Ignore(ComboBox(name, "Ignored", items="x;y"), f"spy.GetParam({name})")
+
+
+def build_gui(n_components: int, per_row: int = 4) -> H3Section:
+    """Builds a synthetic section of n_components mixed components, per_row components per row."""
+    section = H3Section()
+    for start in range(0, n_components, per_row):
+        row = Row(f"ROW_{start // per_row}")
+        row.add(*(make_component(i) for i in range(start, min(start + per_row, n_components))))
+        section.add(row)
+    return section
+
+
+def timed(func: Callable, repeat: int = 3) -> Tuple[float, object]:
+    """Returns the best wall time out of repeat runs and the last result."""
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def peak_memory(func: Callable) -> int:
+    """Returns the peak traced memory in bytes while running func."""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
@@ -0,0 +1,122 @@
+"""
+Runs the benchmark suite on synthetic GUIs of several sizes and stores the results as JSON, e.g.
+
+    python benchmarks/run.py -o results.json
+    python benchmarks/run.py --compare results.json
+
+The GUIs mix every component kind (see common.COMPONENT_KINDS). For every size it measures the construction of the
+components, adding them one at a time to a single Row and resolving its layout, rendering str(H3Section) from the tree
+(with every render cache dropped) and from the render cache, the Jupyter preview from the tree and the peak memory of
+building and rendering. The times are the best of --repeat runs, in seconds. Nothing is downloaded.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+
+from common import build_gui, invalidate, make_component, peak_memory, timed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALES = [10, 100, 1000, 10000]
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_scale(n: int, repeat: int) -> dict:
+    from olx_gui.components.table import Row
+
+    t_construct, components = timed(lambda: [make_component(i) for i in range(n)], repeat)
+
+    def add_all():
+        row = Row("ROW")
+        for component in components:
+            row.add(component)
+        return row
+    t_add, row = timed(add_all, repeat)
+    t_layout, _ = timed(lambda: (row.invalidate(), setattr(row, "_layout_dirty", True), row.finalize()), repeat)
+
+    section = build_gui(n)
+
+    def render_cold():
+        invalidate(section)
+        return str(section)
+    t_render, html = timed(render_cold, repeat)
+    t_cached, cached = timed(lambda: str(section), repeat)
+    assert cached == html, "the render cache differs from the tree"
+
+    def preview_cold():
+        invalidate(section)
+        return section._repr_html_()
+    t_preview, _ = timed(preview_cold, repeat)
+    memory = peak_memory(lambda: str(build_gui(n)))
+    return {
+        "components": n,
+        "rows": len(section.lines) - 1,
+        "construct_s": t_construct,
+        "construct_per_s": n / t_construct,
+        "row_add_s": t_add,
+        "row_layout_s": t_layout,
+        "render_s": t_render,
+        "render_cached_s": t_cached,
+        "preview_s": t_preview,
+        "html_bytes": len(html.encode("utf-8")),
+        "peak_memory_bytes": memory,
+    }
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    keys = ["construct_s", "row_add_s", "row_layout_s", "render_s", "render_cached_s", "preview_s",
+            "peak_memory_bytes"]
+    print(f"{'components':>10} " + " ".join(f"{key:>17}" for key in keys))
+    for scale, result in results.items():
+        cells = []
+        for key in keys:
+            value = result[key]
+            cell = f"{value:.0f}" if key.endswith("bytes") else f"{value:.4f}"
+            old = (baseline or {}).get(scale, {}).get(key)
+            if old:
+                cell += f" ({value / old:.2f}x)"
+            cells.append(f"{cell:>17}")
+        print(f"{scale:>10} " + " ".join(cells))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=SCALES, help="Numbers of components.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("-o", "--output", help="Writes the results to this JSON file.")
+    parser.add_argument("--compare", help="JSON results of an earlier run, shown as ratios (new / old).")
+    args = parser.parse_args()
+
+    results = {str(n): run_scale(n, args.repeat) for n in args.scales}
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+    print_results(results, baseline)
+    if args.output:
+        report = {
+            "meta": {
+                "commit": commit(),
+                "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                "python": sys.version.split()[0],
+                "platform": platform.platform(),
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import os as _os
+
+if _os.environ.get("OLX_GUI_PROFILE"):
+    from .profiling import enable_from_environment as _enable_profiling
+    _enable_profiling()
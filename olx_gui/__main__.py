@@ -0,0 +1,28 @@
+"""
+Command line interface of olx_gui:
+
+    olx_gui build module:section [module:section ...]
+    olx_gui watch module:section [module:section ...]
+"""
+import sys
+from typing import List, Optional
+
+from . import build, watch
+
+COMMANDS = {
+    "build": build.main,
+    "watch": watch.main,
+}
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if not argv or argv[0] not in COMMANDS:
+        print(f"usage: olx_gui {{{','.join(COMMANDS)}}} ...", file=sys.stderr)
+        sys.exit(2)
+    COMMANDS[argv[0]](argv[1:], prog=f"olx_gui {argv[0]}")
+
+
+if __name__ == "__main__":
+    main()
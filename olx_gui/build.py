@@ -0,0 +1,452 @@
+"""
+Builds many H3Sections into their .htm files in parallel.
+
+    python -m olx_gui build my_gui.sections:refinement my_gui.sections:make_options=gui/options.htm -o gui
+
+Every target is module:attribute[=output], where the attribute is an H3Section or a callable returning one, or the path
+of a spec file (.json, .yaml, .yml or .toml, see olx_gui.spec). Without an output the file is written to
+<output_dir>/<attribute>.htm or <output_dir>/<spec file name>.htm. The sections are built and rendered in a process pool,
+every file is written atomically and Olex2 is told to update once at the end. With --blocks, the #include comments are
+replaced by the blocks they refer to (see olx_gui.includes). --compact writes the HTML without indentation (see
+olx_gui.components.compact). --snapshot also writes a snapshot of every section (see olx_gui.snapshot).
+
+An index of the outputs is kept in <output_dir>/.olx_gui_cache.json. A section is neither built nor written when the
+source of its module (or its spec file), of the helper modules loaded when it was last built (every module outside of
+the standard library and the installed packages) and of olx_gui didn't change since then, and a rebuilt section is not
+written when its HTML is the same. Use --force when a section depends on anything else, like data files.
+"""
+import argparse
+import hashlib
+import importlib
+import importlib.util
+import json
+import os
+import sys
+import sysconfig
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+from .utils import update_html
+from .utils.olex_commands import file_mode
+
+SPEC_EXTENSIONS = (".json", ".yaml", ".yml", ".toml")
+
+
+@dataclass
+class SectionTarget:
+    module: str
+    attr: str
+    output: str
+    digest: Optional[str] = None
+    blocks: Optional[str] = None
+    """Root of the blocks the #include comments are expanded against, see olx_gui.includes."""
+    compact: bool = False
+    """Renders without indentation, see olx_gui.components.compact."""
+    comments: bool = True
+    """False drops the comments that are not #include."""
+    snapshot: bool = False
+    """Also writes a snapshot of the section next to the output, see olx_gui.snapshot."""
+
+    @classmethod
+    def parse(cls, spec: str, output_dir: str = ".") -> "SectionTarget":
+        """Parses module:attribute[=output] or spec_file[=output]."""
+        output = None
+        if "=" in spec:
+            spec, output = spec.split("=", 1)
+        if spec.lower().endswith(SPEC_EXTENSIONS):
+            if output is None:
+                output = os.path.join(output_dir, f"{os.path.splitext(os.path.basename(spec))[0]}.htm")
+            return SpecTarget("", spec, output)
+        if ":" not in spec:
+            raise ValueError(f"{spec} is not a valid target, it should be module:attribute[=output].")
+        module, attr = spec.split(":", 1)
+        if output is None:
+            output = os.path.join(output_dir, f"{attr}.htm")
+        return cls(module, attr, output)
+
+    @property
+    def name(self) -> str:
+        return f"{self.module}:{self.attr}"
+
+    @property
+    def key(self) -> str:
+        """What the watch mode follows to rebuild the target."""
+        return self.module
+
+    @property
+    def snapshot_path(self) -> str:
+        return f"{os.path.splitext(self.output)[0]}.olxsnap"
+
+    def write_snapshot(self, section) -> None:
+        from .components.table import H3Section
+        if isinstance(section, H3Section):
+            from .snapshot import dump
+            dump(section, self.snapshot_path)
+
+    def sources(self) -> Optional[List[str]]:
+        """The source files of the target, or None if they can't be found."""
+        try:
+            spec = importlib.util.find_spec(self.module)
+        except (ImportError, ValueError):
+            return None
+        if spec is None or spec.origin is None or not os.path.isfile(spec.origin):
+            return None
+        return [spec.origin]
+
+    def loaded_sources(self) -> List[str]:
+        """The source files of the target and of the helper modules loaded so far, see user_modules."""
+        return sorted(set(self.sources() or ()) | set(user_modules().values()))
+
+    def section(self):
+        """Imports the module if needed and returns the section, calling the attribute if it is callable."""
+        section = getattr(importlib.import_module(self.module), self.attr)
+        if callable(section):
+            section = section()
+        return section
+
+    def render(self, section=None) -> str:
+        """Renders the section (built again if None), expanding its includes when the target has blocks."""
+        section = self.section() if section is None else section
+        if (self.compact or not self.comments) and hasattr(section, "iter_render"):
+            content = "".join(section.iter_render(compact=self.compact, comments=self.comments))
+        else:
+            content = str(section)
+        if self.blocks is not None:
+            from .includes import expand_includes
+            content = expand_includes(content, self.blocks)
+        return content
+
+
+@dataclass
+class SpecTarget(SectionTarget):
+    """A section described by a spec file, whose path is the attribute."""
+    @property
+    def name(self) -> str:
+        return self.attr
+
+    @property
+    def key(self) -> str:
+        return self.attr
+
+    def sources(self) -> Optional[List[str]]:
+        return [self.attr] if os.path.isfile(self.attr) else None
+
+    def loaded_sources(self) -> List[str]:
+        # The section is built by olx_gui alone.
+        return self.sources() or []
+
+    def section(self):
+        """Compiles the spec file again, the compiled sections are cached by the digest of the spec."""
+        from .spec import DEFAULT_CACHE, load_spec
+        return DEFAULT_CACHE.section(load_spec(self.attr))
+
+
+@dataclass
+class BuildResult:
+    name: str
+    output: str
+    build_time: float
+    render_time: float
+    size: int
+    """Size of the output in bytes."""
+    status: str = "written"
+    """written, unchanged (rendered to the same HTML) or cached (not built at all)."""
+    digest: Optional[str] = None
+    sources: Optional[List[str]] = None
+    """The source files the section was built from, see SectionTarget.loaded_sources."""
+
+
+def content_digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: str) -> Optional[str]:
+    """Digest of the file content or None if it does not exist."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return content_digest(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def write_atomic(path: str, content: Union[str, bytes]) -> None:
+    """
+    Writes content to a temporary file next to path and renames it over path, so Olex2 never reads half a file. The
+    file keeps its mode, or gets the mode of a new file.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+    try:
+        with (os.fdopen(fd, "wb") if isinstance(content, bytes) else os.fdopen(fd, "w", encoding="utf-8")) as f:
+            f.write(content)
+        os.chmod(tmp_path, file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+_LIBRARY_DIRS: Optional[Tuple[str, ...]] = None
+
+
+def _library_dirs() -> Tuple[str, ...]:
+    """The directories of the standard library, of the installed packages and of olx_gui."""
+    global _LIBRARY_DIRS
+    if _LIBRARY_DIRS is None:
+        paths = sysconfig.get_paths()
+        directories = {paths[name] for name in ("stdlib", "platstdlib", "purelib", "platlib") if name in paths}
+        directories.add(os.path.dirname(os.path.abspath(__file__)))
+        _LIBRARY_DIRS = tuple(os.path.join(os.path.realpath(directory), "") for directory in directories)
+    return _LIBRARY_DIRS
+
+
+def user_modules() -> Dict[str, str]:
+    """
+    The source file of every loaded module that is neither part of the standard library, nor of an installed package,
+    nor of olx_gui, by module name. These are the modules of the sections and the helpers they import.
+    """
+    library = _library_dirs()
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if name == "__main__" or not path or not path.endswith(".py"):
+            continue
+        path = os.path.realpath(path)
+        if not path.startswith(library) and os.path.isfile(path):
+            modules[name] = path
+    return modules
+
+
+def _source_digest(paths: Iterable[str], *extra: str) -> str:
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    for value in extra:
+        digest.update(value.encode("utf-8"))
+    return digest.hexdigest()
+
+
+_PACKAGE_DIGEST: Optional[str] = None
+
+
+def package_digest() -> str:
+    """Digest of the source of olx_gui, so outputs are rebuilt when the rendering changes."""
+    global _PACKAGE_DIGEST
+    if _PACKAGE_DIGEST is None:
+        root = os.path.dirname(os.path.abspath(__file__))
+        paths = sorted(os.path.join(directory, name) for directory, _, names in os.walk(root)
+                       for name in names if name.endswith(".py"))
+        _PACKAGE_DIGEST = _source_digest(paths)
+    return _PACKAGE_DIGEST
+
+
+class BuildCache:
+    """
+    Index of the built outputs stored as JSON in a directory. Every output is kept with the digest of its inputs (the
+    target, the source of its module, of the helper modules it loaded and of olx_gui), the paths of these sources and
+    the digest of its content.
+    """
+    FILENAME = ".olx_gui_cache.json"
+    VERSION = 2
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, self.FILENAME)
+        self.entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == self.VERSION:
+                self.entries = index.get("entries", {})
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _key(self, section_target: SectionTarget) -> str:
+        return os.path.relpath(os.path.abspath(section_target.output), os.path.abspath(self.directory))
+
+    def input_digest(self, section_target: SectionTarget, sources: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        Digest of the inputs of the target, or None when its sources can't be found. Without sources, the sources of the
+        target and those recorded when it was last built are used.
+        """
+        if sources is None:
+            sources = section_target.sources()
+            if sources is None:
+                return None
+            entry = self.entries.get(self._key(section_target), {})
+            sources = [*sources, *entry.get("sources", ())]
+        sources = sorted({os.path.realpath(path) for path in sources})
+        extra = [section_target.name, package_digest()]
+        if section_target.blocks is not None:
+            from .includes import expander
+            extra.append(expander(section_target.blocks).digest())
+        if section_target.compact or not section_target.comments:
+            extra.append(f"compact={section_target.compact} comments={section_target.comments}")
+        try:
+            return _source_digest(sources, *extra)
+        except FileNotFoundError:
+            # A helper module was removed since the last build.
+            return None
+
+    def is_fresh(self, section_target: SectionTarget, input_digest: Optional[str]) -> bool:
+        """True if the inputs didn't change and the output is still the file that was written."""
+        entry = self.entries.get(self._key(section_target))
+        if input_digest is None or entry is None or entry.get("inputs") != input_digest:
+            return False
+        return file_digest(section_target.output) == entry.get("content")
+
+    def update(self, section_target: SectionTarget, input_digest: Optional[str], content: Optional[str],
+               sources: Optional[List[str]] = None) -> None:
+        """Records the output of the target, keeping the sources recorded before when sources is None."""
+        key = self._key(section_target)
+        if input_digest is None or content is None:
+            self.entries.pop(key, None)
+            return
+        if sources is None:
+            sources = self.entries.get(key, {}).get("sources", [])
+        self.entries[key] = {"inputs": input_digest, "content": content,
+                             "sources": sorted({os.path.realpath(path) for path in sources})}
+
+    def discard(self, targets: Iterable[SectionTarget]) -> None:
+        """Forgets the outputs of targets, the other entries of the index are kept."""
+        for section_target in targets:
+            self.entries.pop(self._key(section_target), None)
+
+    def save(self) -> None:
+        write_atomic(self.path, json.dumps({"version": self.VERSION, "entries": self.entries}, indent=1, sort_keys=True))
+
+
+def build_target(section_target: SectionTarget) -> BuildResult:
+    """
+    Builds, renders and writes a single target. The file is not written if the content has the digest of the
+    target. This is what runs in the worker processes.
+    """
+    start = time.perf_counter()
+    section = section_target.section()
+    sources = section_target.loaded_sources()
+    built = time.perf_counter()
+    content = section_target.render(section)
+    rendered = time.perf_counter()
+    digest = content_digest(content)
+    status = "unchanged"
+    if digest != section_target.digest:
+        write_atomic(section_target.output, content)
+        status = "written"
+    if section_target.snapshot and (status == "written" or not os.path.exists(section_target.snapshot_path)):
+        section_target.write_snapshot(section)
+    return BuildResult(section_target.name, section_target.output, built - start, rendered - built,
+                       len(content.encode("utf-8")), status, digest, sources)
+
+
+def check_outputs(targets: Iterable[SectionTarget]) -> None:
+    """Raises ValueError if two targets write the same output."""
+    outputs: Dict[str, SectionTarget] = {}
+    for section_target in targets:
+        output = os.path.normcase(os.path.abspath(section_target.output))
+        other = outputs.setdefault(output, section_target)
+        if other is not section_target:
+            raise ValueError(f"{other.name} and {section_target.name} both write {section_target.output}, give one of "
+                             f"them another output with =output.")
+
+
+def _init_worker(path: List[str]) -> None:
+    sys.path[:] = path
+
+
+def build(targets: Iterable[SectionTarget], jobs: Optional[int] = None, target: Optional[str] = update_html.target,
+          cache: Optional[BuildCache] = None) -> List[BuildResult]:
+    """
+    Builds every target in a pool of jobs processes (one per core when None, in this process when 1) and signals
+    Olex2 once through target when it is not None and any file was written. With a cache, the targets whose inputs
+    didn't change are skipped and the index is updated. Results are returned in the order of the targets.
+    Raises ValueError if two targets write the same output.
+    """
+    targets = list(targets)
+    check_outputs(targets)
+    results: Dict[int, BuildResult] = {}
+    inputs = {}
+    pending = []
+    for k, section_target in enumerate(targets):
+        section_target.digest = file_digest(section_target.output)
+        if cache is not None:
+            inputs[k] = cache.input_digest(section_target)
+            if cache.is_fresh(section_target, inputs[k]) and (
+                    not section_target.snapshot or os.path.exists(section_target.snapshot_path)):
+                results[k] = BuildResult(section_target.name, section_target.output, 0.0, 0.0,
+                                         os.path.getsize(section_target.output), "cached", section_target.digest)
+                continue
+        pending.append(k)
+
+    if jobs == 1 or len(pending) <= 1:
+        built = [build_target(targets[k]) for k in pending]
+    else:
+        # Imported here as the watch mode and single job builds never need it.
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(list(sys.path),)) as pool:
+            built = list(pool.map(build_target, [targets[k] for k in pending]))
+    results.update(zip(pending, built))
+
+    if cache is not None:
+        for k, result in results.items():
+            if result.status != "cached" and inputs[k] is not None:
+                # With the helper modules the section actually loaded.
+                inputs[k] = cache.input_digest(targets[k], result.sources)
+            cache.update(targets[k], inputs[k], result.digest, result.sources)
+        cache.save()
+    if target is not None and any(result.status == "written" for result in results.values()):
+        update_html.update(target)
+    return [results[k] for k in range(len(targets))]
+
+
+def print_report(results: List[BuildResult], total_time: float) -> None:
+    width = max([len(result.name) for result in results] + [7])
+    print(f"{'section':<{width}} {'build [s]':>10} {'render [s]':>11} {'size [B]':>9} {'status':>9}  output")
+    for result in results:
+        print(f"{result.name:<{width}} {result.build_time:>10.3f} {result.render_time:>11.3f} {result.size:>9} "
+              f"{result.status:>9}  {result.output}")
+    counts = {status: sum(result.status == status for result in results)
+              for status in ("written", "unchanged", "cached")}
+    print(f"{len(results)} section(s) in {total_time:.3f} s: {counts['written']} written, {counts['unchanged']} "
+          f"unchanged, {counts['cached']} skipped")
+
+
+def main(argv: Optional[List[str]] = None, prog: str = "python -m olx_gui build") -> None:
+    parser = argparse.ArgumentParser(prog=prog, description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="module:attribute[=output]")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory of the outputs without explicit path.")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Number of processes, one per core by default.")
+    parser.add_argument("--olex-target", default=update_html.target, help="Command file read by Olex2.")
+    parser.add_argument("--no-update", action="store_true", help="Don't signal Olex2 after building.")
+    parser.add_argument("--blocks", help="Expands the #include comments against the blocks under this directory.")
+    parser.add_argument("--compact", action="store_true", help="Writes the HTML without indentation.")
+    parser.add_argument("--no-comments", action="store_true", help="Drops the comments that are not #include.")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Also writes a snapshot of every section next to its output (<output>.olxsnap).")
+    parser.add_argument("--force", action="store_true", help="Build every section even if its inputs didn't change.")
+    parser.add_argument("--no-cache", action="store_true", help="Don't read nor write the index of the outputs.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    targets = [SectionTarget.parse(spec, args.output_dir) for spec in args.targets]
+    for section_target in targets:
+        section_target.blocks = args.blocks
+        section_target.compact = args.compact
+        section_target.comments = not args.no_comments
+        section_target.snapshot = args.snapshot
+    cache = None
+    if not args.no_cache:
+        cache = BuildCache(args.output_dir)
+        if args.force:
+            cache.discard(targets)
+    start = time.perf_counter()
+    results = build(targets, args.jobs, None if args.no_update else args.olex_target, cache)
+    print_report(results, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
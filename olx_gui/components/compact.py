@@ -0,0 +1,71 @@
+"""
+Compact output: the indented HTML with the indentation taken out and the #include comments kept on their own lines, as
+Olex2 expands them line by line. The other comments are only there for whoever reads the file and can be dropped with
+comments=False.
+
+Only the whitespace that doesn't show is removed: around the table and block tags. Between inline elements, like the
+<b> label and the <font> of an input beside it, a run of whitespace renders as a space, so it is collapsed to a single
+space instead.
+"""
+import re
+
+from .validation import INCLUDE
+
+COMMENT = re.compile(r"<!--(.*?)-->", re.S)
+_TOKEN = re.compile(r"<!--(.*?)-->|<(/?)([A-Za-z][\w:.-]*)(?:\"[^\"]*\"|'[^']*'|[^'\">])*>|[^<]+|<", re.S)
+_EDGES = re.compile(r"^(\s*)(.*?)(\s*)$", re.S)
+
+BLOCK_TAGS = frozenset({"html", "head", "body", "title", "table", "thead", "tbody", "tfoot", "tr", "td", "th",
+                        "caption", "colgroup", "col", "div", "p", "br", "hr", "center", "ul", "ol", "li", "dl", "dt",
+                        "dd", "h1", "h2", "h3", "h4", "h5", "h6", "pre", "blockquote", "form", "select", "option"})
+"""The tags whitespace next to doesn't render."""
+
+_BLOCK, _INLINE, _INCLUDE = 0, 1, 2
+
+
+def _tokens(html: str, comments: bool):
+    """(kind, markup, whitespace before) for the tags, text and comments of html, without the whitespace between."""
+    space = False
+    for match in _TOKEN.finditer(html):
+        comment, _, name = match.group(1, 2, 3)
+        if comment is not None:
+            if INCLUDE.match(comment):
+                yield _INCLUDE, match.group(0), space
+            elif comments:
+                yield _INLINE, match.group(0), space
+            else:
+                continue
+        elif name is not None:
+            yield _BLOCK if name.lower() in BLOCK_TAGS else _INLINE, match.group(0), space
+        else:
+            before, text, after = _EDGES.match(match.group(0)).groups()
+            if text:
+                yield _INLINE, text, space or bool(before)
+                space = bool(after)
+            else:
+                space = True
+            continue
+        space = False
+
+
+def compact_html(html: str, comments: bool = True) -> str:
+    """
+    The indented html without the whitespace that doesn't render, every #include comment on its own line, and without
+    the other comments unless comments is True.
+    """
+    out = []
+    previous = None
+    for kind, markup, space in _tokens(html, comments):
+        if previous is not None:
+            if _INCLUDE in (previous, kind):
+                out.append("\n")
+            elif space and _BLOCK not in (previous, kind):
+                out.append(" ")
+        out.append(markup)
+        previous = kind
+    return "".join(out)
+
+
+def drop_comments(html: str) -> str:
+    """html without the comments that are not #include."""
+    return COMMENT.sub(lambda match: match.group(0) if INCLUDE.match(match.group(1)) else "", html)
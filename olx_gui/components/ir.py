@@ -0,0 +1,210 @@
+"""
+Flat intermediate representation of rendered trees.
+
+A tree of tags is compiled once into a Program: an array of opcodes, an array of their arguments and the strings they
+refer to. The opening tags are stored with their attributes already rendered, so writing the HTML is a single loop over
+the opcodes that only decides the indentation, and the dominate tree can be dropped once compiled. The output is the
+same as rendering the tree with dominate for any indentation, pretty and xhtml.
+
+Tags with a _render of their own are compiled through their _ir_node, which returns the tag to compile in their place
+for the current render context. Tags without one (and comments containing tags) are kept in the program and rendered
+by dominate.
+"""
+import sys
+from array import array
+from typing import Dict, IO, Iterator, List
+
+from dominate.dom_tag import dom_tag
+from dominate.tags import comment
+from dominate.util import text
+
+from .render_cache import CachedRender
+from .templates import TemplateRender, _tag_name, attributes_html
+
+TEXT = 0
+"""Appends a string."""
+OPEN = 1
+"""Appends the opening tag of a tag whose children are pretty printed."""
+OPEN_PLAIN = 2
+"""Appends the opening tag of a tag whose children are never pretty printed (is_pretty is False)."""
+SINGLE = 3
+"""Appends a single tag, closed the xhtml way or not."""
+BREAK = 4
+"""Starts a new indented line before a child that is not inline, if pretty."""
+CLOSE = 5
+"""Appends the closing tag."""
+CLOSE_BREAK = 6
+"""Starts a new indented line, if pretty, and appends the closing tag."""
+NODE = 7
+"""Renders a tag kept in the program with dominate."""
+
+_TRANSPARENT = (dom_tag._render, CachedRender._render, TemplateRender._render)
+
+
+_OWNERS: Dict[type, type] = {}
+_NAMES: Dict[type, str] = {}
+
+
+def _render_owner(cls: type) -> type:
+    """The class defining the _render used by instances of cls."""
+    owner = _OWNERS.get(cls)
+    if owner is None:
+        owner = _OWNERS[cls] = next((base for base in cls.__mro__ if "_render" in base.__dict__), dom_tag)
+    return owner
+
+
+class Program:
+    """The compiled HTML of a tree. It holds no reference to the tree unless some tags could not be compiled."""
+    __slots__ = ("ops", "args", "strings", "nodes")
+
+    def __init__(self):
+        self.ops = array("B")
+        self.args = array("I")
+        self.strings: List[str] = []
+        self.nodes: List[dom_tag] = []
+
+    def __len__(self):
+        return len(self.ops)
+
+    def render_into(self, sb: list, indent_level: int = 0, indent_str: str = "  ", pretty: bool = True,
+                    xhtml: bool = False) -> list:
+        """Appends the HTML to sb, as tag._render(sb, indent_level, indent_str, pretty, xhtml) would."""
+        strings = self.strings
+        single_end = " />" if xhtml else ">"
+        level = indent_level
+        stack = []
+        for op, arg in zip(self.ops, self.args):
+            if op == TEXT:
+                sb.append(strings[arg])
+            elif op == OPEN or op == OPEN_PLAIN:
+                sb.append(strings[arg])
+                stack.append(pretty)
+                pretty = pretty and op == OPEN
+                level += 1
+            elif op == SINGLE:
+                sb.append(strings[arg])
+                sb.append(single_end)
+            elif op == BREAK:
+                if pretty:
+                    sb.append("\n")
+                    sb.append(indent_str * level)
+            elif op == NODE:
+                self.nodes[arg]._render(sb, level, indent_str, pretty, xhtml)
+            else:
+                level -= 1
+                if op == CLOSE_BREAK and pretty:
+                    sb.append("\n")
+                    sb.append(indent_str * level)
+                sb.append(strings[arg])
+                pretty = stack.pop()
+        return sb
+
+    def render(self, indent_level: int = 0, indent_str: str = "  ", pretty: bool = True, xhtml: bool = False) -> str:
+        return "".join(self.render_into([], indent_level, indent_str, pretty, xhtml))
+
+    def __str__(self):
+        return self.render()
+
+
+class _Compiler:
+    def __init__(self):
+        self.program = Program()
+        self._indexes: Dict[str, int] = {}
+
+    def emit(self, op: int, value: str) -> None:
+        index = self._indexes.get(value)
+        if index is None:
+            index = self._indexes[value] = len(self.program.strings)
+            self.program.strings.append(sys.intern(value))
+        self.program.ops.append(op)
+        self.program.args.append(index)
+
+    def keep(self, node: dom_tag) -> None:
+        self.program.ops.append(NODE)
+        self.program.args.append(len(self.program.nodes))
+        self.program.nodes.append(node)
+
+    def compile(self, node) -> None:
+        if not isinstance(node, dom_tag):
+            self.emit(TEXT, str(node))
+            return
+        # Looked up on the class, as dominate's __getattr__ makes missing instance attributes slow.
+        cls = type(node)
+        if getattr(cls, "_ir_node", None) is not None:
+            replacement = node._ir_node()
+            if replacement is node or type(replacement) is type(node):
+                self.compile_tag(replacement)
+            else:
+                self.compile(replacement)
+            return
+        owner = _render_owner(cls)
+        if isinstance(node, text):
+            self.emit(TEXT, node.text)
+        elif isinstance(node, comment) and owner is comment:
+            if any(isinstance(child, dom_tag) for child in node.children):
+                self.keep(node)
+            else:
+                # Comments with text only render the same at every indentation.
+                self.emit(TEXT, "".join(node._render([], 1, "", False, False)))
+        elif owner.__dict__["_render"] not in _TRANSPARENT:
+            self.keep(node)
+        else:
+            self.compile_tag(node)
+
+    def compile_tag(self, node: dom_tag) -> None:
+        name = _NAMES.get(type(node))
+        if name is None or "tagname" in node.__dict__:
+            name = _tag_name(node)
+            if "tagname" not in node.__dict__:
+                _NAMES[type(node)] = name
+        start = f"<{name}{attributes_html(node.attributes)}"
+        if node.is_single:
+            self.emit(SINGLE, start)
+            return
+        self.emit(OPEN if node.is_pretty else OPEN_PLAIN, start + ">")
+        inline = True
+        for child in node.children:
+            if isinstance(child, dom_tag) and not child.is_inline:
+                inline = False
+                self.program.ops.append(BREAK)
+                self.program.args.append(0)
+            self.compile(child)
+        self.emit(CLOSE if inline else CLOSE_BREAK, f"</{name}>")
+
+
+def compile_tree(node: dom_tag) -> Program:
+    """Compiles node and its children for the current render context."""
+    compiler = _Compiler()
+    compiler.compile(node)
+    return compiler.program
+
+
+class CompiledSection:
+    """
+    The lines of an H3Section compiled to Programs, rendered the same way as the section. See H3Section.compile.
+    """
+    def __init__(self, programs: List[Program]):
+        self.programs = programs
+
+    def iter_render(self, indent: str = "  ", pretty: bool = True, xhtml: bool = False) -> Iterator[str]:
+        for program in self.programs:
+            sb = ["\n"]
+            program.render_into(sb, 0, indent, pretty, xhtml)
+            yield "".join(sb)
+
+    def write_to(self, fileobj: IO[str], **kwargs) -> int:
+        written = 0
+        for chunk in self.iter_render(**kwargs):
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    def __str__(self):
+        return "".join(self.iter_render())
+
+
+def count_nodes(node) -> int:
+    """Number of nodes in a dominate tree, strings included."""
+    if not isinstance(node, dom_tag):
+        return 1
+    return 1 + sum(count_nodes(child) for child in node.children)
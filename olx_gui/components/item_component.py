@@ -1,8 +1,20 @@
 from typing import Optional, Iterable, Union
-from dominate.tags import *
+from dominate.tags import b, comment, div, font, html_tag, input_, p, table, td, tr
 from dominate.util import raw
-from dominate.tags import comment
+from .render_cache import CachedRender
+from .olex_vars import (CUSTOM_BUTTON, FALSE, HTML_COMBO_HEIGHT, HTML_FONT_COLOUR, HTML_FONT_SIZE_CONTROLS,
+                        HTML_INPUT_BG_COLOUR, HTML_INPUT_HEIGHT, HTML_TABLE_BG_COLOUR, LINK_BUTTON_BGCOLOR,
+                        LINK_BUTTON_FGCOLOR, LINK_BUTTON_FLAT, TRUE)
+from .layout import WidthSpec, apply_width, combine, format_width, parse_width, width_spec
+from .render_context import current_context
+from .templates import TemplateRender, clean_attributes, new_tag, preescape
+from .validation import verify_functions
 SPACING = 4
+FONT_SIZE = HTML_FONT_SIZE_CONTROLS.ref(quoted=True, deferred=True)
+
+__all__ = ["SPACING", "to_dict", "add_default", "include_comment", "text_bold", "ignore", "verify_functions",
+           "LabeledGeneralComponent", "InputCheckbox", "ComboBox", "Button", "InputText", "InputSpinner",
+           "InputLinkButton", "Fill", "Cycle", "Ignore"]
 
 def to_dict(obj, exclude_fields = None):
     if exclude_fields is None:
@@ -45,20 +57,19 @@ class ignore(html_tag):
     """
     tagname = 'ignore'
 
+    def width_spec(self) -> Optional[WidthSpec]:
+        return combine(width_spec(child) for child in self.children)
 
+    def apply_width(self, width: str) -> None:
+        # Only the wrapped components take the width, <ignore> itself never had one.
+        for child in self.children:
+            if width_spec(child) is not None:
+                apply_width(child, width)
 
 
-def verify_functions(args: dict) -> None:
-    args2 = {k: str(v).strip() for k, v in args.items()}
-    function_starts = ["spy", "snum", "strcmp"]
-    for k, v in args2.items():
-        if any([v.startswith(x) for x in function_starts]):
-            if v.count("(") != v.count(")"):
-                raise ValueError(f"Olex2 functions have to be closed to be valid. {k} contains an invalid amount of "
-                                 f"brackets.")
 
 
-class LabeledGeneralComponent(td):
+class LabeledGeneralComponent(CachedRender, TemplateRender, td):
     """
     Use label_left = True to change the label position.
     """
@@ -68,32 +79,26 @@ class LabeledGeneralComponent(td):
         kwargs = add_default({"cellpadding": "2",  "cellspacing": "0"}, kwargs)
         super().__init__()
         self.label_left = label_left
-        self.tr = tr(valign="middle")
-        input_width = "100%"
-        if "input_width" in kwargs:
-            input_width = kwargs["input_width"]
-            kwargs.pop("input_width")
-
-        label_width = None
-        if "label_width" in kwargs:
-            label_width = kwargs["label_width"]
-            kwargs.pop("label_width")
-
-        self.td_input = td(valign="middle", width=input_width)
-        self.font = font(size="$GetVar('HtmlFontSizeControls')", valign="middle")
+        self.label_position = None
+        self.tr = new_tag(tr, {"valign": "middle"})
+        input_width = kwargs.pop("input_width", "100%")
+        label_width = kwargs.pop("label_width", None)
+
+        self.td_input = new_tag(td, {"valign": "middle", "width": input_width})
+        self.font = new_tag(font, {"size": FONT_SIZE, "valign": "middle"})
         self.input = inp
         if not txt_label is None:
             self._add_label(txt_label, label_top, label_width=label_width)
         else:
             self.tr.add(self.td_input)
-        verify_functions(kwargs)
         self.font.add(self.input)
         self.td_input.add(self.font)
-        self.table = table(kwargs)
-        self.table.add(self.tr)
+        self.table = new_tag(table, clean_attributes(kwargs), self.tr)
         self.add(self.table)
         self.is_resizable = True
         self.precise_width = 0.0
+        self.weight = 1.0
+        self.min_width = 0.0
 
     def _add_label(self, txt_label: Union[str, html_tag], label_top: bool = True, label_width: Optional[str] = None):
         if isinstance(txt_label, str):
@@ -101,18 +106,48 @@ class LabeledGeneralComponent(td):
         else:
             self.label = txt_label
         if not label_top:
-            self.td_label = td(align="left", valign="middle", width=label_width)
+            self.td_label = new_tag(td, {"align": "left", "valign": "middle", "width": label_width})
             self.td_label.add(self.label)
             if self.label_left:
+                self.label_position = "left"
                 self.tr.add(self.td_label)
                 self.tr.add(self.td_input)
             else:
+                self.label_position = "right"
                 self.tr.add(self.td_input)
                 self.tr.add(self.td_label)
         else:
+            self.label_position = "top"
             self.td_input.add(self.label)
             self.tr.add(self.td_input)
 
+    def _template_layout(self) -> tuple:
+        label = getattr(self, "label", None)
+        return self.label_position, label is not None and label.is_inline, self.input.is_inline
+
+    def _template_nodes(self) -> Optional[tuple]:
+        """
+        The nodes filling the ComponentTemplate skeleton, or None if the tree was changed in a way the skeleton doesn't
+        follow. The attributes and the content of the nodes may change freely.
+        """
+        label = getattr(self, "label", None)
+        td_label = getattr(self, "td_label", None)
+        if self.children != [self.table] or self.table.children != [self.tr] or self.font.children != [self.input]:
+            return None
+        if self.label_position is None:
+            cells, inputs = [self.td_input], [self.font]
+        elif self.label_position == "top":
+            cells, inputs = [self.td_input], [label, self.font]
+        elif self.label_position == "left":
+            cells, inputs = [td_label, self.td_input], [self.font]
+        else:
+            cells, inputs = [self.td_input, td_label], [self.font]
+        if self.tr.children != cells or self.td_input.children != inputs:
+            return None
+        if td_label is not None and td_label.children != [label]:
+            return None
+        return self, self.table, self.tr, self.td_input, td_label, self.font, self.input, label
+
     def _repr_html_(self):
         return str(self)
 
@@ -124,31 +159,42 @@ class LabeledGeneralComponent(td):
     def resizable(self, other: bool):
         self.is_resizable = other
 
+    def sized(self, weight: Optional[float] = None, min_width: Optional[float] = None) -> "LabeledGeneralComponent":
+        """
+        Sets the weight of the component in the width left by the fixed components of its row and its minimum width in
+        percent. Returns the component, e.g. row.add(InputText("NAME").sized(weight=2)).
+        """
+        if weight is not None:
+            self.weight = weight
+        if min_width is not None:
+            self.min_width = min_width
+        return self
+
+    def width_spec(self) -> WidthSpec:
+        if "width" in self.attributes and not self.resizable:
+            return WidthSpec(fixed=self.attributes["width"])
+        return WidthSpec(weight=self.weight, minimum=self.min_width)
+
+    def apply_width(self, width: str) -> None:
+        if self.resizable or "width" not in self.attributes:
+            self.set_attribute("width", width)
+
 class InputCheckbox(LabeledGeneralComponent):
     """
     Use label_left = True to change the label position.
     """
+    DEFAULTS = dict(type="checkbox",
+                    height="20",
+                    fgcolor=HTML_FONT_COLOUR.ref(),
+                    bgcolor=HTML_TABLE_BG_COLOUR.ref(),
+                    valign="middle",
+                    )
+
     def __init__(self, name: str, txt_label: Union[str, html_tag] = "", label_left: bool = False,
                  label_top: bool = False, **kwargs):
-        pardict = dict(name=name,
-                       type="checkbox",
-                       height=20,
-                       fgcolor="GetVar(HtmlFontColour)",
-                       bgcolor="GetVar(HtmlTableBgColour)",
-                       valign="middle",
-                       )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-
-        label_width = None
-        if "label_width" in kwargs:
-            label_width = kwargs["label_width"]
-            kwargs.pop("label_width")
-        pardict = add_default(pardict, kwargs)
-        self.input = input_(pardict)
+        tdwidth = kwargs.pop("tdwidth", None)
+        label_width = kwargs.pop("label_width", None)
+        self.input = new_tag(input_, {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)})
         super().__init__(self.input, txt_label, label_left, label_top, label_width=label_width, cellpadding="2",
                          cellspacing="0", input_width=None)
         if not tdwidth is None:
@@ -160,51 +206,41 @@ class ComboBox(LabeledGeneralComponent):
     """
     Use label_left = True to change the label position.
     """
+    DEFAULTS = dict(
+        type="combo",
+        width="100%",
+        height=HTML_COMBO_HEIGHT.ref(),
+        readonly=TRUE,
+        fgcolor=HTML_FONT_COLOUR.ref(),
+        bgcolor=HTML_INPUT_BG_COLOUR.ref(),
+        valign="middle"
+    )
+
     def __init__(self, name: str, txt_label: Union[str, html_tag] = "", label_left: bool = False,
                  label_top: bool = True, **kwargs):
-        pardict = dict(
-            name=name,
-            type="combo",
-            width="100%",
-            height="GetVar(HtmlComboHeight)",
-            readonly="true",
-            fgcolor="GetVar(HtmlFontColour)",
-            bgcolor="GetVar(HtmlInputBgColour)",
-            valign="middle"
-        )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-        pardict = add_default(pardict, kwargs)
-        self.input = input_(pardict)
+        tdwidth = kwargs.pop("tdwidth", None)
+        self.input = new_tag(input_, {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)})
         super().__init__(self.input, txt_label, label_left, label_top)
         if not tdwidth is None:
             self["width"] = tdwidth
             self.resizable = False
 
 class Button(LabeledGeneralComponent):
+    DEFAULTS = dict(
+        type="button",
+        value="#value",
+        width="100%",
+        onclick="#onclick",
+        bgcolor="#bgcolor",
+        fgcolor="#fgcolor",
+        fit=FALSE,
+        flat=FALSE,
+        disabled=FALSE,
+    )
+
     def __init__(self, name: str, **kwargs):
-        pardict = dict(
-            name=name,
-            type="button",
-            value="#value",
-            width="100%",
-            onclick="#onclick",
-            bgcolor="#bgcolor",
-            fgcolor="#fgcolor",
-            fit="false",
-            flat="fasle",
-            disabled="false",
-        )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-        pardict = add_default(pardict, kwargs)
-        self.input = input_(pardict)
+        tdwidth = kwargs.pop("tdwidth", None)
+        self.input = new_tag(input_, {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)})
         super().__init__(self.input)
 
         if not tdwidth is None:
@@ -213,94 +249,74 @@ class Button(LabeledGeneralComponent):
 
 
 class InputText(LabeledGeneralComponent):
+    DEFAULTS = dict(
+        height = HTML_INPUT_HEIGHT.ref(quoted=True),
+        manage = FALSE,
+        password = FALSE,
+        multiline = FALSE,
+        disabled = FALSE,
+        bgcolor = HTML_INPUT_BG_COLOUR.ref(quoted=True),
+        fgcolor = HTML_FONT_COLOUR.ref(),
+        value = "#value",
+        width = "100%",
+        onclick = "#onclick",
+        fit = FALSE,
+        flat = FALSE,
+        type = "text",
+        valign = "center",
+    )
+
     def __init__(self, name: str, txt_label: Union[str, html_tag] = "", label_left: bool = False,
                  label_top: bool = True, **kwargs):
-        pardict = dict(
-            name = name,
-            height = "GetVar('HtmlInputHeight')",
-            manage = "false",
-            password = "false",
-            multiline = "false",
-            disabled = "false",
-            bgcolor = "GetVar('HtmlInputBgColour')",
-            fgcolor = "GetVar(HtmlFontColour)",
-            value = "#value",
-            width = "100%",
-            onclick = "#onclick",
-            fit = "false",
-            flat = "fasle",
-            type = "text",
-            valign = "center",
-        )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-        pardict = add_default(pardict, kwargs)
-        self.input = input_(pardict)
+        tdwidth = kwargs.pop("tdwidth", None)
+        self.input = new_tag(input_, {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)})
         super().__init__(self.input, txt_label, label_left, label_top)
         if not tdwidth is None:
             self["width"] = tdwidth
             self.resizable = False
 
 class InputSpinner(LabeledGeneralComponent):
+    DEFAULTS = dict(
+        type="spin",
+        height=HTML_COMBO_HEIGHT.ref(quoted=True),
+        bgcolor=HTML_INPUT_BG_COLOUR.ref(),
+        fgcolor=HTML_FONT_COLOUR.ref(),
+        valign="center",
+        min="-1000",
+        max="1000",
+        setdefault=FALSE,
+        disabled=FALSE,
+        readonly=FALSE,
+        onchangealways=FALSE,
+        manage=FALSE,
+        custom="arrow_width: -10",
+    )
+
     def __init__(self, name: str, txt_label: Union[str, html_tag] = "", label_left: bool = False,
                  label_top: bool = True, **kwargs):
-        pardict = dict(
-            type="spin",
-            height="GetVar('HtmlComboHeight')",
-            bgcolor="GetVar(HtmlInputBgColour)",
-            fgcolor="GetVar(HtmlFontColour)",
-            valign="center",
-            min="-1000",
-            max="1000",
-            name=name,
-            setdefault="false",
-            disabled="false",
-            readonly="false",
-            onchangealways="false",
-            manage="false",
-            custom="arrow_width: -10",
-        )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-        pardict = add_default(pardict, kwargs)
-        self.input = input_(pardict)
+        tdwidth = kwargs.pop("tdwidth", None)
+        self.input = new_tag(input_, {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)})
         super().__init__(self.input, txt_label, label_left, label_top)
         if not tdwidth is None:
             self["width"] = tdwidth
             self.resizable = False
 
 class InputLinkButton(LabeledGeneralComponent):
+    DEFAULTS = dict(
+        type="button",
+        bgcolor=LINK_BUTTON_BGCOLOR.ref(),
+        fgcolor=LINK_BUTTON_FGCOLOR.ref(),
+        fit=FALSE,
+        flat=LINK_BUTTON_FLAT.ref(),
+        custom=CUSTOM_BUTTON.ref(),
+    )
+
     def __init__(self, name: str, txt_label: Union[str, html_tag] = "", label_left: bool = False,
                  label_top: bool = True, **kwargs):
-        pardict = dict(
-            type="button",
-            name=name,
-            bgcolor="GetVar(linkButton.bgcolor)",
-            fgcolor="GetVar(linkButton.fgcolor)",
-            fit="false",
-            flat="GetVar(linkButton.flat)",
-            custom="GetVar(custom_button)",
-        )
-        verify_functions(kwargs)
-        tdwidth = None
-        if "tdwidth" in kwargs:
-            tdwidth = kwargs["tdwidth"]
-            kwargs.pop("tdwidth")
-
-        align = None
-        if "align" in kwargs:
-            align = kwargs["align"]
-            kwargs.pop("align")
-        pardict = add_default(pardict, kwargs)
-        for k, it in pardict.items():
-            pardict[k] = raw(it)
-        self.input = b(input_(pardict))
+        tdwidth = kwargs.pop("tdwidth", None)
+        align = kwargs.pop("align", None)
+        pardict = {k: raw(it) for k, it in {**self.DEFAULTS, "name": name, **clean_attributes(kwargs)}.items()}
+        self.input = new_tag(b, {}, new_tag(input_, pardict))
         # self.input = font(b(input_(pardict)), size="$GetVar('HtmlFontSizeControls')")
         super().__init__(self.input, txt_label, label_left, label_top, align=align)
         if not tdwidth is None:
@@ -313,7 +329,7 @@ class Fill(td):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-class Cycle(div):
+class Cycle(CachedRender, div):
     """
     This works by cycling between components when ignore is active. This will keep track of the width so the autoresizing
     works.
@@ -321,25 +337,46 @@ class Cycle(div):
     tagname="cycle"
     def __init__(self, componentA: html_tag, componentB: html_tag, condition: str):
         """
-        componentA is shown if the condition is evaluated to true. If not, componentB is shown.
+        componentA is shown if the condition is evaluated to true. If not, componentB is shown. If any of them has a
+        width in percent, the cycle is fixed to the greater one and both components get it. Other widths, e.g.
+        "#width", stay on their component.
         """
-        verify_functions({"condition": condition})
         super().__init__()
-        greater_width = 0
-        if componentA.tagname == "td":
-            if "width" in componentA.attributes:
-                greater_width = int(componentA.attributes["width"].replace("%", ""))
-                componentA.attributes.pop("width")
-
-        if componentB.tagname == "td":
-            if "width" in componentB.attributes and (widthb := componentB["width"].replace("%", "")):
-                componentB.attributes.pop("width")
-                greater_width = widthb
-
-        self["width"] = greater_width
+        greater_width = None
+        for component in (componentA, componentB):
+            if component.tagname == "td":
+                width = parse_width(component.attributes.get("width"))
+                if width is not None:
+                    del component.attributes["width"]
+                    if greater_width is None or width > greater_width:
+                        greater_width = width
+
+        self.fixed_width = None if greater_width is None else format_width(greater_width)
+        if self.fixed_width is not None:
+            self["width"] = self.fixed_width
         self.add(ignore(componentA, test=condition),
                  ignore(componentB, test=f"not {condition}"))
 
+    def width_spec(self) -> Optional[WidthSpec]:
+        if self.fixed_width is not None:
+            return WidthSpec(fixed=self.fixed_width)
+        return combine(width_spec(child) for child in self.children)
+
+    def apply_width(self, width: str) -> None:
+        self.set_attribute("width", width)
+        for child in self.children:
+            if width_spec(child) is not None:
+                apply_width(child, width)
+
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        if current_context().unwrap_cycles:
+            return self.children[0][0]._render(sb, indent_level, indent_str, pretty, xhtml)
+        return super()._render(sb, indent_level, indent_str, pretty, xhtml)
+
+    def _ir_node(self) -> html_tag:
+        return self.children[0][0] if current_context().unwrap_cycles else self
+
+
 class Ignore(Cycle):
     """
     This gracefully ignores a component in a way that its space is filled by nothingness. It makes the layout consistent.
@@ -347,3 +384,8 @@ class Ignore(Cycle):
     def __init__(self, component: html_tag, condition: str):
         componentB = LabeledGeneralComponent(p())
         super().__init__(component, componentB, condition)
+
+
+for _component in (InputCheckbox, ComboBox, Button, InputText, InputSpinner):
+    preescape(_component.DEFAULTS)
+preescape({"size": FONT_SIZE, "valign": "middle"})
@@ -0,0 +1,146 @@
+"""
+Layout of the components of a Row.
+
+Every child of a Row gets a share of the width of the row. Fixed children keep their width and the others split what is
+left in proportion to their weight, without going under their minimum width. Shares are whole percentages and the
+remainder of the rounding goes to the largest fractions, so the widths of a row add up to exactly 100%.
+
+Components describe themselves with width_spec() and receive their width with apply_width(width), which lets ignore and
+Cycle take the layout of the components they wrap and pass the width on to them. Other tags are fixed when they were
+given a width, e.g. Fill(width="10%"), and flexible with a weight of 1 otherwise. Comments or text take no part in the
+layout.
+"""
+from dataclasses import dataclass
+from math import ceil, floor
+from typing import Iterable, List, Optional, Sequence
+
+from dominate.tags import comment, html_tag
+
+
+@dataclass(frozen=True)
+class WidthSpec:
+    fixed: Optional[str] = None
+    """The width of a fixed child, as given, e.g. "30%"."""
+    weight: float = 1.0
+    minimum: float = 0.0
+    """Minimum width of a flexible child, in percent."""
+
+    @property
+    def is_fixed(self) -> bool:
+        return self.fixed is not None
+
+
+FLEXIBLE = WidthSpec()
+
+
+def parse_width(value) -> Optional[float]:
+    """The percentage of a width such as "30%", "30" or 30, or None if it isn't a number (e.g. "#width")."""
+    if value is None or value is False:
+        return None
+    try:
+        return float(str(value).strip().rstrip("%"))
+    except ValueError:
+        return None
+
+
+def format_width(value: float) -> str:
+    return f"{value:g}%"
+
+
+def combine(specs: Iterable[Optional[WidthSpec]]) -> Optional[WidthSpec]:
+    """
+    Layout of a slot showing one of the specs at a time: the largest fixed width if any is fixed, else the largest
+    weight and minimum.
+    """
+    specs = [spec for spec in specs if spec is not None]
+    if not specs:
+        return None
+    fixed = [spec.fixed for spec in specs if spec.is_fixed]
+    if fixed:
+        return WidthSpec(fixed=max(fixed, key=lambda width: parse_width(width) or 0.0))
+    return WidthSpec(weight=max(spec.weight for spec in specs), minimum=max(spec.minimum for spec in specs))
+
+
+def width_spec(tag) -> Optional[WidthSpec]:
+    """The layout of a child of a Row, or None if it doesn't take part in the layout."""
+    spec = getattr(tag, "width_spec", None)
+    if spec is not None:
+        return spec()
+    if isinstance(tag, html_tag) and not isinstance(tag, comment):
+        width = tag.attributes.get("width")
+        # A width set by apply_width is solved again, not kept.
+        if width is not None and width is not False and width != getattr(tag, "_solved_width", None):
+            return WidthSpec(fixed=str(width))
+        return FLEXIBLE
+    return None
+
+
+def apply_width(tag, width: str) -> None:
+    apply = getattr(tag, "apply_width", None)
+    if apply is not None:
+        apply(width)
+    elif width_spec(tag) == FLEXIBLE:
+        tag.set_attribute("width", width)
+        tag._solved_width = width
+
+
+def distribute(specs: Sequence[WidthSpec], total: int = 100) -> List[int]:
+    """
+    Shares of total given to the flexible specs, 0 for the fixed ones. The shares sum to what the fixed specs leave of
+    total unless the minimum widths don't fit in it.
+    """
+    shares = [0] * len(specs)
+    free = [k for k, spec in enumerate(specs) if not spec.is_fixed]
+    if not free:
+        return shares
+    used = sum(parse_width(spec.fixed) or 0.0 for spec in specs if spec.is_fixed)
+    left = max(0, floor(total - used + 1e-9))
+
+    exact = {}
+    pool = free
+    budget = float(left)
+    while pool:
+        weights = {k: max(specs[k].weight, 0.0) for k in pool}
+        total_weight = sum(weights.values())
+        if total_weight <= 0:
+            weights = dict.fromkeys(pool, 1.0)
+            total_weight = float(len(pool))
+        pinned = [k for k in pool if budget * weights[k] / total_weight < specs[k].minimum]
+        if not pinned:
+            exact.update((k, budget * weights[k] / total_weight) for k in pool)
+            break
+        for k in pinned:
+            exact[k] = ceil(specs[k].minimum)
+            budget = max(0.0, budget - exact[k])
+        pool = [k for k in pool if k not in pinned]
+
+    for k, value in exact.items():
+        shares[k] = floor(value + 1e-9)
+    remainder = left - sum(shares)
+    for k in sorted(free, key=lambda k: (shares[k] - exact[k], k))[:max(remainder, 0)]:
+        shares[k] += 1
+    return shares
+
+
+def solve(children: Sequence) -> List[Optional[str]]:
+    """The width of every child, None for those taking no part in the layout."""
+    specs = [width_spec(child) for child in children]
+    laid_out = [spec for spec in specs if spec is not None]
+    shares = iter(distribute(laid_out))
+    widths = []
+    for spec in specs:
+        if spec is None:
+            widths.append(None)
+            continue
+        share = next(shares)
+        widths.append(spec.fixed if spec.is_fixed else format_width(share))
+    return widths
+
+
+def flexible_width(children: Sequence, widths: Sequence[Optional[str]]) -> Optional[str]:
+    """The width of the first child that is not fixed, given the widths solved for children."""
+    for child, width in zip(children, widths):
+        spec = width_spec(child)
+        if spec is not None and not spec.is_fixed:
+            return width
+    return None
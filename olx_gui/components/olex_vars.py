@@ -0,0 +1,105 @@
+"""
+Registry of the Olex2 variables and of the constant attribute values used by the components.
+
+The components refer to Olex2 variables in several spellings, GetVar(Name), GetVar('Name') and $GetVar('Name'), the
+last being replaced when Olex2 loads the HTML. The references are built once here and interned, so every component and
+module shares the same strings, and the attribute fragments of the component defaults are escaped once and kept (see
+templates.preescape).
+
+find_typos reports the values that look like typos: boolean attributes that are neither true nor false, and GetVar of
+an unknown variable close to a known one.
+"""
+import difflib
+import re
+import sys
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+from dominate.dom_tag import dom_tag
+from dominate.util import text
+
+from .validation import FUNCTION, Issue, _where
+
+
+@dataclass(frozen=True)
+class OlexVar:
+    """An Olex2 variable, e.g. OlexVar("HtmlFontColour").ref() is GetVar(HtmlFontColour)."""
+    name: str
+
+    def ref(self, quoted: bool = False, deferred: bool = False) -> str:
+        """
+        The interned reference to the variable, quoted gives GetVar('Name') and deferred $GetVar(...).
+        """
+        name = f"'{self.name}'" if quoted else self.name
+        return sys.intern(f"{'$' if deferred else ''}GetVar({name})")
+
+
+VARIABLES: Dict[str, OlexVar] = {}
+"""The known variables by name."""
+
+
+def variable(name: str) -> OlexVar:
+    """The registered variable called name, registering it if needed."""
+    var = VARIABLES.get(name)
+    if var is None:
+        var = VARIABLES[name] = OlexVar(name)
+    return var
+
+
+HTML_FONT_COLOUR = variable("HtmlFontColour")
+HTML_FONT_SIZE_CONTROLS = variable("HtmlFontSizeControls")
+HTML_TABLE_BG_COLOUR = variable("HtmlTableBgColour")
+HTML_TABLE_GROUP_BG_COLOUR = variable("HtmlTableGroupBgColour")
+HTML_INPUT_BG_COLOUR = variable("HtmlInputBgColour")
+HTML_INPUT_HEIGHT = variable("HtmlInputHeight")
+HTML_COMBO_HEIGHT = variable("HtmlComboHeight")
+LINK_BUTTON_BGCOLOR = variable("linkButton.bgcolor")
+LINK_BUTTON_FGCOLOR = variable("linkButton.fgcolor")
+LINK_BUTTON_FLAT = variable("linkButton.flat")
+CUSTOM_BUTTON = variable("custom_button")
+
+TRUE = sys.intern("true")
+FALSE = sys.intern("false")
+
+BOOLEAN_ATTRIBUTES = frozenset({"fit", "flat", "disabled", "manage", "password", "multiline", "readonly",
+                                "setdefault", "onchangealways"})
+
+_GETVAR = re.compile(r"GetVar\(\s*['\"]?([\w.]+)")
+
+
+def _value_typo(key: str, value: str) -> Optional[tuple]:
+    """(position, message) if value looks like a typo for the attribute key."""
+    if key in BOOLEAN_ATTRIBUTES and value not in (TRUE, FALSE) and not value.startswith(("#", "$")) \
+            and FUNCTION.match(value) is None:
+        guess = difflib.get_close_matches(value.lower(), (TRUE, FALSE), n=1, cutoff=0.5)
+        hint = f", did you mean {guess[0]!r}" if guess else ""
+        return 0, f"{key} is neither true nor false{hint}"
+    for match in _GETVAR.finditer(value):
+        name = match.group(1)
+        if name not in VARIABLES:
+            guess = difflib.get_close_matches(name, VARIABLES, n=1, cutoff=0.85)
+            if guess:
+                return match.start(1), f"unknown variable {name}, did you mean {guess[0]}"
+    return None
+
+
+def find_typos(tag, where: Optional[str] = None) -> List[Issue]:
+    """The values of tag and its children that look like typos. tag can also be an H3Section."""
+    lines = getattr(tag, "lines", None)
+    if lines is not None:
+        return [issue for line in lines for issue in find_typos(line)]
+    if not isinstance(tag, dom_tag):
+        return []
+    where = where or _where(tag)
+    issues = []
+    for key, value in tag.attributes.items():
+        if isinstance(value, text):
+            value = value.text
+        if isinstance(value, str):
+            typo = _value_typo(key, value)
+            if typo is not None:
+                issues.append(Issue(where, key, value, *typo))
+    for child in tag.children:
+        if isinstance(child, dom_tag):
+            issues.extend(find_typos(child, _where(child) if hasattr(child, "input") else where))
+    return issues
@@ -0,0 +1,67 @@
+from .render_context import current_context
+
+
+class CachedRender:
+    """
+    Mixin for dominate tags that keeps the rendered HTML of the tag for each render context until it is changed through add, remove, clear,
+    set_attribute or item assignment. Changing it also drops the cache of every tag above it, so a Row is only
+    rendered again when one of its components changed.
+    Changes made directly to the inner tags (e.g. component.input["value"] = "x") are not tracked, call invalidate
+    after them.
+    """
+    _render_cache = None
+    version = 0
+    """Number of changes of the tag and its children, incremented by invalidate."""
+
+    def invalidate(self) -> None:
+        """Drops the cached HTML of this tag and of every tag containing it."""
+        node = self
+        while node is not None:
+            if isinstance(node, CachedRender):
+                node._render_cache = None
+                node.version += 1
+            node = getattr(node, "parent", None)
+
+    def cached(self, key, compute):
+        """
+        Returns compute(), kept along with the rendered HTML until the tag changes.
+        """
+        if self._render_cache is None:
+            self._render_cache = {}
+        if key not in self._render_cache:
+            self._render_cache[key] = compute()
+        return self._render_cache[key]
+
+    def set_attribute(self, key, value):
+        super().set_attribute(key, value)
+        self.invalidate()
+    __setitem__ = set_attribute
+
+    def delete_attribute(self, key):
+        super().delete_attribute(key)
+        self.invalidate()
+    __delitem__ = delete_attribute
+
+    def add(self, *args):
+        result = super().add(*args)
+        self.invalidate()
+        return result
+
+    def remove(self, obj):
+        super().remove(obj)
+        self.invalidate()
+
+    def clear(self):
+        super().clear()
+        self.invalidate()
+
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        key = (indent_level, indent_str, pretty, xhtml, current_context())
+        if self._render_cache is None:
+            self._render_cache = {}
+        html = self._render_cache.get(key)
+        if html is None:
+            html = "".join(super()._render([], indent_level, indent_str, pretty, xhtml))
+            self._render_cache[key] = html
+        sb.append(html)
+        return sb
@@ -0,0 +1,37 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, replace
+from typing import Iterator, Optional
+
+
+@dataclass(frozen=True)
+class RenderContext:
+    """
+    Overrides applied while the tags are rendered, so a different output (like the Jupyter preview) can be produced
+    without changing or copying the tree.
+    """
+    preview_width: Optional[str] = None
+    """Width of the outer table of every Row."""
+    unwrap_cycles: bool = False
+    """Render only the first component of every Cycle, as the conditions can not be evaluated outside of Olex2."""
+
+
+DEFAULT_CONTEXT = RenderContext()
+_CONTEXT: ContextVar = ContextVar("olx_gui_render_context", default=DEFAULT_CONTEXT)
+
+
+def current_context() -> RenderContext:
+    return _CONTEXT.get()
+
+
+@contextmanager
+def render_context(**overrides) -> Iterator[RenderContext]:
+    """
+    Renders everything inside the with block using the current context updated with overrides.
+    """
+    token = _CONTEXT.set(replace(_CONTEXT.get(), **overrides))
+    try:
+        yield _CONTEXT.get()
+    finally:
+        _CONTEXT.reset(token)
+
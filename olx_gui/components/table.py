@@ -1,19 +1,34 @@
-from dataclasses import dataclass
-from math import floor
+from collections.abc import Mapping
+from dataclasses import dataclass, replace
 
 from dominate.tags import tr, td, table, comment
-from typing import List, Optional, Union
+from typing import IO, Iterable, Iterator, List, Optional, Tuple, Union
 import copy
+import warnings
 
-from pygments import highlight
-from pygments.lexers import HtmlLexer
-from pygments.formatters import TerminalFormatter
-from .item_component import include_comment, LabeledGeneralComponent, ignore, Cycle
+from . import ir, layout
+from .olex_vars import HTML_TABLE_GROUP_BG_COLOUR
+from .compact import compact_html, drop_comments
+from .item_component import include_comment
+from .render_cache import CachedRender
+from .render_context import current_context, render_context
+from .validation import Issue, ValidationError, validate_tree
+from ..utils import highlighting as highlighting_utils
+
+
+def __getattr__(name):
+    # LEXER and FORMATTER used to be created on import, they are now created on first use.
+    if name == "LEXER":
+        return highlighting_utils.lexer()
+    if name == "FORMATTER":
+        return highlighting_utils.formatter()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-LEXER = HtmlLexer()
-FORMATTER = TerminalFormatter()
 
 class Pars:
+    """
+    Mutable attribute holder kept for compatibility. RowConfig turns it into Params.
+    """
     def __init__(self, par: dict):
         for key in par:
             setattr(self, key, par[key])
@@ -36,6 +51,112 @@ class Pars:
             self.__dict__.pop(key)
 
 
+class Params(Mapping):
+    """
+    Immutable, tuple backed set of tag attributes. It can be shared between any number of rows, set and update return
+    a modified copy.
+    """
+    __slots__ = ("_items",)
+
+    def __init__(self, par: Union[Mapping, Pars, Iterable[Tuple[str, object]]] = ()):
+        if isinstance(par, Params):
+            items = par._items
+        elif isinstance(par, Pars):
+            items = tuple(par.__dict__.items())
+        elif isinstance(par, Mapping):
+            items = tuple(par.items())
+        else:
+            items = tuple(par)
+        object.__setattr__(self, "_items", items)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("Params is immutable, use set or update to get a modified copy.")
+
+    def __getitem__(self, key):
+        for k, v in self._items:
+            if k == key:
+                return v
+        raise KeyError(key)
+
+    def __iter__(self):
+        for k, _ in self._items:
+            yield k
+
+    def __len__(self):
+        return len(self._items)
+
+    def __hash__(self):
+        # Equal Params may list their items in another order.
+        return hash(frozenset(self._items))
+
+    def __repr__(self):
+        return f"Params({dict(self._items)})"
+
+    def __reduce__(self):
+        return Params, (self._items,)
+
+    def set(self, key: str, value) -> "Params":
+        return self.update({key: value})
+
+    def update(self, other: Optional[Mapping] = None, **kwargs) -> "Params":
+        """Returns a copy with the attributes of other and kwargs added or replaced."""
+        changes = dict(other or (), **kwargs)
+        items = [(k, changes.pop(k, v)) for k, v in self._items]
+        items.extend(changes.items())
+        return Params(items)
+
+
+class _ConfigParams(Params):
+    """
+    The Params of a single RowConfig. They can still be changed in place like Pars, e.g.
+    config.table1_parameters["width"] = "50%", which is deprecated in favour of RowConfig.override. The change doesn't
+    reach the other configs sharing the same parameters.
+    """
+    __slots__ = ()
+
+    def _replace_items(self, items: tuple) -> None:
+        warnings.warn("Changing the parameters of a RowConfig in place is deprecated, use RowConfig.override.",
+                      DeprecationWarning, stacklevel=3)
+        object.__setattr__(self, "_items", items)
+
+    def __setitem__(self, key, value):
+        self._replace_items(self.set(key, value)._items)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._replace_items(tuple(item for item in self._items if item[0] != key))
+
+    def pop(self, key):
+        if key in self:
+            self._replace_items(tuple(item for item in self._items if item[0] != key))
+
+    def __getattr__(self, key):
+        if key.startswith("_"):
+            raise AttributeError(key)
+        try:
+            return self[key]
+        except KeyError:
+            raise AttributeError(key) from None
+
+    __setattr__ = __setitem__
+
+    def __reduce__(self):
+        return _ConfigParams, (self._items,)
+
+
+ROW_PARAMETERS = {
+    "tr1_parameters": Params({"ALIGN": "left", "NAME": "NAME", "width": "100%"}),
+    "td1_parameters": Params({"colspan": "#colspan"}),
+    "table1_parameters": Params({"border": "0", "width": "100%", "cellpadding": "0", "cellspacing": "0",
+                                 "Xbgcolor": "#ffaaaa"}),
+    "tr2_parameters": Params({"Xbgcolor": "#ffffaa"}),
+    "td2_parameters": Params({"width": "100", "align": "left"}),
+    "table2_parameters": Params({"width": "100%", "cellpadding": "0", "cellspacing": "2"}),
+    "tr3_parameters": Params({"bgcolor": HTML_TABLE_GROUP_BG_COLOUR.ref(deferred=True)}),
+}
+
+
 @dataclass
 class RowConfig:
     """
@@ -57,61 +178,79 @@ class RowConfig:
           </table>
         </td>
     </tr>
+    Parameters that are not given use the shared defaults in ROW_PARAMETERS, the others are turned into Params. Use
+    override to get a changed copy, e.g. config.override(table1_parameters={"width": "50%"}). Changing the parameters in
+    place still works but is deprecated.
     """
-    tr1_parameters: Optional[Union[dict, Pars]] = None
-    td1_parameters: Optional[Union[dict, Pars]] = None
-    table1_parameters: Optional[Union[dict, Pars]] = None
-    tr2_parameters: Optional[Union[dict, Pars]] = None
-    td2_parameters: Optional[Union[dict, Pars]] = None
-    table2_parameters: Optional[Union[dict, Pars]] = None
-    tr3_parameters: Optional[Union[dict, Pars]] = None
+    tr1_parameters: Optional[Union[dict, Pars, Params]] = None
+    td1_parameters: Optional[Union[dict, Pars, Params]] = None
+    table1_parameters: Optional[Union[dict, Pars, Params]] = None
+    tr2_parameters: Optional[Union[dict, Pars, Params]] = None
+    td2_parameters: Optional[Union[dict, Pars, Params]] = None
+    table2_parameters: Optional[Union[dict, Pars, Params]] = None
+    tr3_parameters: Optional[Union[dict, Pars, Params]] = None
     children_width: Optional[str] = None
-    
+
     def __post_init__(self):
-        if self.tr1_parameters is None:
-            self.tr1_parameters = Pars({"ALIGN": "left", "NAME": "NAME", "width": "100%"})
-        
-        if self.td1_parameters is None:
-            self.td1_parameters = Pars({"colspan": "#colspan"})
-            
-        if self.table1_parameters is None:
-            self.table1_parameters = Pars({"border": "0", "width": "100%", "cellpadding": "0", "cellspacing": "0", "Xbgcolor": "#ffaaaa"})
-        
-        if self.tr2_parameters is None:
-            self.tr2_parameters = Pars({"Xbgcolor": "#ffffaa"})
-        
-        if self.td2_parameters is None:
-            self.td2_parameters = Pars({"width": "100", "align": "left"})
-        
-        if self.table2_parameters is None:
-            self.table2_parameters = Pars({"width": "100%", "cellpadding": "0", "cellspacing": "2"})
-
-        if self.tr3_parameters is None:
-            self.tr3_parameters = Pars({"bgcolor": "$GetVar(HtmlTableGroupBgColour)"})
-
-    def to_dict(self):
-        """
-        Convert every config to a dic for dominate access.
-        """
-        for at, val in self.__dict__.items():
-            if isinstance(val, Pars):
-                self.__dict__[at] = val.__dict__
-
-    def to_pars(self):
-        """
-        Convert every config to Pars
-        """
-        for at, val in self.__dict__.items():
-            if isinstance(val, dict):
-                self.__dict__[at] = Pars(val)
+        for field, default in ROW_PARAMETERS.items():
+            value = getattr(self, field)
+            setattr(self, field, _ConfigParams(default if value is None else value))
+
+    def override(self, **parameters) -> "RowConfig":
+        """
+        Returns a copy of the config with the given parameters updated. The Params that are not changed are shared.
+        """
+        changes = {}
+        for field, value in parameters.items():
+            current = getattr(self, field)
+            if isinstance(current, Params) and isinstance(value, (Mapping, Pars)):
+                value = current.update(Params(value))
+            changes[field] = value
+        return replace(self, **changes)
+
+    def to_dict(self) -> dict:
+        """
+        Returns every parameter set as a dict, without changing the config.
+        """
+        return {field: dict(getattr(self, field)) for field in ROW_PARAMETERS}
 
     def __setitem__(self, key, value):
+        if key in ROW_PARAMETERS and value is not None:
+            value = _ConfigParams(value)
         setattr(self, key, value)
 
     def __getitem__(self, key):
         return getattr(self, key)
 
-class Row(tr):
+
+DEFAULT_ROW_CONFIG = RowConfig()
+
+
+class RowTable(table):
+    """
+    The outer table of a Row. Its width follows the preview_width of the render context when it is set.
+    """
+    tagname = "table"
+
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        width = current_context().preview_width
+        if width is None:
+            return super()._render(sb, indent_level, indent_str, pretty, xhtml)
+        # Only this tag is shallow copied, the children are shared.
+        shadow = copy.copy(self)
+        shadow.attributes = dict(self.attributes, width=width)
+        return super(RowTable, shadow)._render(sb, indent_level, indent_str, pretty, xhtml)
+
+    def _ir_node(self) -> table:
+        width = current_context().preview_width
+        if width is None:
+            return self
+        shadow = copy.copy(self)
+        shadow.attributes = dict(self.attributes, width=width)
+        return shadow
+
+
+class Row(CachedRender, tr):
     """
     A line consists of a single table containing help information.
     """
@@ -122,17 +261,16 @@ class Row(tr):
             self.config = kwargs["config"]
             kwargs.pop("config")
         else:
-            self.config = RowConfig()
-        self.config.tr1_parameters["NAME"] = name
-        self.config.to_dict()
-        super().__init__(self.config.tr1_parameters, **kwargs)
+            # A config of its own, changing it in place must not change the default. The Params stay shared.
+            self.config = replace(DEFAULT_ROW_CONFIG)
+        super().__init__(dict(self.config.tr1_parameters, NAME=name), **kwargs)
         self.add(include_comment("tool-help-first-column", r"gui\blocks\tool-help-first-column.htm", help_ext=help_ext, other_pars=["1"]))
-        self.td1 = td(self.config.td1_parameters)
-        self.table1 = table(self.config.table1_parameters)
-        self.tr2 = tr(self.config.tr2_parameters)
-        self.td2 = td(self.config.td2_parameters)
-        self.table2 = table(self.config.table2_parameters)
-        self.tr3 = tr(self.config.tr3_parameters)
+        self.td1 = td(**self.config.td1_parameters)
+        self.table1 = RowTable(**self.config.table1_parameters)
+        self.tr2 = tr(**self.config.tr2_parameters)
+        self.td2 = td(**self.config.td2_parameters)
+        self.table2 = table(**self.config.table2_parameters)
+        self.tr3 = tr(**self.config.tr3_parameters)
         self.table2.add(self.tr3)
         self.td2.add(self.table2)
         self.tr2.add(self.td2)
@@ -140,10 +278,22 @@ class Row(tr):
         self.td1.add(self.table1)
         self.add(self.td1)
         self.add = self._add
+        self._widths: List[Optional[str]] = []
+        self._layout_dirty = False
 
     @property
     def pretty(self):
-        return highlight(str(self), LEXER, FORMATTER)
+        return highlighting_utils.highlight_html(str(self))
+
+    def render_compact(self, comments: bool = True) -> str:
+        """
+        The row without indentation, see olx_gui.components.compact. comments=False drops the non #include comments.
+        """
+        return _line_html(self, "  ", True, False, comments, compact=True)
+
+    def validate(self) -> List[Issue]:
+        """Validates the Olex2 expressions of the row and its components."""
+        return validate_tree(self)
 
     @property
     def last_component(self):
@@ -153,42 +303,61 @@ class Row(tr):
         return str(self)
 
     def _add(self, *args):
-        children = self.tr3.children + list(args)
-        self.children_width = calculate_useful_size(children)
-        for k in range(len(self.tr3.children)):
-            self.tr3[k].set_attribute("width", self.children_width)
-
-        for k in args:
-            if isinstance(k, LabeledGeneralComponent) and not "width" in k.attributes:
-                k["width"] = self.children_width
-            self.tr3.add(k)
-
-
-def calculate_useful_size(objs: list) -> str:
-    total_nitems = len(objs)
-    already_set = 0
-    used_perc = 0
-    if total_nitems == 1:
-        k = objs[0]
-
-        if isinstance(k, ignore):
-            k = k[0]
-        elif isinstance(k, Cycle):
-            k = k[0][0]
-        return k.attributes["width"]
-
-    for k in objs:
-        if isinstance(k, ignore):
-            k = k[0]
-        elif isinstance(k, Cycle):
-            k = k[0][0]
-        elif not isinstance(k, LabeledGeneralComponent):
-            return "100%"
-        if "width" in k.attributes and not k.resizable:
-            used_perc += float(k.attributes["width"].replace("%", ""))/100
-            already_set += 1
-    remaining = total_nitems - already_set
-    return f"{floor((1-used_perc)*100/remaining)}%"
+        """
+        Adds components to the row. The widths are resolved once by finalize.
+        """
+        self.tr3.add(*args)
+        self._layout_dirty = True
+        self.invalidate()
+
+    def finalize(self) -> List[Optional[str]]:
+        """
+        Resolves the width of every component with the layout solver and returns them. It is called automatically
+        before rendering.
+        """
+        if not self._layout_dirty:
+            return self._widths
+        self._widths = layout.solve(self.tr3.children)
+        for k, width in zip(self.tr3.children, self._widths):
+            if width is not None:
+                layout.apply_width(k, width)
+        self._layout_dirty = False
+        return self._widths
+
+    @property
+    def children_width(self) -> Optional[str]:
+        """The width of the first component that is not fixed."""
+        return layout.flexible_width(self.tr3.children, self.finalize())
+
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        self.finalize()
+        return super()._render(sb, indent_level, indent_str, pretty, xhtml)
+
+    def _ir_node(self) -> "Row":
+        self.finalize()
+        return self
+
+    def compile(self) -> ir.Program:
+        """The row compiled to a flat Program for the current render context, see olx_gui.components.ir."""
+        return ir.compile_tree(self)
+
+
+def _line_html(line, indent: str, pretty: bool, xhtml: bool, comments: bool, compact: bool = False) -> str:
+    """
+    A line passed through compact_html (from its indented HTML) or drop_comments, kept with the rendered HTML of the
+    line.
+    """
+    def compute() -> str:
+        html = "".join(line._render([], 0, indent, pretty or compact, xhtml))
+        return compact_html(html, comments) if compact else drop_comments(html)
+    if isinstance(line, CachedRender):
+        return line.cached(("compact", indent, pretty, xhtml, comments, compact, current_context()), compute)
+    return compute()
+
+
+def calculate_useful_size(objs: list) -> Optional[str]:
+    """The width the layout solver gives to the first component of objs that is not fixed."""
+    return layout.flexible_width(objs, layout.solve(objs))
 
 
 class H3Section:
@@ -203,19 +372,79 @@ class H3Section:
     def add(self, line: Row):
         self.lines.append(line)
 
-    def __str__(self):
-        strs = ""
+    def finalize(self) -> None:
+        """Resolves the widths of every row in one pass, before anything is validated or rendered."""
         for line in self.lines:
-            strs += "\n" + str(line)
-        return strs
+            if isinstance(line, Row):
+                line.finalize()
 
-    def html_preview(self, highlighting: bool = True):
-        """Previews the entire HTML of the section
+    def validate(self) -> List[Issue]:
+        """Validates the Olex2 expressions of every line in one batch. Unchanged rows reuse their last result."""
+        return [issue for line in self.lines for issue in validate_tree(line)]
+
+    def iter_render(self, indent: str = "  ", pretty: bool = True, xhtml: bool = False, validate: bool = True,
+                    compact: bool = False, comments: bool = True) -> Iterator[str]:
+        """
+        Renders the section one line at a time, so it can be streamed to a file or a socket without building the whole
+        HTML string in memory. Joining the chunks gives exactly str(self).
+        compact renders without indentation and comments=False drops the comments that are not #include, see
+        olx_gui.components.compact.
+        Raises ValidationError before the first chunk if validate is True and any Olex2 expression is invalid.
         """
-        if highlighting:
-            print(highlight(str(self), LEXER, FORMATTER))
+        self.finalize()
+        if validate:
+            issues = self.validate()
+            if issues:
+                raise ValidationError(issues)
+        for line in self.lines:
+            if compact or not comments:
+                yield "\n" + _line_html(line, indent, pretty, xhtml, comments, compact)
+                continue
+            sb = ["\n"]
+            line._render(sb, 0, indent, pretty, xhtml)
+            yield "".join(sb)
+
+    def compile(self, validate: bool = True) -> ir.CompiledSection:
+        """
+        Compiles every line to a flat Program for the current render context. The compiled section renders the same
+        HTML as the section and doesn't need it anymore, which makes it cheap to keep many sections in memory.
+        Raises ValidationError if validate is True and any Olex2 expression is invalid.
+        """
+        self.finalize()
+        if validate:
+            issues = self.validate()
+            if issues:
+                raise ValidationError(issues)
+        return ir.CompiledSection([ir.compile_tree(line) for line in self.lines])
+
+    def write_to(self, fileobj: IO[str], **kwargs) -> int:
+        """
+        Writes the rendered section to an opened text file object and returns the number of characters written.
+        kwargs are passed to iter_render.
+        """
+        written = 0
+        for chunk in self.iter_render(**kwargs):
+            fileobj.write(chunk)
+            written += len(chunk)
+        return written
+
+    def __str__(self):
+        return "".join(self.iter_render())
+
+    def render_compact(self, comments: bool = True) -> str:
+        """
+        The section without indentation, see olx_gui.components.compact. comments=False drops the non #include comments.
+        """
+        return "".join(self.iter_render(compact=True, comments=comments))
+
+    def html_preview(self, highlighting: bool = True, pager: bool = False):
+        """Previews the entire HTML of the section, one row at a time, or in the terminal pager if pager is True.
+        """
+        chunks = self.iter_render()
+        if pager:
+            highlighting_utils.page(chunks, highlighting)
         else:
-            print(str(self))
+            highlighting_utils.stream(chunks, highlighting)
 
     @property
     def include_comment(self):
@@ -229,12 +458,12 @@ class H3Section:
             raise TypeError("The comment should be of type comment.")
 
     def _repr_html_(self):
-        selfrepr = copy.deepcopy(self)
-        for line in selfrepr.lines:
-            if isinstance(line, Row):
-                line.table1["width"] = self.preview_width
-                for k, component in enumerate(line.last_component):
-                    if isinstance(component, Cycle):
-                        component = component.children[0][0]
-                        line.last_component.children[k] = component
-        return str(selfrepr)
+        with render_context(preview_width=self.preview_width, unwrap_cycles=True):
+            return str(self)
+
+    def live_preview(self, **kwargs):
+        """
+        A notebook preview rendered again in the background when the section changes, see olx_gui.preview.LivePreview.
+        """
+        from ..preview import LivePreview
+        return LivePreview(self, **kwargs)
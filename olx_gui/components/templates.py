@@ -0,0 +1,200 @@
+"""
+Precompiled skeletons for the LabeledGeneralComponent family.
+
+Every component of the family renders to the same td > table > tr > td > font structure, only the attributes, the
+label and the input change. The skeleton of each layout is rendered once by dominate with markers in place of the
+varying parts and split into static fragments, so rendering a component only fills the markers in.
+"""
+import re
+from typing import Dict, List, Mapping, Tuple, Union
+
+from dominate.dom_tag import dom_tag
+from dominate.tags import td, table, tr, font
+from dominate.util import escape, text
+
+TEMPLATES_ENABLED = True
+"""Set to False to render every component through dominate, e.g. to compare both paths."""
+
+# Order of the nodes given to ComponentTemplate.render.
+NODES = ("td", "table", "tr", "td_input", "td_label", "font", "input", "label")
+
+_MARKERS = re.compile(' \x00(\\w+)=""|\x00(\\w+)\x00')
+
+Part = Union[str, Tuple[int, int]]
+"""A static fragment or (node, indent level) for a child slot. Attribute slots use an indent level of -1."""
+
+
+def new_tag(cls, attributes: Mapping, *children: dom_tag) -> dom_tag:
+    """
+    Creates a tag from attributes that are already clean (see clean_attributes) without going through dominate's
+    __init__. The tag is never added to an active with block, so it must end up inside another tag.
+    """
+    node = cls.__new__(cls)
+    node.attributes = dict(attributes)
+    node.children = list(children)
+    node.parent = None
+    node._ctx = None
+    for child in children:
+        child.parent = node
+    return node
+
+
+def clean_attributes(attributes: Mapping) -> dict:
+    """The attributes with their names normalised the way dominate does it, e.g. _class becomes class."""
+    return dict(dom_tag.clean_pair(k, v) for k, v in attributes.items())
+
+
+class _ChildSlot(dom_tag):
+    """Stands for the label or the input while the skeleton is rendered."""
+    def __init__(self, name: str, is_inline: bool):
+        self.attributes = {}
+        self.children = []
+        self.parent = None
+        self._ctx = None
+        self.name = name
+        self.is_inline = is_inline
+        self.level = 0
+
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        self.level = indent_level
+        sb.append(f"\x00{self.name}\x00")
+        return sb
+
+
+def _attribute_slot(name: str) -> dict:
+    return {f"\x00{name}": ""}
+
+
+class ComponentTemplate:
+    """
+    Skeleton of one layout. The layout is (label position, label inline, input inline), the label position being None,
+    "top", "left" or "right".
+    """
+    _templates: Dict[tuple, "ComponentTemplate"] = {}
+
+    def __init__(self, layout: tuple):
+        self.layout = layout
+        self._parts: Dict[tuple, List[Part]] = {}
+
+    @classmethod
+    def get(cls, layout: tuple) -> "ComponentTemplate":
+        template = cls._templates.get(layout)
+        if template is None:
+            template = cls._templates[layout] = cls(layout)
+        return template
+
+    def _skeleton(self) -> Tuple[dom_tag, Dict[str, _ChildSlot]]:
+        label_position, label_inline, input_inline = self.layout
+        slots = {"input": _ChildSlot("input", input_inline)}
+        font_node = new_tag(font, _attribute_slot("font"), slots["input"])
+        td_input = new_tag(td, _attribute_slot("td_input"))
+        cells = [td_input]
+        if label_position is not None:
+            slots["label"] = _ChildSlot("label", label_inline)
+        if label_position == "top":
+            td_input.children.append(slots["label"])
+        td_input.children.append(font_node)
+        if label_position in ("left", "right"):
+            td_label = new_tag(td, _attribute_slot("td_label"), slots["label"])
+            if label_position == "left":
+                cells.insert(0, td_label)
+            else:
+                cells.append(td_label)
+        row = new_tag(tr, _attribute_slot("tr"), *cells)
+        return new_tag(td, _attribute_slot("td"), new_tag(table, _attribute_slot("table"), row)), slots
+
+    def parts(self, indent_level: int, indent_str: str, pretty: bool, xhtml: bool) -> List[Part]:
+        key = (indent_level, indent_str, pretty, xhtml)
+        parts = self._parts.get(key)
+        if parts is not None:
+            return parts
+        skeleton, slots = self._skeleton()
+        html = "".join(skeleton._render([], indent_level, indent_str, pretty, xhtml))
+        parts = []
+        position = 0
+        for match in _MARKERS.finditer(html):
+            if match.start() > position:
+                parts.append(html[position:match.start()])
+            if match.group(1) is not None:
+                parts.append((NODES.index(match.group(1)), -1))
+            else:
+                name = match.group(2)
+                parts.append((NODES.index(name), slots[name].level))
+            position = match.end()
+        if position < len(html):
+            parts.append(html[position:])
+        self._parts[key] = parts
+        return parts
+
+    def render(self, nodes: tuple, sb: list, indent_level: int, indent_str: str, pretty: bool, xhtml: bool) -> list:
+        """Fills the skeleton with nodes, given in the order of NODES."""
+        for part in self.parts(indent_level, indent_str, pretty, xhtml):
+            if type(part) is str:
+                sb.append(part)
+            elif part[1] < 0:
+                sb.append(attributes_html(nodes[part[0]].attributes))
+            else:
+                node = nodes[part[0]]
+                if node.is_single and type(node)._render is dom_tag._render:
+                    # Plain single tags like the inputs, rendered with the cached attribute fragments.
+                    sb.append(f"<{_tag_name(node)}{attributes_html(node.attributes)}{' />' if xhtml else '>'}")
+                else:
+                    node._render(sb, part[1], indent_str, pretty, xhtml)
+        return sb
+
+
+def _tag_name(node: dom_tag) -> str:
+    name = getattr(node, "tagname", type(node).__name__)
+    return name[:-1] if name[-1] == "_" else name
+
+
+class TemplateRender:
+    """
+    Mixin rendering a component through its ComponentTemplate. The component gives its layout in _template_layout and
+    its nodes in _template_nodes, which returns None when the tree no longer matches the skeleton.
+    """
+    def _render(self, sb, indent_level, indent_str, pretty, xhtml):
+        nodes = self._template_nodes() if TEMPLATES_ENABLED else None
+        if nodes is None:
+            return super()._render(sb, indent_level, indent_str, pretty, xhtml)
+        template = ComponentTemplate.get(self._template_layout())
+        return template.render(nodes, sb, indent_level, indent_str, pretty, xhtml)
+
+
+def attributes_html(attributes: dict) -> str:
+    """
+    The attributes of a tag as dominate renders them, e.g. ' valign="middle" width="100%"'. The fragment of every
+    attribute is cached, as most of them are the defaults shared by every component.
+    """
+    fragments = []
+    for key, value in sorted(attributes.items()):
+        if value in (False, None):
+            continue
+        if type(value) is str:
+            fragment = _FRAGMENTS.get((key, value))
+            if fragment is None:
+                if len(_FRAGMENTS) > _MAX_FRAGMENTS:
+                    _FRAGMENTS.clear()
+                    _FRAGMENTS.update(_PREESCAPED)
+                fragment = _FRAGMENTS[(key, value)] = f' {key}="{escape(value, True)}"'
+        elif isinstance(value, text) and not value.escape:
+            fragment = f' {key}="{value}"'
+        else:
+            fragment = f' {key}="{escape(str(value), True)}"'
+        fragments.append(fragment)
+    return "".join(fragments)
+
+
+_FRAGMENTS: Dict[Tuple[str, str], str] = {}
+_MAX_FRAGMENTS = 65536
+_PREESCAPED: Dict[Tuple[str, str], str] = {}
+
+
+def preescape(attributes: Mapping) -> None:
+    """
+    Escapes the fragments of attributes once and keeps them for good, e.g. the defaults of a component class, so they
+    are never escaped again even when the cache of the other fragments is dropped.
+    """
+    for key, value in clean_attributes(attributes).items():
+        if type(value) is str:
+            _PREESCAPED[(key, value)] = _FRAGMENTS[(key, value)] = f' {key}="{escape(value, True)}"'
@@ -0,0 +1,160 @@
+"""
+Validation of the Olex2 expressions used as attribute values and #include parameters.
+
+Values starting with an Olex2 function (spy, snum, strcmp, GetVar, $GetVar, optionally negated with not) are scanned
+once for balanced brackets and quotes. The whole tree of a Row or an H3Section is validated in one batch and the
+result is cached with the rendered HTML, so unchanged rows are not validated again.
+"""
+import re
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from dominate.dom_tag import dom_tag
+from dominate.tags import comment
+from dominate.util import text
+
+from .render_cache import CachedRender
+
+FUNCTION_PREFIXES = ("spy", "snum", "strcmp", "GetVar", "$GetVar")
+FUNCTION = re.compile(r"\s*(?:not\s+)?(?:%s)" % "|".join(re.escape(prefix) for prefix in FUNCTION_PREFIXES))
+INCLUDE = re.compile(r"\s*#include\s+(\S+)\s+(\S*)")
+
+_OPENING = {"(": ")", "[": "]", "{": "}"}
+_CLOSING = {")": "(", "]": "[", "}": "{"}
+
+
+@dataclass(frozen=True)
+class Issue:
+    where: str
+    attribute: str
+    value: str
+    position: int
+    message: str
+
+    def __str__(self):
+        where = f"{self.where} " if self.where else ""
+        return f"{where}{self.attribute}={self.value!r}: {self.message} at position {self.position}."
+
+
+class ValidationError(ValueError):
+    def __init__(self, issues: List[Issue]):
+        self.issues = issues
+        lines = "\n".join(f"  {issue}" for issue in issues)
+        super().__init__(f"{len(issues)} invalid Olex2 expression(s):\n{lines}")
+
+
+def balance_error(value: str) -> Optional[tuple]:
+    """
+    Scans value once and returns (position, message) of the first unbalanced bracket or quote, or None. Brackets
+    inside quotes are ignored.
+    """
+    stack = []
+    quote = None
+    quote_position = 0
+    for position, char in enumerate(value):
+        if quote is not None:
+            if char == quote:
+                quote = None
+        elif char == "'" or char == '"':
+            quote = char
+            quote_position = position
+        elif char in _OPENING:
+            stack.append((char, position))
+        elif char in _CLOSING:
+            if not stack:
+                return position, f"unexpected {char!r}"
+            opening, opening_position = stack.pop()
+            if opening != _CLOSING[char]:
+                return position, f"{char!r} closes {opening!r} opened at position {opening_position}"
+    if quote is not None:
+        return quote_position, f"unclosed {quote}"
+    if stack:
+        opening, opening_position = stack[-1]
+        return opening_position, f"unclosed {opening!r}"
+    return None
+
+
+def validate_value(value, attribute: str = "", where: str = "") -> Optional[Issue]:
+    """Returns the issue of a single attribute value or None if it is valid or not an Olex2 function."""
+    if isinstance(value, text):
+        value = value.text
+    if not isinstance(value, str) or FUNCTION.match(value) is None:
+        return None
+    error = balance_error(value)
+    if error is None:
+        return None
+    return Issue(where, attribute, value, *error)
+
+
+def validate_include(content: str, where: str = "") -> List[Issue]:
+    """Validates the parameters of an #include comment, e.g. ' #include name path;key=value;1 '."""
+    match = INCLUDE.match(content)
+    if match is None:
+        return []
+    name, target = match.groups()
+    path, _, parameters = target.partition(";")
+    if not path:
+        return [Issue(where, name, content, match.start(2), "missing the path of the include")]
+    issues = []
+    for parameter in parameters.split(";") if parameters else []:
+        key, equals, value = parameter.partition("=")
+        if equals and not key:
+            issues.append(Issue(where, name, parameter, 0, "parameter without a name"))
+        elif equals:
+            issue = validate_value(value, f"{name}:{key}", where)
+            if issue is not None:
+                issues.append(issue)
+    return issues
+
+
+def _where(tag: dom_tag) -> str:
+    """Describes tag for the issues, e.g. InputText(SNUM_NAME) or Row(ROW_NAME)."""
+    source = getattr(tag, "input", tag)
+    while isinstance(source, dom_tag):
+        name = source.attributes.get("name") or source.attributes.get("NAME")
+        if name is not None:
+            return f"{type(tag).__name__}({getattr(name, 'text', name)})"
+        source = next((child for child in source.children if isinstance(child, dom_tag)), None)
+    return type(tag).__name__
+
+
+def _walk(tag: dom_tag, where: str) -> List[Issue]:
+    issues = []
+    for key, value in tag.attributes.items():
+        issue = validate_value(value, key, where)
+        if issue is not None:
+            issues.append(issue)
+    for child in tag.children:
+        if isinstance(child, dom_tag):
+            issues.extend(validate_tree(child, where))
+    return issues
+
+
+def validate_tree(tag: dom_tag, where: Optional[str] = None) -> List[Issue]:
+    """
+    Validates every attribute and #include comment of tag and its children. Issues of tags using the render cache
+    are kept until the tag changes.
+    """
+    if isinstance(tag, comment):
+        return [issue for content in tag.children if isinstance(content, str)
+                for issue in validate_include(content, where or "comment")]
+    if isinstance(tag, CachedRender):
+        return tag.cached(("issues",), lambda: _walk(tag, _where(tag)))
+    return _walk(tag, where or _where(tag))
+
+
+def validate(tags: Iterable[dom_tag]) -> List[Issue]:
+    """Validates many trees in one batch."""
+    issues = []
+    for tag in tags:
+        issues.extend(validate_tree(tag))
+    return issues
+
+
+def verify_functions(args: dict) -> None:
+    """
+    Raises ValueError if any of the values is an Olex2 function with unbalanced brackets or quotes.
+    """
+    issues = [issue for issue in (validate_value(v, k) for k, v in args.items()) if issue is not None]
+    if issues:
+        raise ValidationError(issues)
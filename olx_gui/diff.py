@@ -0,0 +1,205 @@
+"""
+Structural diff of sections.
+
+The rows are keyed by their NAME and the components of a row by the name of their input, e.g. InputText(SNUM_X), so
+two versions of a section are compared row by row without comparing their HTML: every row and component is reduced to
+a digest of its rendered HTML, which the render cache keeps until it changes. Digests keeps only the digests, so the
+previous version of a section doesn't need to be kept around.
+
+    before = Digests.take(section)
+    ...  # change the section or build it again
+    changes = diff(before, section)
+    print(changes)  # e.g. "1 changed (SNUM_REFINEMENT: ~InputText(SNUM_X))"
+    write_fragments(section, "fragments", before)  # rewrites only the changed rows
+"""
+import hashlib
+import os
+from urllib.parse import quote
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple, Union
+
+from dominate.dom_tag import dom_tag
+
+from .components.render_cache import CachedRender
+from .components.render_context import current_context
+from .components.table import H3Section, Row
+
+
+def _digest(html: str) -> str:
+    return hashlib.blake2b(html.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _render(tag) -> str:
+    if not isinstance(tag, dom_tag):
+        return str(tag)
+    return "".join(tag._render([], 0, "  ", True, False))
+
+
+def tag_digest(tag) -> str:
+    """Digest of the HTML of tag, cached with the HTML for the tags using the render cache."""
+    if isinstance(tag, CachedRender):
+        return tag.cached(("digest", current_context()), lambda: _digest(_render(tag)))
+    return _digest(_render(tag))
+
+
+def _unique(keys: List[str]) -> List[str]:
+    seen: Dict[str, int] = {}
+    unique = []
+    for key in keys:
+        seen[key] = seen.get(key, 0) + 1
+        unique.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return unique
+
+
+def row_keys(section: H3Section) -> List[str]:
+    """The key of every line: the NAME of the rows, the position of the other lines."""
+    keys = []
+    for k, line in enumerate(section.lines):
+        name = line.attributes.get("NAME") if isinstance(line, Row) else None
+        keys.append(str(name) if name is not None else f"line-{k}")
+    return _unique(keys)
+
+
+def _component_key(component, index: int) -> str:
+    nodes = [component]
+    while nodes:
+        node = nodes.pop(0)
+        if isinstance(node, dom_tag):
+            name = node.attributes.get("name")
+            if name is not None:
+                return f"{type(component).__name__}({getattr(name, 'text', name)})"
+            nodes.extend(node.children)
+    return f"{type(component).__name__} {index}"
+
+
+def component_digests(row: Row) -> Dict[str, str]:
+    """The digest of every component of a row, by component key."""
+    row.finalize()
+    components = row.last_component.children
+    keys = _unique([_component_key(component, k) for k, component in enumerate(components)])
+    return dict(zip(keys, (tag_digest(component) for component in components)))
+
+
+@dataclass(frozen=True)
+class Digests:
+    """The digests of the rows of a section and of their components."""
+    keys: Tuple[str, ...]
+    rows: Dict[str, str]
+    components: Dict[str, Dict[str, str]]
+
+    @classmethod
+    def take(cls, section: H3Section) -> "Digests":
+        keys = row_keys(section)
+        rows = {}
+        components = {}
+        for key, line in zip(keys, section.lines):
+            if isinstance(line, Row):
+                components[key] = component_digests(line)
+            rows[key] = tag_digest(line)
+        return cls(tuple(keys), rows, components)
+
+
+@dataclass
+class RowChange:
+    key: str
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[str] = field(default_factory=list)
+
+    def __str__(self):
+        parts = [f"+{key}" for key in self.added] + [f"-{key}" for key in self.removed]
+        parts += [f"~{key}" for key in self.changed]
+        return f"{self.key}: {', '.join(parts) or 'row attributes'}"
+
+
+@dataclass
+class SectionDiff:
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)
+    changed: List[RowChange] = field(default_factory=list)
+    reordered: bool = False
+
+    @property
+    def is_empty(self) -> bool:
+        return not (self.added or self.removed or self.changed or self.reordered)
+
+    def __str__(self):
+        if self.is_empty:
+            return "no changes"
+        parts = []
+        if self.added:
+            parts.append(f"{len(self.added)} added ({', '.join(self.added)})")
+        if self.removed:
+            parts.append(f"{len(self.removed)} removed ({', '.join(self.removed)})")
+        if self.changed:
+            parts.append(f"{len(self.changed)} changed ({'; '.join(str(change) for change in self.changed)})")
+        if self.reordered:
+            parts.append("reordered")
+        return ", ".join(parts)
+
+
+def _compare(old: Dict[str, str], new: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+    added = [key for key in new if key not in old]
+    removed = [key for key in old if key not in new]
+    changed = [key for key in new if key in old and old[key] != new[key]]
+    return added, removed, changed
+
+
+def _digests(section) -> Digests:
+    from .snapshot import SectionSnapshot
+    if isinstance(section, Digests):
+        return section
+    if isinstance(section, H3Section):
+        return Digests.take(section)
+    if isinstance(section, SectionSnapshot):
+        return section.digests
+    raise TypeError(f"can't diff a {type(section).__name__}, expected an H3Section, Digests or SectionSnapshot")
+
+
+def diff(old, new) -> SectionDiff:
+    """
+    The rows and components added, removed and changed from old to new, each an H3Section, its Digests or a loaded
+    snapshot file (see olx_gui.snapshot).
+    """
+    old = _digests(old)
+    new = _digests(new)
+    added, removed, changed = _compare(old.rows, new.rows)
+    result = SectionDiff(added, removed)
+    for key in changed:
+        change = RowChange(key)
+        if key in old.components and key in new.components:
+            change.added, change.removed, change.changed = _compare(old.components[key], new.components[key])
+        result.changed.append(change)
+    kept = set(old.keys) & set(new.keys)
+    result.reordered = [key for key in old.keys if key in kept] != [key for key in new.keys if key in kept]
+    return result
+
+
+def fragment_path(directory: str, key: str) -> str:
+    """
+    The file of the row key in directory. The characters of the key that can't be part of a file name, like the path
+    separators, are percent-encoded, so a NAME such as ../x stays in directory.
+    """
+    return os.path.join(directory, f"{quote(key, safe='#()')}.htm")
+
+
+def write_fragments(section: H3Section, directory: str, previous: Union[Digests, None] = None) -> Digests:
+    """
+    Writes every row of the section to <directory>/<key>.htm (see fragment_path), only the rows that changed since
+    previous, and removes the fragments of the rows that are gone. Returns the digests to give as previous next time.
+    """
+    from .build import write_atomic
+    digests = Digests.take(section)
+    os.makedirs(directory, exist_ok=True)
+    for key, line in zip(digests.keys, section.lines):
+        path = fragment_path(directory, key)
+        if previous is None or previous.rows.get(key) != digests.rows[key] or not os.path.exists(path):
+            write_atomic(path, _render(line))
+    if previous is not None:
+        for key in previous.keys:
+            if key not in digests.rows:
+                try:
+                    os.unlink(fragment_path(directory, key))
+                except FileNotFoundError:
+                    pass
+    return digests
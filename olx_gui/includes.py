@@ -0,0 +1,122 @@
+"""
+Expansion of the #include comments against a local copy of the Olex2 blocks.
+
+    <!-- #include tool-h3 gui\\blocks\\tool-h3.htm;image=#image;colspan=1;1 -->
+
+is replaced by the content of gui/blocks/tool-h3.htm under the blocks root, with every #key of the block replaced by the
+value of key=value in the include. Other parameters (like the trailing 1) are not substituted. Includes found in the
+blocks are expanded too. The parsed blocks are cached in memory until their file changes, so expanding many panels
+reads every block once.
+
+The path of an include is looked up under the root first, so the root can be the Olex2 installation, then its file
+name directly in the root, so it can also be a directory of blocks. Includes whose block is missing are kept for Olex2
+to resolve, unless strict is set.
+"""
+import hashlib
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+INCLUDE = re.compile(r"<!--\s*#include\s+(\S+)\s+(\S*?);?\s*-->")
+PARAMETER = re.compile(r"#(\w+)")
+MAX_DEPTH = 16
+
+
+class IncludeError(ValueError):
+    pass
+
+
+def parse_parameters(parameters: str) -> Dict[str, str]:
+    """The key=value parameters of an include, e.g. 'image=#image;colspan=1;1' gives {'image': '#image', ...}."""
+    values = {}
+    for parameter in parameters.split(";"):
+        key, equals, value = parameter.partition("=")
+        if equals and key:
+            values[key] = value
+    return values
+
+
+class BlockTemplate:
+    """A block split once into its literal parts and the names of its #parameters."""
+    __slots__ = ("parts", "mtime")
+
+    def __init__(self, content: str, mtime: float = 0.0):
+        self.parts: List[str] = PARAMETER.split(content)
+        self.mtime = mtime
+
+    def render(self, parameters: Dict[str, str]) -> str:
+        parts = self.parts
+        out = [parts[0]]
+        for k in range(1, len(parts), 2):
+            name = parts[k]
+            out.append(parameters.get(name, f"#{name}"))
+            out.append(parts[k + 1])
+        return "".join(out)
+
+
+class IncludeExpander:
+    def __init__(self, root: str, strict: bool = False):
+        self.root = root
+        self.strict = strict
+        self._templates: Dict[str, BlockTemplate] = {}
+
+    def resolve(self, path: str) -> Optional[str]:
+        """The file of an include path, or None if the block is not in the root."""
+        relative = path.replace("\\", "/").lstrip("/")
+        for candidate in (os.path.join(self.root, relative), os.path.join(self.root, os.path.basename(relative))):
+            if os.path.isfile(candidate):
+                return candidate
+        return None
+
+    def template(self, file: str) -> BlockTemplate:
+        mtime = os.stat(file).st_mtime
+        template = self._templates.get(file)
+        if template is None or template.mtime != mtime:
+            with open(file, encoding="utf-8") as f:
+                template = self._templates[file] = BlockTemplate(f.read(), mtime)
+        return template
+
+    def expand(self, html: str, depth: int = 0) -> str:
+        """The html with every include whose block is found replaced by the block."""
+        if depth > MAX_DEPTH:
+            raise IncludeError(f"More than {MAX_DEPTH} nested includes, the blocks probably include each other.")
+
+        def replace(match: "re.Match") -> str:
+            target = match.group(2)
+            path, _, parameters = target.partition(";")
+            file = self.resolve(path)
+            if file is None:
+                if self.strict:
+                    raise IncludeError(f"Block {path} of include {match.group(1)} not found in {self.root}.")
+                return match.group(0)
+            block = self.template(file).render(parse_parameters(parameters))
+            return self.expand(block, depth + 1) if "#include" in block else block
+
+        return INCLUDE.sub(replace, html)
+
+    def digest(self) -> str:
+        """Digest of every block under the root, so outputs can be rebuilt when a block changes."""
+        digest = hashlib.sha256()
+        for directory, _, names in sorted(os.walk(self.root)):
+            for name in sorted(names):
+                if name.endswith((".htm", ".html")):
+                    with open(os.path.join(directory, name), "rb") as f:
+                        digest.update(name.encode("utf-8"))
+                        digest.update(f.read())
+        return digest.hexdigest()
+
+
+_EXPANDERS: Dict[Tuple[str, bool], IncludeExpander] = {}
+
+
+def expander(root: str, strict: bool = False) -> IncludeExpander:
+    """The shared expander of a root, keeping its blocks cached between calls."""
+    key = (os.path.abspath(root), strict)
+    if key not in _EXPANDERS:
+        _EXPANDERS[key] = IncludeExpander(root, strict)
+    return _EXPANDERS[key]
+
+
+def expand_includes(html: str, root: str, strict: bool = False) -> str:
+    """Expands the includes of html against the blocks under root, see the module documentation."""
+    return expander(root, strict).expand(html)
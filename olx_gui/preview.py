@@ -0,0 +1,150 @@
+"""
+Live preview of a section (or a Row) in a Jupyter notebook.
+
+    preview = section.live_preview(mirror="gui/options.htm")
+    preview  # shown at once and filled in when the section has been rendered
+    row.add(InputText("x", "X"))  # rendered again once the section stopped changing for delay seconds
+
+A task on the event loop of the kernel polls the change counter of every row (see CachedRender.version), which costs
+little even for thousands of rows, and renders the section again when it changed and didn't change anymore for delay
+seconds. Only the changed rows are rendered, the others come from the render cache. The task runs between the cells,
+on the thread running them, so the section is never rendered while a cell changes it. The preview is an ipywidgets.HTML
+when ipywidgets is installed and an updatable IPython display otherwise. With mirror, the section is also written to
+that file whenever its content changed and Olex2 is told to update.
+
+Without a running event loop (outside IPython kernels), nothing runs in the background: the preview is rendered when
+it is displayed and by refresh. Changes made directly to the inner tags of a component are not seen, as for the render
+cache, call invalidate after them (or refresh the preview).
+"""
+import asyncio
+import html as html_module
+import time
+from typing import Optional
+
+from .build import content_digest, write_atomic
+from .utils import update_html
+
+
+class LivePreview:
+    def __init__(self, section, delay: float = 0.3, interval: float = 0.1, mirror: Optional[str] = None,
+                 olex_target: str = update_html.target, start: bool = True):
+        self.section = section
+        self.delay = delay
+        self.interval = interval
+        self.mirror = mirror
+        self.olex_target = olex_target
+        self.html: Optional[str] = None
+        """The last rendered preview, None until the first render."""
+        self.error: Optional[Exception] = None
+        self.renders = 0
+        self._rendered_state = None
+        self._mirror_digest = None
+        self._task: Optional[asyncio.Task] = None
+        self._widget = None
+        self._handle = None
+        if start:
+            self.start()
+
+    def _lines(self) -> list:
+        return getattr(self.section, "lines", [self.section])
+
+    def _state(self) -> tuple:
+        """Identifies the lines and how many times each of them changed."""
+        lines = self._lines()
+        return tuple(map(id, lines)), tuple(getattr(line, "version", 0) for line in lines)
+
+    def render(self) -> str:
+        """
+        Renders the preview now, publishes it and mirrors it to disk if the content changed. When rendering fails, the
+        error is shown and the section is rendered again at the next poll.
+        """
+        try:
+            content = self.section._repr_html_()
+            self.error = None
+            if self.mirror is not None:
+                mirrored = str(self.section)
+                digest = content_digest(mirrored)
+                if digest != self._mirror_digest:
+                    write_atomic(self.mirror, mirrored)
+                    update_html.update(self.olex_target)
+                    self._mirror_digest = digest
+            # Taken after rendering: laying out a row changes its width and counts as a change. Nothing else runs
+            # while rendering, the section can't have been edited in between.
+            self._rendered_state = self._state()
+        except Exception as e:
+            self.error = e
+            content = f"<pre>{html_module.escape(f'{type(e).__name__}: {e}')}</pre>"
+        self.html = content
+        self.renders += 1
+        self._publish(content)
+        return content
+
+    refresh = render
+
+    def _publish(self, content: str) -> None:
+        if self._widget is not None:
+            self._widget.value = content
+        elif self._handle is not None:
+            from IPython.display import HTML
+            self._handle.update(HTML(content))
+
+    async def _run(self) -> None:
+        if self.html is None:
+            self.render()
+        pending, since = None, 0.0
+        while True:
+            await asyncio.sleep(self.interval)
+            state = self._state()
+            if state == self._rendered_state:
+                pending = None
+            elif state != pending:
+                pending, since = state, time.monotonic()
+            elif time.monotonic() - since >= self.delay:
+                self.render()
+                pending = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """
+        Starts rendering on the running event loop, the first render happens at once. Does nothing without a running
+        event loop.
+        """
+        if self.running:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        self._task = loop.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def __enter__(self) -> "LivePreview":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    def _placeholder(self) -> str:
+        return self.html if self.html is not None else f"<i>Rendering {len(self._lines())} lines...</i>"
+
+    def _ipython_display_(self) -> None:
+        from IPython.display import HTML, display
+        try:
+            import ipywidgets
+        except ImportError:
+            self._handle = display(HTML(self._placeholder()), display_id=True)
+        else:
+            self._widget = ipywidgets.HTML(self._placeholder())
+            display(self._widget)
+        if self.html is None and not self.running:
+            self.render()
+
+    def _repr_html_(self) -> str:
+        return self.html if self.html is not None else self.render()
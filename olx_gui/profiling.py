@@ -0,0 +1,239 @@
+"""
+Opt-in instrumentation of the build pipeline.
+
+    with profile() as profiler:
+        build_my_sections()
+    profiler.print_table()
+    profiler.to_json("profile.json")
+
+While a profiler is active, the construction of every component, Row and H3Section, the validation, the width layout,
+the rendering and the writing of the files are timed and counted per class, along with the number of memory blocks they
+left allocated. Nothing is instrumented otherwise: the methods are only wrapped while profiling, so disabled profiling
+costs nothing. The times are inclusive, rendering a Row includes rendering its components.
+
+Setting OLX_GUI_PROFILE profiles the whole process: to 1 the table is printed to stderr at exit, to a path ending in
+.json the results are written there (worker processes add their pid to the name).
+"""
+import functools
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+ENV_VAR = "OLX_GUI_PROFILE"
+
+
+@dataclass
+class Stat:
+    count: int = 0
+    time: float = 0.0
+    blocks: int = 0
+    """Net number of memory blocks allocated, see sys.getallocatedblocks."""
+
+
+class Profiler:
+    """
+    Counters and timings keyed by (stage, name). With per_row, the rows are also reported one by one by their NAME.
+    """
+    def __init__(self, per_row: bool = False):
+        self.per_row = per_row
+        self.stats: Dict[Tuple[str, str], Stat] = {}
+
+    def record(self, stage: str, name: str, elapsed: float, blocks: int) -> None:
+        stat = self.stats.get((stage, name))
+        if stat is None:
+            stat = self.stats[(stage, name)] = Stat()
+        stat.count += 1
+        stat.time += elapsed
+        stat.blocks += blocks
+
+    def rows(self) -> List[dict]:
+        """The results sorted by total time."""
+        return [{"stage": stage, "name": name, **asdict(stat)}
+                for (stage, name), stat in sorted(self.stats.items(), key=lambda item: -item[1].time)]
+
+    def to_json(self, path: Optional[str] = None) -> str:
+        content = json.dumps({"pid": os.getpid(), "stats": self.rows()}, indent=1)
+        if path is not None:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(content)
+        return content
+
+    def print_table(self, console=None) -> None:
+        from rich.console import Console
+        from rich.table import Table
+        table = Table(title="olx_gui profile")
+        for column in ("stage", "name"):
+            table.add_column(column)
+        for column in ("count", "total [ms]", "mean [us]", "blocks"):
+            table.add_column(column, justify="right")
+        for row in self.rows():
+            table.add_row(row["stage"], row["name"], str(row["count"]), f"{row['time'] * 1e3:.2f}",
+                          f"{row['time'] / row['count'] * 1e6:.1f}", str(row["blocks"]))
+        (console or Console(stderr=True)).print(table)
+
+
+_ACTIVE: Optional[Profiler] = None
+_DEPTH: Dict[Tuple[int, str], int] = {}
+
+
+def _instrument(stage: str, func: Callable, name: Optional[Callable] = None) -> Callable:
+    """
+    Wraps func, a method, to record its calls. Calls made through super() by subclasses that are instrumented
+    themselves are only recorded once, under the subclass.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        profiler = _ACTIVE
+        if profiler is None:
+            return func(self, *args, **kwargs)
+        key = (id(self), func.__name__)
+        depth = _DEPTH.get(key, 0)
+        _DEPTH[key] = depth + 1
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            if depth:
+                _DEPTH[key] = depth
+            else:
+                del _DEPTH[key]
+                label = type(self).__name__ if name is None else name(self)
+                profiler.record(stage, label, elapsed, sys.getallocatedblocks() - blocks)
+    wrapper.__profiled__ = func
+    return wrapper
+
+
+def _instrument_function(stage: str, label: str, func: Callable) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        profiler = _ACTIVE
+        if profiler is None:
+            return func(*args, **kwargs)
+        blocks = sys.getallocatedblocks()
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler.record(stage, label, time.perf_counter() - start, sys.getallocatedblocks() - blocks)
+    wrapper.__profiled__ = func
+    return wrapper
+
+
+def _row_name(profiler: Profiler) -> Callable:
+    def name(row) -> str:
+        if profiler.per_row:
+            return f"Row({row.attributes.get('NAME')})"
+        return type(row).__name__
+    return name
+
+
+def _targets(profiler: Profiler) -> List[tuple]:
+    """(stage, owner, attribute, name) of every instrumented method."""
+    from .components import item_component, templates
+    from .components.table import H3Section, Row
+    row_name = _row_name(profiler)
+    components = [item_component.LabeledGeneralComponent, item_component.Cycle]
+    for cls in list(components):
+        components.extend(cls.__subclasses__())
+    targets = [("construct", cls, "__init__", None) for cls in dict.fromkeys(components)]
+    targets += [
+        ("construct", Row, "__init__", None),
+        ("construct", H3Section, "__init__", None),
+        ("validate", Row, "validate", row_name),
+        ("validate", H3Section, "validate", None),
+        ("layout", Row, "finalize", row_name),
+        ("render", Row, "_render", row_name),
+        ("render", templates.TemplateRender, "_render", None),
+        ("render", item_component.Cycle, "_render", None),
+        ("render", H3Section, "__str__", None),
+        ("render", H3Section, "write_to", None),
+    ]
+    return targets
+
+
+def _install(profiler: Profiler) -> List[tuple]:
+    """Wraps the instrumented methods and returns what is needed to restore them."""
+    restore = []
+    for stage, owner, attribute, name in _targets(profiler):
+        func = owner.__dict__.get(attribute)
+        if func is None or hasattr(func, "__profiled__"):
+            continue
+        setattr(owner, attribute, _instrument(stage, func, name))
+        restore.append((owner, attribute, func))
+    from . import build, watch
+    for module in (build, watch):
+        if not hasattr(module.write_atomic, "__profiled__"):
+            restore.append((module, "write_atomic", module.write_atomic))
+            module.write_atomic = _instrument_function("io", "write_atomic", module.write_atomic)
+    return restore
+
+
+def start(per_row: bool = False) -> Profiler:
+    """Starts profiling until stop is called. Only one profiler can be active at a time."""
+    global _ACTIVE, _RESTORE
+    if _ACTIVE is not None:
+        raise RuntimeError("A profiler is already active.")
+    _ACTIVE = Profiler(per_row)
+    _RESTORE = _install(_ACTIVE)
+    return _ACTIVE
+
+
+def stop() -> Optional[Profiler]:
+    global _ACTIVE, _RESTORE
+    profiler = _ACTIVE
+    for owner, attribute, func in reversed(_RESTORE):
+        setattr(owner, attribute, func)
+    _ACTIVE = None
+    _RESTORE = []
+    _DEPTH.clear()
+    return profiler
+
+
+_RESTORE: List[tuple] = []
+
+
+@contextmanager
+def profile(per_row: bool = False) -> Iterator[Profiler]:
+    profiler = start(per_row)
+    try:
+        yield profiler
+    finally:
+        stop()
+
+
+def enable_from_environment() -> None:
+    """Profiles the whole process when OLX_GUI_PROFILE is set, see the module documentation."""
+    value = os.environ.get(ENV_VAR, "")
+    if not value or value == "0" or _ACTIVE is not None:
+        return
+    import atexit
+    import multiprocessing
+    from multiprocessing import util
+    profiler = start()
+
+    def report():
+        if _ACTIVE is not profiler:
+            return
+        stop()
+        if value.endswith(".json"):
+            path = value
+            if multiprocessing.parent_process() is not None:
+                root, extension = os.path.splitext(value)
+                path = f"{root}.{os.getpid()}{extension}"
+            profiler.to_json(path)
+        elif profiler.stats:
+            profiler.print_table()
+
+    def forked(profiler):
+        # Worker processes don't run the atexit handlers but run the finalizers of multiprocessing registered in them.
+        profiler.stats.clear()
+        util.Finalize(None, report, exitpriority=0)
+
+    atexit.register(report)
+    util.register_after_fork(profiler, forked)
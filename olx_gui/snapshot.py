@@ -0,0 +1,270 @@
+"""
+Snapshots of built sections, saved without pickle and loaded in a single read.
+
+    dump(section, "gui/options.olxsnap")
+    snapshot = load("gui/options.olxsnap")  # no user code runs
+    str(snapshot) == str(section)
+    diff(load("old.olxsnap"), snapshot)
+
+A snapshot keeps every line of the section compiled to a Program (see olx_gui.components.ir), for the output and for
+the Jupyter preview, along with a description of the rows: their NAME, RowConfig and components (type, attributes,
+input, label, and the condition and both alternatives of the Cycles), and the digests used by olx_gui.diff.
+
+The file is the magic bytes, the lengths of two JSON blocks, the blocks and the opcodes and arguments of every program.
+The first block holds what rendering and diffing need: the keys and digests of the lines, where their programs are and
+a single table of the strings of all the programs, which the loaded programs share. The second holds the descriptions
+and is only parsed when they are first used. The opcodes and arguments are copied straight from the file (which can be
+memory-mapped), so loading costs little more than parsing the first block. Lines with tags the compiler keeps as
+dominate nodes are stored as their HTML for the default indentation.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import Dict, IO, Iterator, List, Optional, Union
+
+from dominate.dom_tag import dom_tag
+from dominate.tags import comment
+
+from .components import ir
+from .components.item_component import Cycle
+from .components.render_context import render_context
+from .components.table import H3Section, Row
+from .diff import Digests, row_keys
+
+MAGIC = b"OLXSNAP1"
+_HEADER = struct.Struct("<8sII")
+_STRING_OPS = frozenset({ir.TEXT, ir.OPEN, ir.OPEN_PLAIN, ir.SINGLE, ir.CLOSE, ir.CLOSE_BREAK})
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _text(node) -> str:
+    if not isinstance(node, dom_tag):
+        return str(node)
+    if hasattr(node, "text"):
+        return node.text
+    return "".join(_text(child) for child in node.children)
+
+
+def _attributes(tag: dom_tag) -> Dict[str, str]:
+    return {key: _text(value) for key, value in tag.attributes.items() if value not in (None, False)}
+
+
+def describe(tag) -> dict:
+    """The type, attributes, input, label and alternatives of a component as stored in the snapshots."""
+    if not isinstance(tag, dom_tag):
+        return {"type": "str", "text": str(tag)}
+    description = {"type": type(tag).__name__, "attributes": _attributes(tag)}
+    if isinstance(tag, Cycle):
+        description["condition"] = _text(tag.children[0].attributes.get("test", ""))
+        description["children"] = [describe(branch.children[0]) for branch in tag.children]
+        return description
+    source = getattr(tag, "input", None)
+    while isinstance(source, dom_tag) and "name" not in source.attributes and source.children:
+        source = source.children[0]
+    if isinstance(source, dom_tag):
+        description["input"] = _attributes(source)
+    label = getattr(tag, "label", None)
+    if label is not None:
+        description["label"] = _text(label)
+    return description
+
+
+def _describe_line(line) -> dict:
+    if isinstance(line, Row):
+        config = line.config.to_dict()
+        config["children_width"] = line.config.children_width
+        return {"kind": "row", "name": _text(line.attributes.get("NAME", "")), "config": config,
+                "components": [describe(component) for component in line.last_component.children]}
+    return {"kind": "comment" if isinstance(line, comment) else type(line).__name__}
+
+
+def _static_program(html: str) -> ir.Program:
+    program = ir.Program()
+    program.strings.append(html)
+    program.ops.append(ir.TEXT)
+    program.args.append(0)
+    return program
+
+
+class _Writer:
+    def __init__(self):
+        self.strings: List[str] = []
+        self._indexes: Dict[str, int] = {}
+        self.blob = bytearray()
+
+    def add(self, program: ir.Program) -> list:
+        """Appends the program to the blob and returns [offset, length] to find it again."""
+        strings = program.strings
+        indexes = self._indexes
+        mapping = []
+        for string in strings:
+            index = indexes.get(string)
+            if index is None:
+                index = indexes[string] = len(self.strings)
+                self.strings.append(string)
+            mapping.append(index)
+        args = array("I", (mapping[arg] if op in _STRING_OPS else 0 for op, arg in zip(program.ops, program.args)))
+        if sys.byteorder == "big":
+            args.byteswap()
+        offset = len(self.blob)
+        self.blob += program.ops.tobytes()
+        self.blob += args.tobytes()
+        return [offset, len(program.ops)]
+
+
+def dumps(section: H3Section, preview: bool = True) -> bytes:
+    """
+    The snapshot of a section as bytes, see the module documentation. Raises ValidationError if any Olex2 expression of
+    the section is invalid. Without preview, the Jupyter preview of the loaded snapshot shows the output.
+    """
+    compiled = section.compile().programs
+    previews = None
+    if preview:
+        with render_context(preview_width=section.preview_width, unwrap_cycles=True):
+            previews = section.compile(validate=False).programs
+    digests = Digests.take(section)
+    writer = _Writer()
+    lines = []
+    for k, (key, line) in enumerate(zip(row_keys(section), section.lines)):
+        entry = {"key": key, "digest": digests.rows[key]}
+        if key in digests.components:
+            entry["components"] = digests.components[key]
+        program = compiled[k]
+        if program.nodes:
+            program = _static_program("".join(line._render([], 0, "  ", True, False)))
+        entry["program"] = writer.add(program)
+        if previews is not None:
+            program = previews[k]
+            if program.nodes:
+                with render_context(preview_width=section.preview_width, unwrap_cycles=True):
+                    program = _static_program("".join(line._render([], 0, "  ", True, False)))
+            entry["preview"] = writer.add(program)
+        lines.append(entry)
+    header = _json({"preview_width": section.preview_width, "strings": writer.strings, "lines": lines})
+    descriptions = _json([_describe_line(line) for line in section.lines])
+    return _HEADER.pack(MAGIC, len(header), len(descriptions)) + header + descriptions + bytes(writer.blob)
+
+
+def _json(value) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def dump(section: H3Section, file: Union[str, IO[bytes]], preview: bool = True) -> None:
+    """Writes the snapshot of a section to a path (atomically) or a binary file object."""
+    content = dumps(section, preview)
+    if isinstance(file, str):
+        from .build import write_atomic
+        write_atomic(file, content)
+    else:
+        file.write(content)
+
+
+@dataclass
+class SnapshotLine:
+    """A line of a loaded snapshot: its key, its digests and its programs."""
+    key: str
+    digest: str
+    program: ir.Program
+    preview: Optional[ir.Program] = None
+    component_digests: Optional[Dict[str, str]] = None
+
+
+class SectionSnapshot:
+    """A loaded snapshot, rendered like the section it was taken from."""
+    def __init__(self, lines: List[SnapshotLine], preview_width: Optional[str], descriptions: bytes = b"[]"):
+        self.lines = lines
+        self.preview_width = preview_width
+        self._descriptions = descriptions
+
+    @property
+    def descriptions(self) -> List[dict]:
+        """
+        The description of every line: {"kind": "row", "name": ..., "config": ..., "components": [...]} for the rows
+        (see describe for the components) and {"kind": ...} for the other lines.
+        """
+        if isinstance(self._descriptions, bytes):
+            self._descriptions = json.loads(self._descriptions)
+        return self._descriptions
+
+    @property
+    def digests(self) -> Digests:
+        """The digests of the rows and components, as olx_gui.diff.diff compares them."""
+        return Digests(tuple(line.key for line in self.lines), {line.key: line.digest for line in self.lines},
+                        {line.key: line.component_digests for line in self.lines
+                         if line.component_digests is not None})
+
+    def iter_render(self, indent: str = "  ", pretty: bool = True, xhtml: bool = False) -> Iterator[str]:
+        for line in self.lines:
+            sb = ["\n"]
+            line.program.render_into(sb, 0, indent, pretty, xhtml)
+            yield "".join(sb)
+
+    def write_to(self, fileobj: IO[str], **kwargs) -> int:
+        """
+        Writes the rendered section to an opened text file object and returns the size of what was written in bytes,
+        encoded in UTF-8.
+        """
+        written = 0
+        for chunk in self.iter_render(**kwargs):
+            fileobj.write(chunk)
+            written += len(chunk.encode("utf-8"))
+        return written
+
+    def __str__(self):
+        return "".join(self.iter_render())
+
+    def _repr_html_(self):
+        return "".join("\n" + (line.preview or line.program).render() for line in self.lines)
+
+
+def _program(data, strings: List[str], offset: int, length: int) -> ir.Program:
+    program = ir.Program()
+    program.strings = strings
+    start = offset + length
+    end = start + length * program.args.itemsize
+    if len(data) < end:
+        raise SnapshotError("The snapshot file is truncated.")
+    program.ops.frombytes(data[offset:start])
+    program.args.frombytes(data[start:end])
+    if sys.byteorder == "big":
+        program.args.byteswap()
+    return program
+
+
+def loads(data: Union[bytes, memoryview, mmap.mmap]) -> SectionSnapshot:
+    """Loads a snapshot from the content of a snapshot file."""
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Not an olx_gui snapshot: the file is too short.")
+    magic, length, descriptions_length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not an olx_gui snapshot, or one written by an incompatible version.")
+    start = _HEADER.size + length
+    if len(data) < start + descriptions_length:
+        raise SnapshotError("The snapshot file is truncated.")
+    with memoryview(data) as view:
+        header = json.loads(bytes(view[_HEADER.size:start]))
+        descriptions = bytes(view[start:start + descriptions_length])
+        strings = header["strings"]
+        lines = []
+        with view[start + descriptions_length:] as blob:
+            for entry in header["lines"]:
+                preview = entry.get("preview")
+                lines.append(SnapshotLine(
+                    entry["key"], entry["digest"], _program(blob, strings, *entry["program"]),
+                    None if preview is None else _program(blob, strings, *preview), entry.get("components")))
+    return SectionSnapshot(lines, header.get("preview_width"), descriptions)
+
+
+def load(path: str, use_mmap: bool = False) -> SectionSnapshot:
+    """Loads a snapshot file in a single read, or through a memory map if use_mmap."""
+    with open(path, "rb") as f:
+        if not use_mmap:
+            return loads(f.read())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return loads(data)
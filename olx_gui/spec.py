@@ -0,0 +1,240 @@
+"""
+Declarative sections.
+
+A section is described by a mapping, read from a JSON, YAML or TOML file, and compiled to an H3Section:
+
+    preview_width: 50%
+    rows:
+      - name: SNUM_REFINEMENT_OPTIONS
+        config: {td1_parameters: {width: "90%"}}       # RowConfig.override
+        components:
+          - {type: InputText, name: SNUM_NAME, label: Name, weight: 2}
+          - {type: ComboBox, name: SNUM_MODE, label: Mode, items: "a;b;c", tdwidth: "30%"}
+          - {type: Ignore, condition: "spy.GetParam(x)", component: {type: InputCheckbox, name: SNUM_FLAG}}
+          - type: Cycle
+            condition: "strcmp(GetVar(mode), 'a')"
+            components:
+              - {type: InputText, name: SNUM_A}
+              - {type: InputText, name: SNUM_B}
+
+The keys of a component are its type, the keyword arguments of the component (label is txt_label), weight and
+min_width (see LabeledGeneralComponent.sized) and the attributes of its input, or of the cell for Fill. Unknown keys
+raise a SpecError naming the row and the component, see COMPONENT_KEYS. SpecCache keeps the compiled sections and their
+HTML keyed by the digest of the spec, so regenerating panels from unchanged specs costs a hash.
+"""
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Any, Callable, Dict, FrozenSet, Mapping, Optional
+
+from .build import SPEC_EXTENSIONS, package_digest, write_atomic
+from .components import item_component
+from .components.item_component import Cycle, Ignore
+from .components.table import DEFAULT_ROW_CONFIG, H3Section, Row
+
+COMPONENTS: Dict[str, Callable] = {
+    name: getattr(item_component, name)
+    for name in ("InputCheckbox", "ComboBox", "Button", "InputText", "InputSpinner", "InputLinkButton", "Fill")
+}
+"""Component types available to the specs. Register new components here and their keys in COMPONENT_KEYS."""
+
+INPUT_ATTRIBUTES = frozenset({
+    "value", "width", "height", "bgcolor", "fgcolor", "valign", "align", "items", "checked", "readonly", "disabled",
+    "manage", "password", "multiline", "fit", "flat", "custom", "min", "max", "setdefault", "hint", "src", "image",
+    "id", "onclick", "onchange", "onchangealways", "onleave", "onenter", "onreturn", "oncheck", "onuncheck",
+})
+"""Attributes of the Olex2 inputs a spec can set, besides the keyword arguments of the components."""
+CELL_ATTRIBUTES = frozenset({"width", "height", "align", "valign", "bgcolor", "colspan", "rowspan", "nowrap", "id"})
+
+_LAYOUT_KEYS = ("weight", "min_width")
+_LABELED_KEYS = frozenset({"name", "label", "label_left", "label_top", "tdwidth", *_LAYOUT_KEYS}) | INPUT_ATTRIBUTES
+COMPONENT_KEYS: Dict[str, FrozenSet[str]] = {
+    "InputCheckbox": _LABELED_KEYS | {"label_width"},
+    "ComboBox": _LABELED_KEYS,
+    "Button": frozenset({"name", "tdwidth", *_LAYOUT_KEYS}) | INPUT_ATTRIBUTES,
+    "InputText": _LABELED_KEYS,
+    "InputSpinner": _LABELED_KEYS,
+    "InputLinkButton": _LABELED_KEYS,
+    "Fill": CELL_ATTRIBUTES,
+}
+"""The keys every component type accepts besides type. The keys of the types missing here are not checked."""
+_ROW_KEYS = frozenset({"name", "config", "help_ext", "components"})
+_SECTION_KEYS = frozenset({"preview_width", "rows"})
+
+
+class SpecError(ValueError):
+    def __init__(self, where: str, message: str):
+        self.where = where
+        super().__init__(f"{where}: {message}")
+
+
+def is_spec_file(path: str) -> bool:
+    return path.lower().endswith(SPEC_EXTENSIONS)
+
+
+def load_spec(path: str) -> Mapping:
+    """Reads a spec from a .json, .yaml, .yml or .toml file."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("PyYAML is needed to read YAML specs: pip install pyyaml") from None
+        with open(path, encoding="utf-8") as f:
+            return yaml.safe_load(f)
+    if extension == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("tomli is needed to read TOML specs before Python 3.11: pip install tomli") from None
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    raise SpecError(path, f"unknown spec format, expected one of {', '.join(SPEC_EXTENSIONS)}")
+
+
+def _check_keys(spec: Mapping, accepted: FrozenSet[str], where: str, kind: str) -> None:
+    unknown = [key for key in spec if key not in accepted]
+    if unknown:
+        raise SpecError(where, f"unknown keys for {kind}: {', '.join(map(str, unknown))}")
+
+
+def spec_digest(spec: Mapping) -> str:
+    """Digest of the content of a spec, independent of the order of its keys."""
+    return hashlib.sha256(json.dumps(spec, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def compile_component(spec: Mapping, where: str = "component"):
+    if not isinstance(spec, Mapping) or "type" not in spec:
+        raise SpecError(where, "a component needs a type")
+    spec = dict(spec)
+    kind = spec.pop("type")
+    if kind in ("Cycle", "Ignore"):
+        condition = spec.pop("condition", None)
+        if condition is None:
+            raise SpecError(where, f"{kind} needs a condition")
+        if kind == "Cycle":
+            components = spec.pop("components", None)
+            if not isinstance(components, list) or len(components) != 2:
+                raise SpecError(where, "Cycle needs two components")
+            a, b = (compile_component(c, f"{where}.components[{k}]") for k, c in enumerate(components))
+            component = Cycle(a, b, condition)
+        else:
+            component = Ignore(compile_component(spec.pop("component", None), f"{where}.component"), condition)
+        if spec:
+            raise SpecError(where, f"unknown keys for {kind}: {', '.join(spec)}")
+        return component
+
+    cls = COMPONENTS.get(kind)
+    if cls is None:
+        raise SpecError(where, f"unknown component type {kind!r}")
+    if kind in COMPONENT_KEYS:
+        _check_keys(spec, COMPONENT_KEYS[kind], where, kind)
+    layout = {key: spec.pop(key) for key in _LAYOUT_KEYS if key in spec}
+    if layout and not hasattr(cls, "sized"):
+        raise SpecError(where, f"{kind} has no weight nor min_width")
+    if "label" in spec:
+        spec["txt_label"] = spec.pop("label")
+    try:
+        component = cls(**spec)
+    except TypeError as e:
+        raise SpecError(where, str(e)) from None
+    if layout:
+        component.sized(**layout)
+    return component
+
+
+def compile_row(spec: Mapping, where: str = "row") -> Row:
+    if not isinstance(spec, Mapping) or "name" not in spec:
+        raise SpecError(where, "a row needs a name")
+    _check_keys(spec, _ROW_KEYS, where, "a row")
+    kwargs = {"help_ext": spec["help_ext"]} if "help_ext" in spec else {}
+    if spec.get("config"):
+        try:
+            kwargs["config"] = DEFAULT_ROW_CONFIG.override(**spec["config"])
+        except (TypeError, AttributeError) as e:
+            raise SpecError(f"{where}.config", str(e)) from None
+    row = Row(spec["name"], **kwargs)
+    row.add(*(compile_component(c, f"{where}.components[{k}]") for k, c in enumerate(spec.get("components", []))))
+    return row
+
+
+def compile_spec(spec: Mapping, where: str = "section") -> H3Section:
+    """Builds a new H3Section from a spec."""
+    if not isinstance(spec, Mapping):
+        raise SpecError(where, "a section spec is a mapping with rows")
+    _check_keys(spec, _SECTION_KEYS, where, "a section")
+    section = H3Section()
+    if "preview_width" in spec:
+        section.preview_width = spec["preview_width"]
+    for k, row in enumerate(spec.get("rows", [])):
+        section.add(compile_row(row, f"{where}.rows[{k}]"))
+    return section
+
+
+class SpecCache:
+    """
+    Compiled sections and their HTML keyed by the digest of their spec. The sections are shared by every caller
+    of section, so they must not be changed. With a directory, the HTML is also kept on disk between runs.
+    """
+    def __init__(self, directory: Optional[str] = None, max_sections: int = 256):
+        self.directory = directory
+        self.max_sections = max_sections
+        self._sections: "OrderedDict[str, H3Section]" = OrderedDict()
+        self._html: Dict[str, str] = {}
+
+    def section(self, spec: Mapping, digest: Optional[str] = None) -> H3Section:
+        digest = digest or spec_digest(spec)
+        section = self._sections.get(digest)
+        if section is None:
+            section = self._sections[digest] = compile_spec(spec)
+            if len(self._sections) > self.max_sections:
+                self._sections.popitem(last=False)
+        else:
+            self._sections.move_to_end(digest)
+        return section
+
+    def _path(self, digest: str) -> Optional[str]:
+        # The HTML on disk also depends on the version of olx_gui that rendered it.
+        if self.directory is None:
+            return None
+        return os.path.join(self.directory, f"{hashlib.sha256((digest + package_digest()).encode()).hexdigest()}.htm")
+
+    def html(self, spec: Mapping) -> str:
+        """The HTML of the section of spec."""
+        digest = spec_digest(spec)
+        html = self._html.get(digest)
+        if html is not None:
+            return html
+        path = self._path(digest)
+        if path is not None and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                html = f.read()
+        else:
+            html = str(self.section(spec, digest))
+            if path is not None:
+                write_atomic(path, html)
+        if len(self._html) >= self.max_sections:
+            self._html.clear()
+        self._html[digest] = html
+        return html
+
+    def clear(self) -> None:
+        self._sections.clear()
+        self._html.clear()
+
+
+DEFAULT_CACHE = SpecCache()
+
+
+def render_spec(spec: Any) -> str:
+    """The HTML of a spec, or of the spec file at the given path, using the default cache."""
+    if isinstance(spec, str):
+        spec = load_spec(spec)
+    return DEFAULT_CACHE.html(spec)
@@ -0,0 +1,79 @@
+"""
+Terminal syntax highlighting of the generated HTML. pygments is only imported the first time it is needed, so scripts
+that just build and write sections don't pay for it.
+
+The highlighted HTML is cached by the digest of its content, so highlighting a section again only highlights the rows
+that changed when it is highlighted one row at a time (highlight_chunks). stream and page print the chunks as they are
+highlighted, so a long preview starts showing at once.
+"""
+import hashlib
+import sys
+from collections import OrderedDict
+from functools import lru_cache
+from typing import IO, Iterable, Iterator, Optional
+
+MAX_CACHED = 4096
+"""Number of highlighted chunks kept, the least recently used are dropped first."""
+
+_CACHE: "OrderedDict[bytes, str]" = OrderedDict()
+
+
+@lru_cache(maxsize=None)
+def lexer():
+    from pygments.lexers import HtmlLexer
+    return HtmlLexer()
+
+
+@lru_cache(maxsize=None)
+def chunk_lexer():
+    """A lexer keeping the newlines around the chunks, so the highlighted chunks join like the HTML."""
+    from pygments.lexers import HtmlLexer
+    return HtmlLexer(stripnl=False, ensurenl=False)
+
+
+@lru_cache(maxsize=None)
+def formatter():
+    from pygments.formatters import TerminalFormatter
+    return TerminalFormatter()
+
+
+def _highlight(html: str, chunk: bool) -> str:
+    key = hashlib.blake2b(html.encode("utf-8"), digest_size=16, person=b"chunk" if chunk else b"").digest()
+    highlighted = _CACHE.get(key)
+    if highlighted is None:
+        from pygments import highlight
+        highlighted = _CACHE[key] = highlight(html, chunk_lexer() if chunk else lexer(), formatter())
+        if len(_CACHE) > MAX_CACHED:
+            _CACHE.popitem(last=False)
+    else:
+        _CACHE.move_to_end(key)
+    return highlighted
+
+
+def highlight_html(html: str) -> str:
+    return _highlight(html, False)
+
+
+def highlight_chunks(chunks: Iterable[str]) -> Iterator[str]:
+    """Highlights the chunks of a document (e.g. the lines of H3Section.iter_render) one at a time."""
+    for chunk in chunks:
+        yield _highlight(chunk, True)
+
+
+def stream(chunks: Iterable[str], highlight: bool = True, file: Optional[IO[str]] = None) -> None:
+    """Prints the chunks as soon as each one is highlighted."""
+    file = sys.stdout if file is None else file
+    for chunk in highlight_chunks(chunks) if highlight else chunks:
+        file.write(chunk)
+        file.flush()
+    file.write("\n")
+
+
+def page(chunks: Iterable[str], highlight: bool = True, console=None) -> None:
+    """Shows the chunks in the pager of the terminal, through rich."""
+    from rich.console import Console
+    from rich.text import Text
+    console = Console() if console is None else console
+    with console.pager(styles=highlight):
+        for chunk in highlight_chunks(chunks) if highlight else chunks:
+            console.print(Text.from_ansi(chunk) if highlight else Text(chunk), end="")
@@ -0,0 +1,185 @@
+"""
+Batched command channel to Olex2.
+
+Olex2 reads its commands from a file (/tmp/olexcmd by default), one command per line. Commands are queued, duplicates
+are coalesced and the whole batch is merged with the commands Olex2 didn't read yet and written with a single rename,
+so Olex2 never reads half a file. The merge holds a lock on <target>.lock, so concurrent builders don't clobber each
+other's commands. The file is written even when every command is already pending, so its modification time tells Olex2
+to look at it again.
+
+The merge assumes Olex2 deletes the file once it has read it (consume does the same): every command still in the file
+is taken as not read yet and is written again. Where the file is only read and left in place, the commands would be
+replayed with every later batch, so use merge=False there, which replaces the file with the new batch alone.
+
+    with CommandChannel() as channel:
+        channel.send("html.Update")
+        channel.send("html.Update")  # Coalesced, written once when leaving the with block.
+"""
+# update_html imports this module on every update, so it only imports what the writes need: asyncio is imported by the
+# async methods, and tempfile, contextlib and typing (for the annotations) not at all.
+from __future__ import annotations
+
+import itertools
+import os
+import stat
+
+TYPE_CHECKING = False
+if TYPE_CHECKING:
+    import asyncio
+    from typing import Iterable, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows, the merge is still atomic but concurrent writers may drop each other's commands.
+    fcntl = None
+
+DEFAULT_TARGET = "/tmp/olexcmd"
+UPDATE = "html.Update"
+_TEMPORARY = itertools.count()
+
+
+def coalesce(commands: Iterable[str]) -> List[str]:
+    """The commands without duplicates, in the order of their first occurrence."""
+    return list(dict.fromkeys(command.strip() for command in commands if command.strip()))
+
+
+class _TargetLock:
+    def __init__(self, target: str):
+        self.path = f"{target}.lock"
+        self.file = None
+
+    def __enter__(self) -> None:
+        if fcntl is not None:
+            self.file = open(self.path, "a")
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.file is not None:
+            try:
+                fcntl.flock(self.file, fcntl.LOCK_UN)
+            finally:
+                self.file.close()
+                self.file = None
+
+
+def locked(target: str) -> _TargetLock:
+    """Holds the lock of target, shared by every process using this module, in a with block."""
+    return _TargetLock(target)
+
+
+_UMASK: Optional[int] = None
+
+
+def file_mode(path: str) -> int:
+    """The mode of the file at path, or the mode open gives a new file (0o666 without the umask) if it doesn't exist."""
+    global _UMASK
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        pass
+    if _UMASK is None:
+        # The umask can only be read by setting it, which is done once.
+        _UMASK = os.umask(0o022)
+        os.umask(_UMASK)
+    return 0o666 & ~_UMASK
+
+
+def _read_commands(path: str) -> List[str]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read().splitlines()
+    except FileNotFoundError:
+        return []
+
+
+def write_commands(target: str, commands: Iterable[str], merge: bool = True) -> List[str]:
+    """
+    Adds commands to the ones pending in target and writes them atomically, even if they were all pending. Returns the
+    commands that were not already pending. With merge=False, the file only holds commands and they are all new.
+    """
+    commands = coalesce(commands)
+    if not commands:
+        return []
+    directory = os.path.dirname(os.path.abspath(target))
+    with locked(target):
+        pending = coalesce(_read_commands(target)) if merge else []
+        new = [command for command in commands if command not in pending]
+        tmp_path = os.path.join(directory, f".olexcmd.{os.getpid()}.{next(_TEMPORARY)}.tmp")
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write("\n".join(pending + new))
+            os.chmod(tmp_path, file_mode(target))
+            os.replace(tmp_path, target)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return new
+
+
+def consume(target: str = DEFAULT_TARGET) -> List[str]:
+    """
+    Reads and removes the pending commands, as Olex2 does. This is a stand-in for Olex2 to check what a build sent.
+    """
+    with locked(target):
+        commands = _read_commands(target)
+        try:
+            os.unlink(target)
+        except FileNotFoundError:
+            pass
+    return commands
+
+
+class CommandChannel:
+    """
+    Queue of commands for Olex2. Commands are sent with send and written in one batch by flush, which the with block
+    calls on exit. The async API gathers the commands sent by concurrent coroutines into a single write.
+    """
+    def __init__(self, target: str = DEFAULT_TARGET, merge: bool = True):
+        self.target = target
+        self.merge = merge
+        """False replaces the pending commands on every flush, see the module documentation."""
+        self.queue: List[str] = []
+        self._flushing: Optional[asyncio.Future] = None
+
+    def send(self, *commands: str) -> None:
+        self.queue.extend(commands)
+
+    def update(self) -> None:
+        """Queues html.Update."""
+        self.send(UPDATE)
+
+    def flush(self) -> List[str]:
+        """Writes the queued commands and returns the ones that were not already pending."""
+        commands, self.queue = self.queue, []
+        return write_commands(self.target, commands, self.merge)
+
+    async def flush_async(self) -> List[str]:
+        """Writes the queued commands in a worker thread, joining the write already scheduled if there is one."""
+        import asyncio
+        if self._flushing is None:
+            self._flushing = asyncio.ensure_future(self._flush_later())
+        return await asyncio.shield(self._flushing)
+
+    async def _flush_later(self) -> List[str]:
+        import asyncio
+        # Lets the coroutines scheduled in the same iteration of the loop queue their commands first.
+        await asyncio.sleep(0)
+        self._flushing = None
+        commands, self.queue = self.queue, []
+        return await asyncio.get_running_loop().run_in_executor(None, write_commands, self.target, commands, self.merge)
+
+    async def send_async(self, *commands: str) -> List[str]:
+        self.send(*commands)
+        return await self.flush_async()
+
+    def __enter__(self) -> "CommandChannel":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.flush()
+
+
+def send(*commands: str, target: str = DEFAULT_TARGET, merge: bool = True) -> List[str]:
+    """Sends commands in a single batch."""
+    return write_commands(target, commands, merge)
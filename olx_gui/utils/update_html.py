@@ -4,16 +4,22 @@ This updates Olex2 HTML.
 """
 import sys
 
-target = "/tmp/olexcmd"
+try:
+    from .olex_commands import DEFAULT_TARGET, UPDATE, send
+except ImportError:
+    # Run as a script, olex_commands is next to it.
+    from olex_commands import DEFAULT_TARGET, UPDATE, send
+
+target = DEFAULT_TARGET
 
 
 def update(target: str = target) -> None:
-    with open(target, "w") as f:
-        f.write("html.Update")
+    """Asks Olex2 to update its HTML, unless an update is already pending."""
+    send(UPDATE, target=target)
 
 
 if __name__ == "__main__":
     args = sys.argv
     if len(args) > 1:
         target = args[1]
-    update(target)
\ No newline at end of file
+    update(target)
@@ -0,0 +1,218 @@
+"""
+Watches the Python modules defining H3Sections and regenerates their .htm files when they change.
+
+    python -m olx_gui.watch my_gui.sections:refinement my_gui.sections:make_options=gui/options.htm -o gui
+
+Every target is module:attribute[=output], where the attribute is an H3Section or a callable returning one, or the path
+of a spec file (see olx_gui.spec). Without an output the file is written to <output_dir>/<attribute>.htm or
+<output_dir>/<spec file name>.htm. Only the modules that changed are imported again, only the files whose content
+changed are written and Olex2 is told to update once per burst of saves. The rows that changed are reported by their
+NAME, see olx_gui.diff. With --snapshot, a snapshot of every section is written next to its output and the rows are
+compared against it from the first rebuild on, even after a restart.
+
+The helper modules imported by the modules of the sections (every loaded module outside of the standard library, the
+installed packages and olx_gui) are watched as well. When one of them changes, it is imported again before the modules
+of every section, which are all rebuilt.
+"""
+import argparse
+import importlib
+import os
+import sys
+import time
+import traceback
+from typing import Dict, Iterable, List, Optional, Set
+
+from .build import (SectionTarget, SpecTarget, check_outputs, content_digest, file_digest, user_modules,
+                    write_atomic)
+from .diff import Digests, SectionDiff, diff
+from .snapshot import load
+from .utils import update_html
+
+
+class Watcher:
+    """
+    Polls the modification time of the modules of the targets and of the helper modules they import. Changes are
+    collected until no module changed for debounce seconds and then handled in a single rebuild.
+    """
+    def __init__(self, targets: Iterable[SectionTarget], target: str = update_html.target, interval: float = 0.5,
+                 debounce: float = 0.3):
+        self.targets: List[SectionTarget] = list(targets)
+        check_outputs(self.targets)
+        self.target = target
+        self.interval = interval
+        self.debounce = debounce
+        for section_target in self.targets:
+            if not isinstance(section_target, SpecTarget):
+                importlib.import_module(section_target.module)
+            section_target.digest = file_digest(section_target.output)
+        self.snapshots: Dict[str, Digests] = {}
+        for section_target in self.targets:
+            if section_target.snapshot and os.path.exists(section_target.snapshot_path):
+                try:
+                    self.snapshots[section_target.output] = load(section_target.snapshot_path).digests
+                except (OSError, ValueError):
+                    pass
+        self.changes: Dict[str, SectionDiff] = {}
+        """The rows that changed in every output written by the last rebuild, when it was built before."""
+        self.helpers: Dict[str, str] = {}
+        """The source file of the helper modules, by module name."""
+        self._update_helpers()
+        self.mtimes: Dict[str, float] = self._current_mtimes()
+
+    @property
+    def modules(self) -> Set[str]:
+        """The modules and spec files followed."""
+        return {section_target.key for section_target in self.targets}
+
+    def _update_helpers(self) -> None:
+        """Follows the helper modules imported since the last call."""
+        modules = self.modules
+        self.helpers = {name: path for name, path in user_modules().items() if name not in modules}
+
+    def _path(self, module: str) -> Optional[str]:
+        if module in self.helpers:
+            return self.helpers[module]
+        if module in sys.modules:
+            return getattr(sys.modules[module], "__file__", None)
+        return module
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for module in self.modules | set(self.helpers):
+            path = self._path(module)
+            if path is None:
+                continue
+            try:
+                mtimes[module] = os.stat(path).st_mtime
+            except FileNotFoundError:
+                mtimes[module] = 0.0
+        return mtimes
+
+    def poll(self) -> Set[str]:
+        """Returns the modules (and helper modules) that changed since the last poll."""
+        mtimes = self._current_mtimes()
+        changed = {module for module, mtime in mtimes.items() if self.mtimes.get(module) != mtime}
+        self.mtimes = mtimes
+        return changed
+
+    def rebuild(self, modules: Optional[Iterable[str]] = None, reload: bool = True) -> List[str]:
+        """
+        Imports the modules again (unless reload is False), renders their sections and writes the files whose content
+        changed. Changed helper modules are imported again first and every section defined by a module is rebuilt
+        then. Every target is rebuilt when modules is None. Returns the written paths.
+        """
+        if modules is None:
+            modules = self.modules
+        modules = set(modules)
+        helpers = [name for name in reversed(list(sys.modules)) if name in modules and name in self.helpers]
+        if helpers:
+            # In the reverse order of their first import, so a helper is imported again after the helpers it imports.
+            for name in helpers:
+                try:
+                    if reload:
+                        importlib.reload(sys.modules[name])
+                except Exception:
+                    print(f"Could not import {name}:", file=sys.stderr)
+                    traceback.print_exc()
+            modules -= set(helpers)
+            modules |= {section_target.key for section_target in self.targets
+                        if not isinstance(section_target, SpecTarget)}
+        written = []
+        self.changes = {}
+        for module in modules:
+            try:
+                if reload and module in sys.modules:
+                    importlib.reload(sys.modules[module])
+            except Exception:
+                print(f"Could not import {module}:", file=sys.stderr)
+                traceback.print_exc()
+                continue
+            for section_target in self.targets:
+                if section_target.key != module:
+                    continue
+                try:
+                    section = section_target.section()
+                    content = section_target.render(section)
+                except Exception:
+                    print(f"Could not render {module}:{section_target.attr}:", file=sys.stderr)
+                    traceback.print_exc()
+                    continue
+                previous = self.snapshots.get(section_target.output)
+                snapshot = self.snapshots[section_target.output] = Digests.take(section)
+                digest = content_digest(content)
+                if digest == section_target.digest:
+                    continue
+                write_atomic(section_target.output, content)
+                section_target.digest = digest
+                written.append(section_target.output)
+                if section_target.snapshot:
+                    section_target.write_snapshot(section)
+                if previous is not None:
+                    self.changes[section_target.output] = diff(previous, snapshot)
+        self._update_helpers()
+        # The helpers imported for the first time are followed from their current version on.
+        self.mtimes = {**self._current_mtimes(), **self.mtimes}
+        return written
+
+    def step(self) -> List[str]:
+        """
+        Waits for the next burst of changes, rebuilds it and signals Olex2 if anything was written.
+        """
+        changed = self.poll()
+        if not changed:
+            return []
+        while True:
+            time.sleep(self.debounce)
+            more = self.poll()
+            if not more:
+                break
+            changed |= more
+        written = self.rebuild(changed)
+        if written:
+            update_html.update(self.target)
+        return written
+
+    def run(self) -> None:
+        written = self.rebuild(reload=False)
+        if written:
+            update_html.update(self.target)
+        print(f"Watching {len(self.modules)} module(s), {len(written)} file(s) written.")
+        while True:
+            for path in self.step():
+                changes = self.changes.get(path)
+                print(f"Updated {path}" + (f": {changes}" if changes is not None else ""))
+            time.sleep(self.interval)
+
+
+def main(argv: Optional[List[str]] = None, prog: str = "python -m olx_gui.watch") -> None:
+    parser = argparse.ArgumentParser(prog=prog, description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("targets", nargs="+", help="module:attribute[=output]")
+    parser.add_argument("-o", "--output-dir", default=".", help="Directory of the outputs without explicit path.")
+    parser.add_argument("--olex-target", default=update_html.target, help="Command file read by Olex2.")
+    parser.add_argument("--blocks", help="Expands the #include comments against the blocks under this directory.")
+    parser.add_argument("--compact", action="store_true", help="Writes the HTML without indentation.")
+    parser.add_argument("--no-comments", action="store_true", help="Drops the comments that are not #include.")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="Also writes a snapshot of every section next to its output (<output>.olxsnap).")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between checks for changes.")
+    parser.add_argument("--debounce", type=float, default=0.3,
+                        help="Seconds without changes before a burst of saves is rebuilt.")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, os.getcwd())
+    targets = [SectionTarget.parse(spec, args.output_dir) for spec in args.targets]
+    for section_target in targets:
+        section_target.blocks = args.blocks
+        section_target.compact = args.compact
+        section_target.comments = not args.no_comments
+        section_target.snapshot = args.snapshot
+    watcher = Watcher(targets, args.olex_target, args.interval, args.debounce)
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
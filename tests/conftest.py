@@ -0,0 +1,90 @@
+import importlib
+import os
+import sys
+import textwrap
+from typing import Iterable
+
+import pytest
+
+from olx_gui.components.item_component import (Button, ComboBox, Cycle, Fill, Ignore, InputCheckbox, InputLinkButton,
+                                                InputSpinner, InputText)
+from olx_gui.components.table import H3Section, Row
+
+
+def make_section(names: Iterable[str] = ("A", "B", "C"), label: str = "Text", cycles: bool = False) -> H3Section:
+    """
+    A section with a row per name, each with an InputText <name>_TEXT and an InputCheckbox <name>_CHECK, and with
+    cycles a Cycle of <name>_A and <name>_B in every other row.
+    """
+    section = H3Section()
+    for k, name in enumerate(names):
+        row = Row(name)
+        row.add(InputText(f"{name}_TEXT", label), InputCheckbox(f"{name}_CHECK", "Check"))
+        if cycles and k % 2 == 0:
+            row.add(Cycle(InputText(f"{name}_A", "A"), InputSpinner(f"{name}_B", "B"), "spy.GetParam(x)"))
+        section.add(row)
+    return section
+
+
+@pytest.fixture
+def build_section():
+    """make_section, see there for the parameters."""
+    return make_section
+
+
+def make_components() -> list:
+    """Every kind of component, with labels on every side, fixed widths and expressions."""
+    return [
+        InputText("TEXT", "Text", onclick="spy.SetParam(x, html.GetValue(~name~))"),
+        InputText("TEXT_LEFT", "Left", label_left=True, tdwidth="20%"),
+        ComboBox("COMBO", "Combo", items="a;b;c", tdwidth="20%"),
+        InputCheckbox("CHECK", "Check"),
+        InputSpinner("SPIN", "Spin", label_top=False),
+        InputLinkButton("LINK", "Link"),
+        Button("BUTTON"),
+        Fill(),
+        Cycle(InputText("CYCLE_A", "A"), InputSpinner("CYCLE_B", "B"), "strcmp(GetVar(mode), 'a')"),
+        Ignore(InputCheckbox("IGNORED", "Ignored"), "spy.GetParam(x)"),
+    ]
+
+
+@pytest.fixture
+def components():
+    """make_components, a new list every call."""
+    return make_components
+
+
+class Project:
+    """Python modules written to a directory on sys.path."""
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, module: str) -> str:
+        return str(self.directory / f"{module}.py")
+
+    def write(self, module: str, source: str) -> str:
+        """Writes the module, with a modification time after the one it had so the change is always seen."""
+        path = self.path(module)
+        mtime = os.stat(path).st_mtime if os.path.exists(path) else 0.0
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(textwrap.dedent(source))
+        if os.stat(path).st_mtime <= mtime:
+            os.utime(path, (mtime + 1, mtime + 1))
+        importlib.invalidate_caches()
+        return path
+
+    def unload(self) -> None:
+        """Removes the modules of the project from sys.modules, as in a new process."""
+        for name, module in list(sys.modules.items()):
+            if str(getattr(module, "__file__", None) or "").startswith(str(self.directory)):
+                del sys.modules[name]
+
+
+@pytest.fixture
+def project(tmp_path, monkeypatch):
+    """A Project in tmp_path, its modules are unloaded afterwards."""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+    project = Project(tmp_path)
+    yield project
+    project.unload()
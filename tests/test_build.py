@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+from olx_gui.build import BuildCache, SectionTarget, build, check_outputs, main, write_atomic
+
+HELPER = """
+LABEL = "Text"
+"""
+
+SECTION = """
+from olx_gui.components.item_component import InputText
+from olx_gui.components.table import H3Section, Row
+from helpers import LABEL
+
+
+def options():
+    section = H3Section()
+    for name in ("A", "B"):
+        row = Row(name)
+        row.add(InputText(name + "_TEXT", LABEL))
+        section.add(row)
+    return section
+
+
+refinement = options()
+"""
+
+
+@pytest.fixture
+def sections(project):
+    project.write("helpers", HELPER)
+    project.write("sections", SECTION)
+    return project
+
+
+def targets(project, *specs):
+    return [SectionTarget.parse(spec, str(project.directory / "gui")) for spec in specs]
+
+
+def test_build_in_process_pool(sections):
+    from sections import options
+    olex_target = str(sections.directory / "olexcmd")
+    results = build(targets(sections, "sections:options", "sections:refinement"), jobs=2, target=olex_target)
+    assert [result.status for result in results] == ["written", "written"]
+    for result in results:
+        with open(result.output, encoding="utf-8") as f:
+            assert f.read() == str(options())
+        assert result.size == os.path.getsize(result.output)
+        assert sections.path("helpers") in result.sources
+    with open(olex_target, encoding="utf-8") as f:
+        assert f.read() == "html.Update"
+
+
+def test_write_atomic_keeps_the_mode(tmp_path):
+    path = str(tmp_path / "section.htm")
+    write_atomic(path, "a")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(path).st_mode & 0o777 == 0o666 & ~umask
+    os.chmod(path, 0o640)
+    write_atomic(path, "b")
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["section.htm"]
+
+
+def test_duplicate_outputs(sections):
+    output = sections.directory / "gui" / "options.htm"
+    duplicates = targets(sections, "sections:options", f"sections:refinement={output}")
+    with pytest.raises(ValueError, match="sections:options and sections:refinement both write"):
+        check_outputs(duplicates)
+    with pytest.raises(ValueError):
+        build(duplicates, target=None)
+
+
+def test_cache(sections):
+    cache_dir = str(sections.directory / "gui")
+
+    def statuses():
+        # Every build runs in a new process.
+        sections.unload()
+        results = build(targets(sections, "sections:options", "sections:refinement"), jobs=1, target=None,
+                        cache=BuildCache(cache_dir))
+        return [result.status for result in results]
+    assert statuses() == ["written", "written"]
+    assert statuses() == ["cached", "cached"]
+    # Rebuilt, the HTML is the same.
+    sections.write("helpers", HELPER + "# A comment\n")
+    assert statuses() == ["unchanged", "unchanged"]
+    assert statuses() == ["cached", "cached"]
+    sections.write("helpers", 'LABEL = "Other"\n')
+    assert statuses() == ["written", "written"]
+    with open(os.path.join(cache_dir, "options.htm"), encoding="utf-8") as f:
+        assert "Other" in f.read()
+    # An output changed by hand is written again.
+    with open(os.path.join(cache_dir, "options.htm"), "w", encoding="utf-8") as f:
+        f.write("changed")
+    assert statuses() == ["written", "cached"]
+
+
+def test_force_keeps_the_other_entries(sections, monkeypatch, capsys):
+    monkeypatch.chdir(sections.directory)
+    output_dir = str(sections.directory / "gui")
+    main(["sections:options", "sections:refinement", "-o", output_dir, "--no-update"])
+    main(["sections:options", "-o", output_dir, "--no-update", "--force"])
+    report = capsys.readouterr().out.splitlines()
+    assert report[-1].endswith("0 written, 1 unchanged, 0 skipped")
+    with open(os.path.join(output_dir, BuildCache.FILENAME), encoding="utf-8") as f:
+        assert sorted(json.load(f)["entries"]) == ["options.htm", "refinement.htm"]
+    targets = [SectionTarget.parse(spec, output_dir) for spec in ("sections:options", "sections:refinement")]
+    results = build(targets, jobs=1, target=None, cache=BuildCache(output_dir))
+    assert [result.status for result in results] == ["cached", "cached"]
@@ -0,0 +1,79 @@
+from html.parser import HTMLParser
+
+from dominate.tags import b, comment, div, font, td
+
+from olx_gui.components.compact import BLOCK_TAGS, compact_html
+from olx_gui.components.item_component import ComboBox, InputCheckbox, InputText
+from olx_gui.components.table import H3Section, Row
+
+SPACE = ("data", " ")
+
+
+class Rendered(HTMLParser):
+    """The tags, text and comments of a document with the whitespace a browser would show, as single spaces."""
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = []
+
+    def _add(self, token):
+        block = token[0] in ("start", "end") and token[1] in BLOCK_TAGS
+        if self.tokens and self.tokens[-1] == SPACE and (block or token == SPACE):
+            self.tokens.pop()
+        if token == SPACE and (not self.tokens or self.tokens[-1][1] in BLOCK_TAGS):
+            return
+        self.tokens.append(token)
+
+    def handle_starttag(self, tag, attrs):
+        self._add(("start", tag, tuple(attrs)))
+
+    def handle_endtag(self, tag):
+        self._add(("end", tag))
+
+    def handle_data(self, data):
+        text = " ".join(data.split())
+        if data[:1].isspace():
+            self._add(SPACE)
+        if text:
+            self._add(("data", text))
+            if data[-1:].isspace():
+                self._add(SPACE)
+
+    def handle_comment(self, data):
+        self._add(("comment", data.strip()))
+
+
+def rendered(html: str) -> list:
+    parser = Rendered()
+    parser.feed(html)
+    parser.close()
+    return parser.tokens
+
+
+def test_labeled_components_keep_the_space_beside_the_label():
+    row = Row("R")
+    row.add(InputText("A", "Label"), InputCheckbox("B", "Check"), ComboBox("C", "Combo", items="a;b"))
+    pretty, compact = str(row), row.render_compact()
+    assert "<b>Label</b> <font" in compact
+    assert "\n  " not in compact
+    assert rendered(compact) == rendered(pretty)
+
+
+def test_whitespace_next_to_block_tags_is_dropped():
+    cell = td(div(b("x"), font("y")), "text")
+    assert compact_html(cell.render()) == "<td><div><b>x</b> <font>y</font></div>text</td>"
+
+
+def test_comments():
+    html = div(b("x"), comment("note"), comment(" #include a gui\\a.htm;1 "), font("y")).render()
+    assert compact_html(html) == "<div><b>x</b> <!--note-->\n<!-- #include a gui\\a.htm;1 -->\n<font>y</font></div>"
+    assert compact_html(html, comments=False) == "<div><b>x</b>\n<!-- #include a gui\\a.htm;1 -->\n<font>y</font></div>"
+
+
+def test_section_compact_matches_pretty():
+    section = H3Section()
+    row = Row("R")
+    row.add(InputText("A", "Label"))
+    section.add(row)
+    assert rendered(section.render_compact()) == rendered(str(section))
+    assert rendered(section.render_compact(comments=False)) == [token for token in rendered(str(section))
+                                                                if token[0] != "comment" or "#include" in token[1]]
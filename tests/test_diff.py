@@ -0,0 +1,66 @@
+import os
+
+from olx_gui.components.item_component import InputText
+from olx_gui.diff import Digests, diff, fragment_path, row_keys, write_fragments
+
+
+def test_row_keys(build_section):
+    section = build_section(("A", "B", "A"))
+    assert row_keys(section) == ["line-0", "A", "B", "A#2"]
+
+
+def test_no_changes(build_section):
+    assert diff(build_section(), build_section()).is_empty
+    assert str(diff(build_section(), build_section())) == "no changes"
+
+
+def test_changed_component(build_section):
+    before = Digests.take(build_section())
+    section = build_section()
+    section.lines[2].last_component.children[0].input["value"] = "x"
+    section.lines[2].last_component.children[0].invalidate()
+    changes = diff(before, section)
+    assert [change.key for change in changes.changed] == ["B"]
+    assert changes.changed[0].changed == ["InputText(B_TEXT)"]
+    assert str(changes) == "1 changed (B: ~InputText(B_TEXT))"
+
+
+def test_added_removed_and_reordered_rows(build_section):
+    changes = diff(build_section(("A", "B", "C")), build_section(("C", "A", "D")))
+    assert changes.added == ["D"]
+    assert changes.removed == ["B"]
+    assert changes.reordered
+    assert not changes.changed
+
+
+def test_added_component(build_section):
+    section = build_section()
+    before = Digests.take(section)
+    section.lines[1].add(InputText("A_MORE"))
+    changes = diff(before, section)
+    assert changes.changed[0].added == ["InputText(A_MORE)"]
+    assert set(changes.changed[0].changed) == {"InputText(A_TEXT)", "InputCheckbox(A_CHECK)"}
+
+
+def test_write_fragments_rewrites_changed_rows(build_section, tmp_path):
+    directory = str(tmp_path)
+    section = build_section()
+    previous = write_fragments(section, directory)
+    assert sorted(os.listdir(directory)) == ["A.htm", "B.htm", "C.htm", "line-0.htm"]
+    os.utime(fragment_path(directory, "A"), (0, 0))
+    section.lines[2].add(InputText("B_MORE"))
+    section.lines.pop(3)
+    write_fragments(section, directory, previous)
+    assert os.stat(fragment_path(directory, "A")).st_mtime == 0
+    assert "B_MORE" in (tmp_path / "B.htm").read_text(encoding="utf-8")
+    assert not (tmp_path / "C.htm").exists()
+
+
+def test_fragments_stay_in_their_directory(build_section, tmp_path):
+    directory = tmp_path / "fragments"
+    section = build_section(("../outside", "a/b", "..", "/absolute"))
+    previous = write_fragments(section, str(directory))
+    assert os.listdir(tmp_path) == ["fragments"]
+    assert len(os.listdir(directory)) == 5
+    write_fragments(build_section(()), str(directory), previous)
+    assert os.listdir(directory) == ["line-0.htm"]
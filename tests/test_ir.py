@@ -0,0 +1,62 @@
+import io
+
+import pytest
+
+from olx_gui.components.item_component import InputText
+from olx_gui.components.ir import CompiledSection, Program, compile_tree
+from olx_gui.components.render_context import render_context
+from olx_gui.components.table import H3Section, Row
+
+
+@pytest.fixture
+def section(build_section, components):
+    section = build_section(cycles=True)
+    row = Row("ALL")
+    row.add(*components())
+    section.add(row)
+    return section
+
+
+@pytest.mark.parametrize("indent, pretty, xhtml", [("  ", True, False), ("\t", True, False), ("  ", False, False),
+                                                   ("    ", True, True)])
+def test_compiled_section_renders_as_str(section, indent, pretty, xhtml):
+    compiled = section.compile()
+    assert isinstance(compiled, CompiledSection)
+    assert len(compiled.programs) == len(section.lines)
+    assert "".join(compiled.iter_render(indent, pretty, xhtml)) == "".join(section.iter_render(indent, pretty, xhtml))
+    assert str(compiled) == str(section)
+
+
+def test_compiled_preview(section):
+    with render_context(preview_width=section.preview_width, unwrap_cycles=True):
+        compiled = section.compile()
+    assert str(compiled) == section._repr_html_()
+    assert "<cycle" not in str(compiled)
+
+
+def test_row_program(section):
+    row = section.lines[-1]
+    program = row.compile()
+    assert isinstance(program, Program) and len(program) > 0
+    assert program.render() == row.render()
+    assert program.render(2, "  ", True, False) == "".join(row._render([], 2, "  ", True, False))
+    assert compile_tree(row).render() == row.render()
+
+
+def test_compiled_section_does_not_follow_changes(section):
+    compiled = section.compile()
+    before = str(compiled)
+    section.lines[1].add(InputText("LATER"))
+    assert str(compiled) == before
+    assert str(section) != before
+
+
+def test_write_to(section):
+    buffer = io.StringIO()
+    compiled = section.compile()
+    assert compiled.write_to(buffer) == len(str(section))
+    assert buffer.getvalue() == str(section)
+
+
+def test_empty_section():
+    assert str(H3Section().compile()) == str(H3Section())
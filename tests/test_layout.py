@@ -0,0 +1,118 @@
+import pytest
+from dominate.tags import td
+
+from olx_gui.components.item_component import Cycle, Fill, Ignore, InputCheckbox, InputText, ignore
+from olx_gui.components.layout import WidthSpec, combine, distribute, parse_width, solve
+from olx_gui.components.table import Row
+
+
+@pytest.mark.parametrize("value, expected", [("30%", 30.0), ("30", 30.0), (30, 30.0), (" 12.5% ", 12.5),
+                                             ("#width", None), (None, None), (False, None)])
+def test_parse_width(value, expected):
+    assert parse_width(value) == expected
+
+
+@pytest.mark.parametrize("n", range(1, 12))
+def test_equal_shares_sum_to_total(n):
+    shares = distribute([WidthSpec()] * n)
+    assert sum(shares) == 100
+    assert max(shares) - min(shares) <= 1
+
+
+def test_remainder_goes_to_the_first_of_equal_fractions():
+    assert distribute([WidthSpec()] * 3) == [34, 33, 33]
+
+
+def test_fixed_specs_are_left_out():
+    specs = [WidthSpec(fixed="30%"), WidthSpec(), WidthSpec()]
+    assert distribute(specs) == [0, 35, 35]
+
+
+def test_weights():
+    assert distribute([WidthSpec(weight=2), WidthSpec(weight=1), WidthSpec(weight=1)]) == [50, 25, 25]
+    assert distribute([WidthSpec(weight=0), WidthSpec(weight=0)]) == [50, 50]
+
+
+def test_minimum_widths_are_pinned():
+    shares = distribute([WidthSpec(weight=1, minimum=40), WidthSpec(weight=4), WidthSpec(weight=4)])
+    assert shares == [40, 30, 30]
+
+
+def test_minimum_widths_that_do_not_fit():
+    shares = distribute([WidthSpec(minimum=70), WidthSpec(minimum=70)])
+    assert shares == [70, 70]
+
+
+def test_no_flexible_specs():
+    assert distribute([WidthSpec(fixed="50%"), WidthSpec(fixed="50%")]) == [0, 0]
+    assert distribute([]) == []
+
+
+def test_combine():
+    assert combine([]) is None
+    assert combine([WidthSpec(fixed="20%"), WidthSpec(fixed="30%"), WidthSpec()]) == WidthSpec(fixed="30%")
+    assert combine([WidthSpec(weight=2), WidthSpec(minimum=10)]) == WidthSpec(weight=2, minimum=10)
+
+
+def test_solve_skips_comments_and_text():
+    from dominate.tags import comment
+    widths = solve([InputText("A"), comment("x"), "text", InputText("B")])
+    assert widths == ["50%", None, None, "50%"]
+
+
+def test_row_widths_add_up():
+    row = Row("R")
+    row.add(InputText("A"), InputText("B"), InputText("C", tdwidth="40%"))
+    assert row.finalize() == ["30%", "30%", "40%"]
+    assert [component["width"] for component in row.last_component] == ["30%", "30%", "40%"]
+
+
+def test_cycle_passes_its_width_to_the_components_only():
+    row = Row("R")
+    cycle = Cycle(InputText("A"), InputCheckbox("B"), "spy.GetParam(x)")
+    row.add(InputText("C"), cycle)
+    row.finalize()
+    assert cycle["width"] == "50%"
+    for wrapper in cycle.children:
+        assert isinstance(wrapper, ignore)
+        assert "width" not in wrapper.attributes
+        assert wrapper.children[0]["width"] == "50%"
+    assert "<ignore test" in str(row) and "<ignore width" not in str(row)
+
+
+def test_fixed_cycle_keeps_the_greater_width():
+    cycle = Ignore(InputText("A", tdwidth="20%"), "spy.GetParam(x)")
+    row = Row("R")
+    row.add(cycle, InputText("B"))
+    assert row.finalize() == ["20%", "80%"]
+    assert cycle.children[0].children[0]["width"] == "20%"
+
+
+def test_plain_tags_keep_an_explicit_width():
+    fill, cell = Fill(width="10%"), td(width="#width")
+    row = Row("R")
+    row.add(InputText("A"), fill, cell)
+    assert row.finalize() == ["90%", "10%", "#width"]
+    assert fill["width"] == "10%" and cell["width"] == "#width"
+
+
+def test_plain_tags_without_width_are_solved_again():
+    cell = td()
+    row = Row("R")
+    row.add(cell, InputText("A"))
+    assert row.finalize() == ["50%", "50%"]
+    row.add(InputText("B"), InputText("C"))
+    assert row.finalize() == ["25%", "25%", "25%", "25%"]
+    assert cell["width"] == "25%"
+
+
+def test_cycle_keeps_widths_that_are_not_percentages():
+    first = InputText("A", tdwidth="#width")
+    cycle = Cycle(first, InputText("B", tdwidth="20%"), "spy.GetParam(x)")
+    assert first["width"] == "#width"
+    assert cycle.fixed_width == "20%"
+    row = Row("R")
+    row.add(cycle, InputText("C"))
+    assert row.finalize() == ["20%", "80%"]
+    assert first["width"] == "#width"
+    assert 'width="#width"' in str(row)
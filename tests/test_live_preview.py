@@ -0,0 +1,90 @@
+import asyncio
+
+from olx_gui.components.item_component import InputText
+from olx_gui.preview import LivePreview
+
+
+async def wait_for(condition, timeout: float = 2.0) -> None:
+    loop = asyncio.get_running_loop()
+    end = loop.time() + timeout
+    while not condition():
+        assert loop.time() < end, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_renders_on_the_event_loop(build_section):
+    async def main():
+        section = build_section()
+        with LivePreview(section, delay=0.05, interval=0.01) as preview:
+            assert preview.running
+            await wait_for(lambda: preview.renders == 1)
+            assert preview.html == section._repr_html_()
+            section.lines[1].add(InputText("ADDED"))
+            await wait_for(lambda: preview.renders == 2)
+            assert "ADDED" in preview.html
+        assert not preview.running
+    run(main())
+
+
+def test_sees_changes_rendered_by_someone_else(build_section):
+    async def main():
+        section = build_section()
+        with LivePreview(section, delay=0.05, interval=0.01) as preview:
+            await wait_for(lambda: preview.renders == 1)
+            section.lines[2].add(InputText("ADDED"))
+            str(section)  # Fills the render cache before the preview polls.
+            await wait_for(lambda: preview.renders == 2)
+            assert "ADDED" in preview.html
+    run(main())
+
+
+def test_waits_until_the_section_stopped_changing(build_section):
+    async def main():
+        section = build_section()
+        with LivePreview(section, delay=0.2, interval=0.01) as preview:
+            await wait_for(lambda: preview.renders == 1)
+            for k in range(5):
+                section.lines[1].add(InputText(f"ADDED_{k}"))
+                await asyncio.sleep(0.05)
+            assert preview.renders == 1
+            await wait_for(lambda: preview.renders == 2)
+            await asyncio.sleep(0.3)
+            assert preview.renders == 2
+    run(main())
+
+
+def test_failed_render_is_retried(build_section):
+    async def main():
+        section = build_section()
+        section.lines[1].add(InputText("BROKEN", onclick="spy.a("))
+        with LivePreview(section, delay=0.02, interval=0.01) as preview:
+            await wait_for(lambda: preview.error is not None)
+            assert "ValidationError" in preview.html
+            first = preview.renders
+            await wait_for(lambda: preview.renders > first)
+    run(main())
+
+
+def test_mirror(build_section, tmp_path):
+    async def main():
+        mirror = tmp_path / "section.htm"
+        section = build_section()
+        with LivePreview(section, delay=0.02, interval=0.01, mirror=str(mirror),
+                         olex_target=str(tmp_path / "olexcmd")) as preview:
+            await wait_for(lambda: preview.renders == 1)
+            assert mirror.read_text(encoding="utf-8") == str(section)
+            assert (tmp_path / "olexcmd").read_text(encoding="utf-8") == "html.Update"
+    run(main())
+
+
+def test_without_event_loop(build_section):
+    section = build_section()
+    preview = LivePreview(section)
+    assert not preview.running
+    assert preview._repr_html_() == section._repr_html_()
+    section.lines[1].add(InputText("ADDED"))
+    assert "ADDED" in preview.refresh()
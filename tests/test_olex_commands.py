@@ -0,0 +1,105 @@
+import asyncio
+import os
+import stat
+import subprocess
+import sys
+
+from olx_gui.utils import update_html
+from olx_gui.utils.olex_commands import UPDATE, CommandChannel, coalesce, consume, file_mode, send, write_commands
+
+
+def read(path) -> list:
+    with open(path, encoding="utf-8") as f:
+        return f.read().splitlines()
+
+
+def test_coalesce_keeps_first_occurrences():
+    assert coalesce(["a", " b ", "a", "", "c", "b"]) == ["a", "b", "c"]
+
+
+def test_pending_commands_are_kept(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    assert send("a", "b", target=target) == ["a", "b"]
+    assert send("b", "c", target=target) == ["c"]
+    assert read(target) == ["a", "b", "c"]
+    assert consume(target) == ["a", "b", "c"]
+    assert not os.path.exists(target)
+
+
+def test_consumed_commands_are_not_sent_again(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    send("reload", UPDATE, target=target)
+    assert consume(target) == ["reload", UPDATE]
+    assert send(UPDATE, target=target) == [UPDATE]
+    assert read(target) == [UPDATE]
+
+
+def test_without_merge_the_file_is_replaced(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    send("reload", target=target)
+    # Read and left in place: merging would send reload again.
+    assert read(target) == ["reload"]
+    assert send(UPDATE, target=target, merge=False) == [UPDATE]
+    assert read(target) == [UPDATE]
+    with CommandChannel(target, merge=False) as channel:
+        channel.send("echo")
+    assert read(target) == ["echo"]
+
+
+def test_pending_update_is_written_again(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    send(UPDATE, target=target)
+    os.utime(target, (0, 0))
+    assert send(UPDATE, target=target) == []
+    assert os.stat(target).st_mtime > 0
+    assert read(target) == [UPDATE]
+
+
+def test_new_file_mode_follows_umask(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    send(UPDATE, target=target)
+    assert stat.S_IMODE(os.stat(target).st_mode) == file_mode(str(tmp_path / "missing"))
+    os.chmod(target, 0o640)
+    send("other", target=target)
+    assert stat.S_IMODE(os.stat(target).st_mode) == 0o640
+
+
+def test_channel_flushes_once(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    with CommandChannel(target) as channel:
+        channel.update()
+        channel.update()
+        channel.send("reload")
+        assert not os.path.exists(target)
+    assert read(target) == [UPDATE, "reload"]
+
+
+def test_concurrent_coroutines_share_a_write(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    channel = CommandChannel(target)
+
+    async def run():
+        return await asyncio.gather(*(channel.send_async(f"echo {k}") for k in range(5)))
+
+    results = asyncio.run(run())
+    assert all(result == results[0] for result in results)
+    assert read(target) == [f"echo {k}" for k in range(5)]
+
+
+def test_write_commands_ignores_empty_batches(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    assert write_commands(target, ["", "  "]) == []
+    assert not os.path.exists(target)
+
+
+def test_update_html_runs_as_a_script(tmp_path):
+    target = str(tmp_path / "olexcmd")
+    subprocess.run([sys.executable, update_html.__file__, target], check=True, cwd=str(tmp_path))
+    assert read(target) == [UPDATE]
+
+
+def test_update_html_does_not_import_asyncio():
+    code = "import sys, olx_gui.utils.update_html; print('asyncio' in sys.modules, 'tempfile' in sys.modules)"
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    result = subprocess.run([sys.executable, "-c", code], check=True, cwd=root, capture_output=True, text=True)
+    assert result.stdout.split() == ["False", "False"]
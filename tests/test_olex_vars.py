@@ -0,0 +1,21 @@
+from olx_gui.components.item_component import Button, ComboBox, InputCheckbox, InputSpinner, InputText
+from olx_gui.components.olex_vars import HTML_FONT_COLOUR, find_typos
+from olx_gui.components.table import H3Section, Row
+
+
+def test_defaults_have_no_typos():
+    section = H3Section()
+    row = Row("R")
+    row.add(InputText("A", "A"), InputCheckbox("B", "B"), ComboBox("C", "C"), Button("D"), InputSpinner("E", "E"))
+    section.add(row)
+    assert 'flat="false"' in str(section)
+    assert find_typos(section) == []
+
+
+def test_typos():
+    row = Row("R")
+    row.add(InputText("A", flat="fasle", bgcolor="GetVar(HtmlFontColor)"))
+    messages = sorted(issue.message for issue in find_typos(row))
+    assert len(messages) == 2
+    assert "'false'" in messages[0] and "HtmlFontColour" in messages[1]
+    assert HTML_FONT_COLOUR.ref() == "GetVar(HtmlFontColour)"
@@ -0,0 +1,38 @@
+import copy
+
+from olx_gui.components.item_component import Cycle
+from olx_gui.components.table import H3Section, Row
+
+
+def deepcopy_preview(section: H3Section) -> str:
+    """The preview as it was rendered before the render context, from a modified deep copy of the section."""
+    selfrepr = copy.deepcopy(section)
+    for line in selfrepr.lines:
+        if isinstance(line, Row):
+            line.finalize()
+            line.table1["width"] = section.preview_width
+            for k, component in enumerate(line.last_component):
+                if isinstance(component, Cycle):
+                    line.last_component.children[k] = component.children[0][0]
+            line.invalidate()
+    return str(selfrepr)
+
+
+def test_preview_matches_deepcopy_preview(build_section):
+    section = build_section([f"ROW_{i}" for i in range(6)], cycles=True)
+    assert section._repr_html_() == deepcopy_preview(section)
+
+
+def test_preview_leaves_section_unchanged(build_section):
+    section = build_section(cycles=True)
+    before = str(section)
+    preview = section._repr_html_()
+    assert preview != before
+    assert str(section) == before
+    assert "<cycle" in before and "<cycle" not in preview
+
+
+def test_preview_uses_preview_width(build_section):
+    section = build_section(["ROW"])
+    section.preview_width = "75%"
+    assert 'width="75%"' in section._repr_html_()
@@ -0,0 +1,43 @@
+import pickle
+
+import pytest
+
+from olx_gui.components.table import DEFAULT_ROW_CONFIG, Params, Row, RowConfig
+
+
+def test_params_hash_ignores_order():
+    assert hash(Params({"a": "1", "b": "2"})) == hash(Params({"b": "2", "a": "1"}))
+    assert Params({"a": "1"}).set("a", "2")["a"] == "2"
+    with pytest.raises(AttributeError):
+        Params().width = "1"
+
+
+def test_override_shares_unchanged_params():
+    config = RowConfig().override(table1_parameters={"width": "50%"})
+    assert config.table1_parameters["width"] == "50%"
+    assert config.table1_parameters["border"] == "0"
+    assert DEFAULT_ROW_CONFIG.table1_parameters["width"] == "100%"
+    assert config.td1_parameters._items is DEFAULT_ROW_CONFIG.td1_parameters._items
+
+
+def test_rows_have_their_own_config():
+    first, second = Row("A"), Row("B")
+    assert first.config is not second.config
+    with pytest.deprecated_call():
+        first.config.table1_parameters["width"] = "50%"
+    assert DEFAULT_ROW_CONFIG.table1_parameters["width"] == "100%"
+    assert second.config.table1_parameters["width"] == "100%"
+    assert 'width="50%"' not in str(Row("C"))
+
+
+def test_in_place_changes_are_deprecated():
+    config = RowConfig()
+    with pytest.deprecated_call():
+        config.td2_parameters.width = "30"
+    with pytest.deprecated_call():
+        config.tr2_parameters.pop("Xbgcolor")
+    assert config.td2_parameters["width"] == "30"
+    assert "Xbgcolor" not in config.tr2_parameters
+    assert RowConfig().td2_parameters["width"] == "100"
+    assert 'width="30"' in str(Row("R", config=config))
+    assert pickle.loads(pickle.dumps(config)) == config
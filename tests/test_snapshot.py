@@ -0,0 +1,54 @@
+import io
+
+import pytest
+
+from olx_gui.diff import Digests, diff
+from olx_gui.snapshot import MAGIC, SectionSnapshot, SnapshotError, dump, dumps, load, loads
+
+
+def test_round_trip(build_section):
+    section = build_section(cycles=True)
+    snapshot = loads(dumps(section))
+    assert isinstance(snapshot, SectionSnapshot)
+    assert str(snapshot) == str(section)
+    assert snapshot._repr_html_() == section._repr_html_()
+    assert diff(snapshot, section).is_empty
+
+
+@pytest.mark.parametrize("use_mmap", [False, True])
+def test_dump_and_load(build_section, tmp_path, use_mmap):
+    section = build_section(label="Température", cycles=True)
+    path = str(tmp_path / "section.olxsnap")
+    dump(section, path)
+    snapshot = load(path, use_mmap=use_mmap)
+    assert str(snapshot) == str(section)
+    buffer = io.StringIO()
+    assert snapshot.write_to(buffer) == len(buffer.getvalue().encode("utf-8"))
+    assert buffer.getvalue() == str(section)
+
+
+def test_descriptions(build_section):
+    descriptions = loads(dumps(build_section(cycles=True))).descriptions
+    assert len(descriptions) == len(build_section(cycles=True).lines)
+    assert "A_TEXT" in str(descriptions[1])
+
+
+def test_diff_loaded_snapshots(build_section):
+    old = loads(dumps(build_section(cycles=True)))
+    changes = diff(old, build_section(label="Other", cycles=True))
+    assert [change.key for change in changes.changed] == ["A", "B", "C"]
+    assert isinstance(old.digests, Digests)
+
+
+def test_diff_rejects_other_types(build_section):
+    with pytest.raises(TypeError, match="can't diff a str"):
+        diff("section", build_section(cycles=True))
+
+
+def test_invalid_data(build_section):
+    with pytest.raises(SnapshotError):
+        loads(b"not a snapshot")
+    with pytest.raises(SnapshotError):
+        loads(dumps(build_section(cycles=True))[:len(MAGIC) + 20])
+    with pytest.raises(SnapshotError):
+        loads(dumps(build_section(cycles=True))[:-1])
@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+from olx_gui.components.item_component import Cycle, Ignore, InputText
+from olx_gui.spec import SpecCache, SpecError, compile_component, compile_spec, load_spec, render_spec, spec_digest
+
+SPEC = {
+    "preview_width": "60%",
+    "rows": [
+        {
+            "name": "SNUM_OPTIONS",
+            "config": {"td1_parameters": {"width": "90%"}},
+            "components": [
+                {"type": "InputText", "name": "SNUM_NAME", "label": "Name", "weight": 2},
+                {"type": "ComboBox", "name": "SNUM_MODE", "label": "Mode", "items": "a;b;c", "tdwidth": "30%"},
+                {"type": "Ignore", "condition": "spy.GetParam(x)",
+                 "component": {"type": "InputCheckbox", "name": "SNUM_FLAG"}},
+            ],
+        },
+        {
+            "name": "SNUM_CYCLE",
+            "components": [
+                {"type": "Cycle", "condition": "strcmp(GetVar(mode), 'a')",
+                 "components": [{"type": "InputText", "name": "SNUM_A"}, {"type": "Button", "name": "SNUM_B"}]},
+                {"type": "Fill", "width": "10%"},
+            ],
+        },
+    ],
+}
+
+
+def test_compile_spec():
+    section = compile_spec(SPEC)
+    assert section.preview_width == "60%"
+    first, second = section.lines[1:]
+    assert first["NAME"] == "SNUM_OPTIONS"
+    assert first.td1["width"] == "90%"
+    text, combo, ignored = first.last_component.children
+    assert isinstance(text, InputText) and text.weight == 2 and text.label.children == ["Name"]
+    assert combo.input["items"] == "a;b;c" and combo["width"] == "30%"
+    assert isinstance(ignored, Ignore)
+    assert isinstance(second.last_component.children[0], Cycle)
+    assert 'name="SNUM_B"' in str(section)
+
+
+def test_spec_matches_python():
+    section = compile_spec({"rows": [{"name": "R", "components": [
+        {"type": "InputText", "name": "A", "label": "A"}, {"type": "InputCheckbox", "name": "B"}]}]})
+    from olx_gui.components.item_component import InputCheckbox
+    from olx_gui.components.table import H3Section, Row
+    expected = H3Section()
+    row = Row("R")
+    row.add(InputText("A", "A"), InputCheckbox("B"))
+    expected.add(row)
+    assert str(section) == str(expected)
+
+
+@pytest.mark.parametrize("component, message", [
+    ({"type": "Button", "name": "B", "label": "x"}, "section.rows[0].components[1]: unknown keys for Button: label"),
+    ({"type": "Fill", "weight": 2}, "section.rows[0].components[1]: unknown keys for Fill: weight"),
+    ({"type": "InputText", "name": "T", "lable": "x"}, "unknown keys for InputText: lable"),
+    ({"type": "Cycle", "condition": "x", "weight": 2, "components": [{"type": "Fill"}, {"type": "Fill"}]},
+     "unknown keys for Cycle: weight"),
+    ({"type": "Cycle", "condition": "x", "components": [{"type": "Fill"}, {"type": "Fill", "name": "F"}]},
+     "section.rows[0].components[1].components[1]: unknown keys for Fill: name"),
+    ({"type": "Slider", "name": "S"}, "unknown component type 'Slider'"),
+    ({"type": "Ignore", "component": {"type": "Fill"}}, "Ignore needs a condition"),
+    ({"name": "X"}, "a component needs a type"),
+    ({"type": "InputText"}, "section.rows[0].components[1]: "),
+])
+def test_invalid_components(component, message):
+    spec = {"rows": [{"name": "R", "components": [{"type": "Fill"}, component]}]}
+    with pytest.raises(SpecError) as error:
+        compile_spec(spec)
+    assert message in str(error.value)
+
+
+def test_invalid_rows_and_sections():
+    with pytest.raises(SpecError, match="section.rows.0.: a row needs a name"):
+        compile_spec({"rows": [{"components": []}]})
+    with pytest.raises(SpecError, match="unknown keys for a row: component"):
+        compile_spec({"rows": [{"name": "R", "component": []}]})
+    with pytest.raises(SpecError, match="unknown keys for a section: row"):
+        compile_spec({"row": []})
+    with pytest.raises(SpecError, match="section.rows.0..config"):
+        compile_spec({"rows": [{"name": "R", "config": {"unknown_parameters": {}}}]})
+
+
+def test_component_where():
+    with pytest.raises(SpecError, match="^component: unknown keys for Button: label$"):
+        compile_component({"type": "Button", "name": "B", "label": "x"})
+
+
+def test_spec_digest_ignores_key_order():
+    assert spec_digest({"a": 1, "b": [1, 2]}) == spec_digest({"b": [1, 2], "a": 1})
+    assert spec_digest({"a": 1}) != spec_digest({"a": 2})
+
+
+def test_spec_cache(tmp_path):
+    cache = SpecCache(str(tmp_path))
+    assert cache.section(SPEC) is cache.section(json.loads(json.dumps(SPEC)))
+    html = cache.html(SPEC)
+    assert html == str(compile_spec(SPEC))
+    assert len(list(tmp_path.iterdir())) == 1
+    assert SpecCache(str(tmp_path)).html(SPEC) == html
+
+
+def test_load_spec_file(tmp_path):
+    path = tmp_path / "section.json"
+    path.write_text(json.dumps(SPEC), encoding="utf-8")
+    assert load_spec(str(path)) == SPEC
+    assert render_spec(str(path)) == str(compile_spec(SPEC))
+    with pytest.raises(SpecError, match="unknown spec format"):
+        load_spec(str(tmp_path / "section.ini"))
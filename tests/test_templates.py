@@ -0,0 +1,69 @@
+import pytest
+
+from olx_gui.components import templates
+from olx_gui.components.render_cache import CachedRender
+from olx_gui.components.render_context import render_context
+from olx_gui.components.table import H3Section, Row
+
+
+def drop_caches(tag) -> None:
+    """Drops the render cache of tag and of every tag below it."""
+    if isinstance(tag, CachedRender):
+        tag._render_cache = None
+    for child in getattr(tag, "children", ()):
+        drop_caches(child)
+
+
+def render_all(tags, indent_level: int = 0, indent_str: str = "  ", pretty: bool = True, xhtml: bool = False) -> list:
+    outputs = []
+    for tag in tags:
+        drop_caches(tag)
+        outputs.append("".join(tag._render([], indent_level, indent_str, pretty, xhtml)))
+    return outputs
+
+
+def without_templates(monkeypatch, render):
+    with monkeypatch.context() as patch:
+        patch.setattr(templates, "TEMPLATES_ENABLED", False)
+        return render()
+
+
+@pytest.mark.parametrize("indent_level, indent_str, pretty, xhtml", [
+    (0, "  ", True, False), (8, "  ", True, False), (2, "\t", True, False), (0, "  ", False, False),
+    (3, "    ", True, True), (0, "  ", False, True),
+])
+def test_components_render_as_dominate(components, monkeypatch, indent_level, indent_str, pretty, xhtml):
+    tags = components()
+    expected = without_templates(monkeypatch, lambda: render_all(tags, indent_level, indent_str, pretty, xhtml))
+    assert render_all(tags, indent_level, indent_str, pretty, xhtml) == expected
+
+
+def test_section_renders_as_dominate(components, monkeypatch):
+    section = H3Section()
+    for k, component in enumerate(components()):
+        row = Row(f"ROW_{k}")
+        row.add(component)
+        section.add(row)
+
+    def render():
+        for line in section.lines:
+            drop_caches(line)
+        return str(section), section._repr_html_(), "".join(section.iter_render(pretty=False, xhtml=True))
+    expected = without_templates(monkeypatch, render)
+    assert render() == expected
+
+
+def test_preview_context_renders_as_dominate(components, monkeypatch):
+    tags = components()
+    with render_context(preview_width="75%", unwrap_cycles=True):
+        expected = without_templates(monkeypatch, lambda: render_all(tags))
+        assert render_all(tags) == expected
+
+
+def test_changed_component_renders_again(components):
+    text = components()[0]
+    before = "".join(text._render([], 0, "  ", True, False))
+    text.input["value"] = "changed"
+    text.invalidate()
+    after = "".join(text._render([], 0, "  ", True, False))
+    assert 'value="changed"' in after and after != before
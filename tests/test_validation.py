@@ -0,0 +1,70 @@
+import pytest
+
+from olx_gui.components.item_component import Cycle, InputText, include_comment
+from olx_gui.components.table import H3Section, Row
+from olx_gui.components.validation import (ValidationError, balance_error, validate_include, validate_tree,
+                                           validate_value, verify_functions)
+
+
+@pytest.mark.parametrize("value", ["spy.SetParam(x, html.GetValue(~name~))", "strcmp(GetVar(a), 'b)')",
+                                   "not spy.GetParam([1, 2])", "$GetVar('HtmlFontColour')", "plain (text"])
+def test_valid_values(value):
+    assert validate_value(value) is None
+
+
+@pytest.mark.parametrize("value, position, message", [
+    ("spy.SetParam(x", 12, "unclosed '('"),
+    ("spy.a(b))", 8, "unexpected ')'"),
+    ("spy.a(b]", 7, "']' closes '(' opened at position 5"),
+    ("strcmp(GetVar(a), 'b)", 18, "unclosed '"),
+])
+def test_invalid_values(value, position, message):
+    assert balance_error(value) == (position, message)
+    issue = validate_value(value, "onclick", "InputText(X)")
+    assert (issue.position, issue.message, issue.attribute, issue.where) == (position, message, "onclick",
+                                                                            "InputText(X)")
+
+
+def test_include_parameters():
+    assert validate_include(" #include name gui\\blocks\\a.htm;key=value;1 ") == []
+    issues = validate_include(" #include name gui\\a.htm;=value;key=spy.a( ")
+    assert [issue.message for issue in issues] == ["parameter without a name", "unclosed '('"]
+    assert validate_include(" #include name ;key=value ")[0].message == "missing the path of the include"
+    assert validate_include(" not an include ") == []
+
+
+def test_validate_tree_names_the_component():
+    row = Row("R")
+    row.add(InputText("A", onclick="spy.a("), InputText("B"))
+    issues = validate_tree(row)
+    assert len(issues) == 1
+    assert issues[0].where == "InputText(A)"
+    assert str(issues[0]) == "InputText(A) onclick='spy.a(': unclosed '(' at position 5."
+
+
+def test_issues_are_cached_until_the_row_changes():
+    row = Row("R")
+    row.add(InputText("A"))
+    first = validate_tree(row)
+    assert validate_tree(row) is first
+    row.add(InputText("B", onchange="spy.b("))
+    assert len(validate_tree(row)) == 1
+
+
+def test_section_raises_before_rendering():
+    section = H3Section()
+    row = Row("R")
+    row.add(Cycle(InputText("A"), InputText("B"), "strcmp(GetVar(a), 'b'"))
+    section.add(row)
+    section.add(include_comment("block", "gui\\b.htm", key="spy.a("))
+    assert len(section.validate()) == 3
+    with pytest.raises(ValidationError) as error:
+        str(section)
+    assert "3 invalid Olex2 expression(s)" in str(error.value)
+    assert "".join(section.iter_render(validate=False))
+
+
+def test_verify_functions():
+    verify_functions({"a": "spy.a(b)", "b": "text("})
+    with pytest.raises(ValueError):
+        verify_functions({"a": "spy.a(b"})
@@ -0,0 +1,103 @@
+import os
+
+import pytest
+
+from olx_gui import watch
+from olx_gui.build import SectionTarget
+from olx_gui.watch import Watcher
+
+HELPER = """
+LABEL = "Text"
+"""
+
+SECTION = """
+from olx_gui.components.item_component import InputText
+from olx_gui.components.table import H3Section, Row
+from watched_helpers import LABEL
+
+NAMES = ("A", "B")
+
+
+def options():
+    section = H3Section()
+    for name in NAMES:
+        row = Row(name)
+        row.add(InputText(name + "_TEXT", LABEL))
+        section.add(row)
+    return section
+"""
+
+
+@pytest.fixture
+def watcher(project):
+    project.write("watched_helpers", HELPER)
+    project.write("watched", SECTION)
+    target = SectionTarget.parse("watched:options", str(project.directory / "gui"))
+    watcher = Watcher([target], target=str(project.directory / "olexcmd"), interval=0.01, debounce=0.01)
+    assert watcher.rebuild(reload=False) == [target.output]
+    return watcher
+
+
+def read(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def test_follows_the_helper_modules(watcher, project):
+    assert watcher.modules == {"watched"}
+    assert watcher.helpers["watched_helpers"] == project.path("watched_helpers")
+    assert watcher.poll() == set()
+
+
+def test_rebuilds_the_changed_module(watcher, project):
+    output = watcher.targets[0].output
+    project.write("watched", SECTION.replace('("A", "B")', '("A", "B", "C")'))
+    assert watcher.step() == [output]
+    assert 'NAME="C"' in read(output)
+    assert str(watcher.changes[output]) == "1 added (C)"
+    assert read(watcher.target) == "html.Update"
+
+
+def test_rebuilds_after_a_helper_change(watcher, project):
+    output = watcher.targets[0].output
+    project.write("watched_helpers", 'LABEL = "Other"\n')
+    assert watcher.step() == [output]
+    assert "Other" in read(output)
+    assert str(watcher.changes[output]) == "2 changed (A: ~InputText(A_TEXT); B: ~InputText(B_TEXT))"
+
+
+def test_unchanged_output_is_not_written(watcher, project):
+    output = watcher.targets[0].output
+    os.utime(output, (0, 0))
+    project.write("watched_helpers", HELPER + "# A comment\n")
+    assert watcher.step() == []
+    assert os.stat(output).st_mtime == 0
+    assert watcher.changes == {}
+
+
+def test_debounce_collects_a_burst(watcher, project, monkeypatch):
+    saves = [lambda: project.write("watched_helpers", 'LABEL = "Other"\n'), lambda: None]
+    sleep = watch.time.sleep
+
+    def save_while_waiting(seconds):
+        # A second save comes in while the first one is debounced.
+        if saves:
+            saves.pop(0)()
+        sleep(seconds)
+    monkeypatch.setattr(watch.time, "sleep", save_while_waiting)
+    rebuilds = []
+    rebuild = watcher.rebuild
+    monkeypatch.setattr(watcher, "rebuild", lambda modules: rebuilds.append(set(modules)) or rebuild(modules))
+    project.write("watched", SECTION.replace('("A", "B")', '("A", "B", "C")'))
+    assert watcher.step() == [watcher.targets[0].output]
+    assert rebuilds == [{"watched", "watched_helpers"}]
+    assert "Other" in read(watcher.targets[0].output)
+
+
+def test_broken_module_keeps_the_output(watcher, project, capsys):
+    output = watcher.targets[0].output
+    before = read(output)
+    project.write("watched", SECTION + "\nthis is not python\n")
+    assert watcher.step() == []
+    assert "Could not import watched" in capsys.readouterr().err
+    assert read(output) == before